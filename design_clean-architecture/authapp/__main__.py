@@ -1,23 +1,37 @@
+import sys
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
-import uvicorn
 
+import authapp.cli as cli
 from authapp.parameter import Parameter
 from authapp.di import DiContainer
 from authapp.controllers.auth import AuthRouter
+from authapp.controllers.async_auth import AsyncAuthRouter
+from authapp.controllers.metrics import MetricsMiddleware, MetricsRouter
 from authapp.exceptions import ClientException, ServerException
+from authapp.services.async_auth import AsyncAuthService
 
 
-def build(app: FastAPI):
+def build(app: FastAPI, params: Parameter | None = None):
     # build service
-    params = Parameter()
-    params.load()
+    if params is None:
+        params = Parameter()
+        params.load()
     dic = DiContainer(params)
     service = dic.get_service()
+    metrics = dic.get_metrics()
+    admin_import = dic.is_admin_import_enabled()
 
     # build controller
-    user_router = AuthRouter(service)
+    if isinstance(service, AsyncAuthService):
+        user_router = AsyncAuthRouter(service, metrics, admin_import)
+    else:
+        user_router = AuthRouter(service, metrics, admin_import)
     app.include_router(user_router)
+    if metrics is not None:
+        app.include_router(MetricsRouter(metrics))
+        app.add_middleware(MetricsMiddleware, registry=metrics)
     app.add_exception_handler(ClientException, handle_client_error)
     app.add_exception_handler(ServerException, handle_expected_server_error)
     app.add_exception_handler(Exception, handle_unexpected_server_error)
@@ -44,9 +58,22 @@ def handle_unexpected_server_error(request, error: Exception):
     )
 
 
-app = FastAPI()
-build(app)
+def create_app() -> FastAPI:
+    app = FastAPI()
+    build(app)
+    return app
+
+
+def main():
+    if sys.argv[1:2] == ["import"]:
+        sys.exit(cli.main(sys.argv[1:]))
+    params = Parameter()
+    params.load()
+    DiContainer(params).get_launcher(create_app).run()
 
 
 if __name__ == "__main__":
-    uvicorn.run(app)
+    main()
+else:
+    # for "uvicorn authapp.__main__:app". the launcher builds its own
+    app = create_app()
@@ -0,0 +1,60 @@
+import argparse
+import sys
+from typing import Optional
+
+import authapp.const as const
+from authapp.di import DiContainer
+from authapp.exceptions import ClientException
+from authapp.parameter import Parameter
+from authapp.services.auth import IMPORT_BATCH_SIZE
+from authapp.services.importer import iter_lines
+
+# python -m authapp import users.csv --user_db_type postgres ...
+# repository options are read by Parameter as usual.
+_parser = argparse.ArgumentParser(prog="python -m authapp", allow_abbrev=False)
+_subparsers = _parser.add_subparsers(dest="command", required=True)
+_import_parser = _subparsers.add_parser("import", allow_abbrev=False)
+_import_parser.add_argument("file", help='csv or ndjson file. "-" for stdin')
+_import_parser.add_argument("--format", choices=["csv", "ndjson"])
+_import_parser.add_argument("--batch_size", type=int, default=IMPORT_BATCH_SIZE)
+_import_parser.add_argument("--report", help="write the rejection report json")
+
+
+def main(argv: list[str], params: Optional[Parameter] = None) -> int:
+    args, _ = _parser.parse_known_args(argv)
+    if params is None:
+        params = Parameter()
+        params.load()
+    # a batch job has no event loop to share
+    params.service_mode = const.SERVICE_MODE_SYNC
+    service = DiContainer(params).get_service()
+
+    format = args.format or get_format(args.file)
+    # read as bytes. a line that is not valid UTF-8 is rejected like a bad row
+    try:
+        if args.file == "-":
+            lines = iter_lines(sys.stdin.buffer)
+            report = service.import_users(lines, format, args.batch_size)
+        else:
+            with open(args.file, "rb") as f:
+                lines = iter_lines(f)
+                report = service.import_users(lines, format, args.batch_size)
+    except ClientException as e:
+        # bad input such as a header that is not valid UTF-8. no traceback
+        print(f"import failed: {e}", file=sys.stderr)
+        return 2
+
+    print(
+        f"imported {report.imported}/{report.total} users, "
+        f"rejected {len(report.rejected)} in {report.elapsed_seconds:.1f}s"
+    )
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(report.model_dump_json(indent=2))
+    return 0 if not report.rejected else 1
+
+
+def get_format(path: str) -> str:
+    if path.endswith((".ndjson", ".jsonl")):
+        return const.IMPORT_FORMAT_NDJSON
+    return const.IMPORT_FORMAT_CSV
@@ -7,11 +7,33 @@ LOG_LEVEL_WARNING = "warning"
 LOG_LEVEL_ERROR = "error"
 LOG_LEVEL_CRITICAL = "critical"
 
+# service execution modes
+SERVICE_MODE_SYNC: Final[str] = "sync"
+SERVICE_MODE_ASYNC: Final[str] = "async"
+
+# password hash algorithms
+PASSWORD_HASH_ALGORITHM_SCRYPT: Final[str] = "scrypt"
+PASSWORD_HASH_ALGORITHM_PBKDF2: Final[str] = "pbkdf2-sha256"
+
+# bulk import formats
+IMPORT_FORMAT_CSV: Final[str] = "csv"
+IMPORT_FORMAT_NDJSON: Final[str] = "ndjson"
+
 # user repository db types
 USER_REPOSITORY_TYPE_MOCK: Final[str] = "mock"
+USER_REPOSITORY_TYPE_MEMORY: Final[str] = "memory"
 USER_REPOSITORY_TYPE_POSTGRES: Final[str] = "postgres"
 USER_REPOSITORY_TYPE_ORACLE: Final[str] = "oracle"
 
 # session repository cache types
 SESSION_REPOSITORY_TYPE_MOCK: Final[str] = "mock"
 SESSION_REPOSITORY_TYPE_REDIS: Final[str] = "redis"
+SESSION_REPOSITORY_TYPE_SHARDED: Final[str] = "sharded"
+SESSION_REPOSITORY_TYPE_TOKEN: Final[str] = "token"
+SESSION_REPOSITORY_TYPE_MEMORY: Final[str] = "memory"
+SESSION_REPOSITORY_TYPE_COMPACT: Final[str] = "compact"
+SESSION_REPOSITORY_TYPE_PERSISTENT: Final[str] = "persistent"
+
+# session invalidation channel types
+SESSION_INVALIDATION_CHANNEL_NONE: Final[str] = "none"
+SESSION_INVALIDATION_CHANNEL_REDIS: Final[str] = "redis"
@@ -0,0 +1,100 @@
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from authapp.controllers.auth import (
+    AuthRouter,
+    NDJSON_MEDIA_TYPE,
+    get_import_format,
+    set_next_after_header,
+    to_ndjson,
+)
+from authapp.services.async_auth import AsyncAuthService
+from authapp.services.auth import IMPORT_BATCH_SIZE, MAX_PAGE_SIZE
+from authapp.services.importer import aiter_lines
+from authapp.metrics import MetricsRegistry
+from authapp.models.httpbody import SigninBody, SignupBody, UserLookupBody
+
+
+class AsyncAuthRouter(AuthRouter):
+    # same routes as AuthRouter. handlers are coroutines,
+    # so FastAPI runs them on the event loop instead of the threadpool.
+    def __init__(
+        self,
+        service: AsyncAuthService,
+        metrics: Optional[MetricsRegistry] = None,
+        admin_import: bool = False,
+    ):
+        super().__init__(service, metrics, admin_import)
+
+    async def index(self):
+        return super().index()
+
+    async def get_users(
+        self,
+        response: Response,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        stream: bool = False,
+    ):
+        # debug purpose for sample app.
+        if stream:
+            pages = self._service.iter_users_pages(after)
+            return StreamingResponse(
+                (to_ndjson(users) async for users in pages),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        if limit is None and after is None:
+            return await self._service.list_users()
+        if limit is None:
+            limit = MAX_PAGE_SIZE
+        users = await self._service.list_users_page(limit, after)
+        set_next_after_header(response, users, limit)
+        return users
+
+    async def get_user(self, username, request: Request):
+        all_cookies = request.cookies
+        user = await self._service.get_user(username, all_cookies)
+        return user
+
+    async def signup(self, body: SignupBody):
+        await self._service.signup(body)
+        return {}
+
+    async def signin(self, body: SigninBody):
+        cookies = await self._service.signin(body)
+        # add session cookies
+        response = JSONResponse(content={})
+        [response.set_cookie(key=t[0], value=t[1]) for t in cookies.items()]
+        return response
+
+    async def signout(self, request: Request):
+        all_cookies = request.cookies
+        delete_cookie_keys: list[str] = await self._service.signout(all_cookies)
+        # delete session cookies whether signin or not
+        response = JSONResponse(content={})
+        for key in delete_cookie_keys:
+            response.delete_cookie(key=key)
+        return response
+
+    async def signout_everywhere(self, request: Request):
+        all_cookies = request.cookies
+        delete_cookie_keys = await self._service.signout_everywhere(all_cookies)
+        response = JSONResponse(content={})
+        for key in delete_cookie_keys:
+            response.delete_cookie(key=key)
+        return response
+
+    async def lookup_users(self, body: UserLookupBody):
+        return await self._service.lookup_users(body)
+
+    async def import_users(
+        self,
+        request: Request,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ):
+        # batches are imported while the body is still arriving
+        format = get_import_format(request)
+        lines = aiter_lines(request.stream())
+        return await self._service.import_users(lines, format, batch_size)
@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse, RedirectResponse
+from typing import Iterator, Optional
 
-from authapp.services.auth import AuthService
+from anyio import from_thread
+from fastapi import APIRouter, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+
+import authapp.const as const
+from authapp.exceptions import ClientException
+from authapp.metrics import LAYER_CONTROLLER, MetricsRegistry, timed
+from authapp.services.auth import AuthService, IMPORT_BATCH_SIZE, MAX_PAGE_SIZE
+from authapp.services.importer import iter_lines
+from authapp.models.importer import ImportReport
 from authapp.models.user import UserSchemaWithoutPassword
-from authapp.models.httpbody import SigninBody, SignupBody
+from authapp.models.httpbody import SigninBody, SignupBody, UserLookupBody
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
 
 
 class AuthRouter(APIRouter):
     def __init__(
         self,
         service: AuthService,
+        metrics: Optional[MetricsRegistry] = None,
+        admin_import: bool = False,
     ):
         super().__init__()
         self._service = service
+        self._metrics = metrics
 
         self.add_api_route(
             "/",
@@ -57,12 +72,58 @@ class AuthRouter(APIRouter):
             methods=["DELETE"],
         )
 
+        self.add_api_route(
+            "/api/auth/v1/signin/all",
+            self.signout_everywhere,
+            methods=["DELETE"],
+        )
+
+        # no auth in this sample. mounted only when explicitly enabled
+        if admin_import:
+            self.add_api_route(
+                "/api/auth/v1/admin/users/import",
+                self.import_users,
+                methods=["POST"],
+                response_model=ImportReport,
+            )
+
+        self.add_api_route(
+            "/api/auth/v1/admin/users/lookup",
+            self.lookup_users,
+            methods=["POST"],
+            response_model=list[UserSchemaWithoutPassword],
+        )
+
+    def add_api_route(self, path: str, endpoint, **kwargs):
+        # times every handler when metrics are on
+        if self._metrics is not None:
+            histogram = self._metrics.histogram(LAYER_CONTROLLER, endpoint.__name__)
+            endpoint = timed(endpoint, histogram)
+        super().add_api_route(path, endpoint, **kwargs)
+
     def index(self):
         return RedirectResponse("/redoc")
 
-    def get_users(self):
+    def get_users(
+        self,
+        response: Response,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        stream: bool = False,
+    ):
         # debug purpose for sample app.
-        users = self._service.list_users()
+        if stream:
+            pages = self._service.iter_users_pages(after)
+            return StreamingResponse(
+                (to_ndjson(users) for users in pages),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        if limit is None and after is None:
+            return self._service.list_users()
+        if limit is None:
+            limit = MAX_PAGE_SIZE
+        users = self._service.list_users_page(limit, after)
+        set_next_after_header(response, users, limit)
         return users
 
     def get_user(self, username, request: Request):
@@ -89,3 +150,64 @@ class AuthRouter(APIRouter):
         for key in delete_cookie_keys:
             response.delete_cookie(key=key)
         return response
+
+    def signout_everywhere(self, request: Request):
+        all_cookies = request.cookies
+        delete_cookie_keys = self._service.signout_everywhere(all_cookies)
+        response = JSONResponse(content={})
+        for key in delete_cookie_keys:
+            response.delete_cookie(key=key)
+        return response
+
+    def lookup_users(self, body: UserLookupBody):
+        return self._service.lookup_users(body)
+
+    async def import_users(
+        self,
+        request: Request,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ):
+        # the sync service blocks. run it off the event loop.
+        # it pulls the body chunk by chunk, so the body is never held whole
+        format = get_import_format(request)
+        lines = iter_lines(iter_body(request))
+        return await run_in_threadpool(
+            self._service.import_users, lines, format, batch_size
+        )
+
+
+def get_import_format(request: Request) -> str:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == CSV_MEDIA_TYPE:
+        return const.IMPORT_FORMAT_CSV
+    if content_type == NDJSON_MEDIA_TYPE:
+        return const.IMPORT_FORMAT_NDJSON
+    raise ClientException(
+        f"content-type must be [{CSV_MEDIA_TYPE}|{NDJSON_MEDIA_TYPE}]"
+    )
+
+
+def iter_body(request: Request) -> Iterator[bytes]:
+    # for a worker thread. each chunk is received on the event loop
+    chunks = request.stream()
+
+    async def receive() -> Optional[bytes]:
+        return await anext(chunks, None)
+
+    while (chunk := from_thread.run(receive)) is not None:
+        yield chunk
+
+
+def to_ndjson(users: list[UserSchemaWithoutPassword]) -> str:
+    # one chunk per page
+    return "".join(user.model_dump_json() + "\n" for user in users)
+
+
+def set_next_after_header(
+    response: Response,
+    users: list[UserSchemaWithoutPassword],
+    limit: int,
+):
+    # keyset cursor for the next page. absent on the last page
+    if len(users) == limit:
+        response.headers["X-Next-After"] = users[-1].id
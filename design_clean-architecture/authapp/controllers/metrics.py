@@ -0,0 +1,63 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from authapp.metrics import LAYER_HTTP, PROMETHEUS_MEDIA_TYPE, MetricsRegistry
+
+_UNMATCHED = "unmatched"
+
+
+class MetricsRouter(APIRouter):
+    def __init__(self, registry: MetricsRegistry):
+        super().__init__()
+        self._registry = registry
+
+        self.add_api_route(
+            "/metrics",
+            self.get_metrics,
+            methods=["GET"],
+            include_in_schema=False,
+        )
+
+    def get_metrics(self):
+        return Response(self._registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+class MetricsMiddleware:
+    # times whole requests per route template, including body parsing and
+    # response serialization that the handler spans do not cover.
+    # plain ASGI middleware. BaseHTTPMiddleware costs far more per request.
+    def __init__(self, app, registry: MetricsRegistry):
+        self._app = app
+        self._registry = registry
+        self._histograms = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self._app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # route template, not the raw path, keeps the label set bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None)
+            name = f"{scope['method']} {path}" if path else _UNMATCHED
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._registry.histogram(LAYER_HTTP, name)
+                self._histograms[name] = histogram
+            histogram.observe(elapsed)
+            self._registry.count_response(name, status)
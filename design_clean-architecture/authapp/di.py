@@ -1,27 +1,227 @@
+import importlib
 import logging
 from logging import Logger
+from typing import TYPE_CHECKING, Any, Callable
+
+from fastapi import FastAPI
 
 import authapp.const as const
+from authapp.hashing import PasswordHasher
+from authapp.metrics import (
+    LAYER_HASHER,
+    LAYER_SERVICE,
+    LAYER_SESSION_REPOSITORY,
+    LAYER_USER_REPOSITORY,
+    MetricsRegistry,
+    instrument,
+)
 from authapp.parameter import Parameter
+from authapp.registry import Registry, format_spec, parse_spec
 from authapp.repositories.user.abstract import AbstractUserRepository
-from authapp.repositories.user.mock import MockUserRepository
-from authapp.repositories.user.postgres import PostgresUserRepository
-from authapp.repositories.user.oracle import OracleUserRepository
+from authapp.repositories.user.adapter import AsyncUserRepositoryAdapter
+from authapp.repositories.user.cache import CachedUserRepository
+from authapp.repositories.user.singleflight import (
+    AsyncSingleFlightUserRepository,
+    SingleFlightUserRepository,
+)
 from authapp.repositories.session.abstract import AbstractSessionRepository
-from authapp.repositories.session.mock import MockSessionRepository
-from authapp.repositories.session.redis import RedisSessionRepository
+from authapp.repositories.session.adapter import AsyncSessionRepositoryAdapter
+from authapp.repositories.session.near_cache import NearCacheSessionRepository
+from authapp.repositories.session.singleflight import (
+    AsyncSingleFlightSessionRepository,
+    SingleFlightSessionRepository,
+)
+from authapp.repositories.session.invalidation import (
+    AbstractInvalidationChannel,
+    RedisInvalidationChannel,
+)
 from authapp.services.auth import AuthService
+from authapp.services.async_auth import AsyncAuthService
+
+if TYPE_CHECKING:
+    from authapp.launcher import Launcher
+
+# wrapper layers of repository specs
+_CACHED = "cached"
+_NEAR_CACHE = "near_cache"
+_SINGLE_FLIGHT = "single_flight"
+_METRICS = "metrics"
+
+# these repositories never block, so the async stack calls them inline
+_IN_MEMORY_USER_REPOSITORY_TYPES = [
+    const.USER_REPOSITORY_TYPE_MOCK,
+    const.USER_REPOSITORY_TYPE_MEMORY,
+]
+_IN_MEMORY_SESSION_REPOSITORY_TYPES = [
+    const.SESSION_REPOSITORY_TYPE_MOCK,
+    const.SESSION_REPOSITORY_TYPE_SHARDED,
+    const.SESSION_REPOSITORY_TYPE_TOKEN,
+    const.SESSION_REPOSITORY_TYPE_MEMORY,
+    const.SESSION_REPOSITORY_TYPE_COMPACT,
+]
+
+# the only session repositories every worker process sees the same way
+_SHARED_SESSION_REPOSITORY_TYPES = [
+    const.SESSION_REPOSITORY_TYPE_REDIS,
+    const.SESSION_REPOSITORY_TYPE_TOKEN,
+]
+
+# repository backends and wrapper layers by name. the built-in ones are
+# registered below DiContainer. a factory is called with the container and
+# the logger, a wrapper factory also with the repository it wraps.
+USER_REPOSITORIES = Registry(
+    "User DB type",
+    "authapp.user_repositories",
+    "authapp.user_repository_wrappers",
+)
+SESSION_REPOSITORIES = Registry(
+    "Session cache type",
+    "authapp.session_repositories",
+    "authapp.session_repository_wrappers",
+)
 
 
 class DiContainer:
     def __init__(self, parameter: Parameter):
         self._parameter = parameter
+        self._metrics: MetricsRegistry | None = None
+        # repositories by (registry, spec). each spec is built once
+        self._repositories: dict[tuple[Registry, str], Any] = {}
+
+    @property
+    def parameter(self) -> Parameter:
+        # for the factories of plugin repositories
+        return self._parameter
 
-    def get_service(self) -> AuthService:
+    def get_metrics(self) -> MetricsRegistry | None:
+        # one registry per container. None when metrics are off
+        if not self._get_bool(self._parameter.metrics, "Metrics"):
+            return None
+        if self._metrics is None:
+            self._metrics = MetricsRegistry()
+        return self._metrics
+
+    def is_admin_import_enabled(self) -> bool:
+        return self._get_bool(self._parameter.admin_import, "Admin import")
+
+    def get_service(self) -> AuthService | AsyncAuthService:
         logger = self._get_logger()
         user_repository = self._get_user_repository(logger)
         session_repository = self._get_session_repository(logger)
-        return AuthService(user_repository, session_repository, logger)
+        hasher = self._get_password_hasher(logger)
+
+        mode = self._parameter.service_mode.lower()
+        single_flight = self._get_bool(self._parameter.single_flight, "Single flight")
+        metrics = self.get_metrics()
+        if metrics is not None:
+            instrument(hasher, LAYER_HASHER, metrics)
+        if mode == const.SERVICE_MODE_SYNC:
+            if single_flight:
+                user_repository = SingleFlightUserRepository(user_repository, logger)
+                session_repository = SingleFlightSessionRepository(
+                    session_repository, logger
+                )
+                self._register_stats("user_single_flight", user_repository.stats)
+                self._register_stats("session_single_flight", session_repository.stats)
+            if metrics is not None:
+                instrument(user_repository, LAYER_USER_REPOSITORY, metrics)
+                instrument(session_repository, LAYER_SESSION_REPOSITORY, metrics)
+            service = AuthService(user_repository, session_repository, logger, hasher)
+            if metrics is not None:
+                instrument(service, LAYER_SERVICE, metrics)
+            return service
+        if mode == const.SERVICE_MODE_ASYNC:
+            user_type = self._get_user_backend_type()
+            session_type = self._get_session_backend_type()
+            async_user_repository = AsyncUserRepositoryAdapter(
+                user_repository,
+                offload=user_type not in _IN_MEMORY_USER_REPOSITORY_TYPES,
+            )
+            async_session_repository = AsyncSessionRepositoryAdapter(
+                session_repository,
+                offload=session_type not in _IN_MEMORY_SESSION_REPOSITORY_TYPES,
+            )
+            if single_flight:
+                async_user_repository = AsyncSingleFlightUserRepository(
+                    async_user_repository, logger
+                )
+                async_session_repository = AsyncSingleFlightSessionRepository(
+                    async_session_repository, logger
+                )
+                self._register_stats("user_single_flight", async_user_repository.stats)
+                self._register_stats(
+                    "session_single_flight", async_session_repository.stats
+                )
+            if metrics is not None:
+                instrument(async_user_repository, LAYER_USER_REPOSITORY, metrics)
+                instrument(async_session_repository, LAYER_SESSION_REPOSITORY, metrics)
+            async_service = AsyncAuthService(
+                async_user_repository, async_session_repository, logger, hasher
+            )
+            if metrics is not None:
+                instrument(async_service, LAYER_SERVICE, metrics)
+            return async_service
+        raise ValueError("Service mode must be [sync|async]")
+
+    def get_launcher(self, create_app: Callable[[], FastAPI]) -> "Launcher":
+        # uvicorn is imported only to serve
+        from authapp.launcher import Launcher, get_available_cores
+
+        logger = self._get_logger()
+        workers = self._get_int(self._parameter.server_workers, "Server workers")
+        if workers == 0:
+            workers = get_available_cores()
+        user_type = self._get_user_backend_type()
+        session_type = self._get_session_backend_type()
+        channel_type = self._parameter.session_invalidation_channel.lower()
+        if workers > 1:
+            # a session created by one worker must be valid on all of them
+            if session_type not in _SHARED_SESSION_REPOSITORY_TYPES:
+                raise ValueError(
+                    "Session cache type must be [redis|token] with more than one worker"
+                )
+            if (
+                session_type == const.SESSION_REPOSITORY_TYPE_TOKEN
+                and not self._parameter.session_token_keys
+            ):
+                raise ValueError(
+                    "Session token keys must be set with more than one worker"
+                )
+            if (
+                session_type == const.SESSION_REPOSITORY_TYPE_TOKEN
+                and channel_type == const.SESSION_INVALIDATION_CHANNEL_NONE
+            ):
+                logger.warning(
+                    "signout revokes a token only in the worker that served it. "
+                    "use the redis session invalidation channel"
+                )
+            # each worker has its own registry, and /metrics is answered by
+            # whichever worker accepts the scrape
+            if self._get_bool(self._parameter.metrics, "Metrics"):
+                raise ValueError("Metrics must be false with more than one worker")
+            if user_type in _IN_MEMORY_USER_REPOSITORY_TYPES:
+                logger.warning(
+                    "each worker has its own users. "
+                    "a signup is not seen by the other workers"
+                )
+        return Launcher(
+            create_app,
+            logger,
+            host=self._parameter.server_host,
+            port=self._get_port_int(self._parameter.server_port),
+            workers=workers,
+            graceful_timeout=self._get_float(
+                self._parameter.server_graceful_timeout, "Server graceful timeout"
+            ),
+            log_level=self._parameter.log_level.lower(),
+            # the app is built before the fork only when it holds no
+            # connections or threads. postgres connects and the invalidation
+            # channel subscribes in the constructor
+            preload=(
+                user_type in _IN_MEMORY_USER_REPOSITORY_TYPES
+                and channel_type == const.SESSION_INVALIDATION_CHANNEL_NONE
+            ),
+        )
 
     def _get_logger(self) -> Logger:
         logger = logging.getLogger()
@@ -42,40 +242,350 @@ class DiContainer:
             )
         return logger
 
+    def _get_password_hasher(self, logger: Logger) -> PasswordHasher:
+        cost = self._parameter.password_hash_cost
+        return PasswordHasher(
+            logger,
+            algorithm=self._parameter.password_hash_algorithm.lower(),
+            cost=self._get_int(cost, "Password hash cost") if cost else None,
+            workers=self._get_int(
+                self._parameter.password_hash_workers, "Password hash workers"
+            ),
+            queue_size=self._get_int(
+                self._parameter.password_hash_queue_size, "Password hash queue size"
+            ),
+        )
+
     def _get_user_repository(self, logger: Logger) -> AbstractUserRepository:
-        repo_type = self._parameter.user_repository_type.lower()
-        if repo_type == const.USER_REPOSITORY_TYPE_MOCK.lower():
-            return MockUserRepository(logger)
+        # --user_db_type is a spec such as "cached(postgres)"
+        names = parse_spec(self._parameter.user_repository_type)
+        if self._get_bool(self._parameter.user_repository_cache, "User cache"):
+            names = [_CACHED] + names
+        return self._get_repository(USER_REPOSITORIES, names, logger)
+
+    def _get_user_backend_type(self) -> str:
+        return parse_spec(self._parameter.user_repository_type)[-1]
+
+    def _get_repository(self, registry: Registry, names: list[str], logger: Logger):
+        key = (registry, format_spec(names))
+        repository = self._repositories.get(key)
+        if repository is not None:
+            return repository
+        if len(names) == 1:
+            repository = registry.get_backend(names[0])(self, logger)
+        else:
+            inner = self._get_repository(registry, names[1:], logger)
+            repository = registry.get_wrapper(names[0])(self, logger, inner)
+        self._repositories[key] = repository
+        return repository
 
-        host = self._parameter.user_repository_host
-        port = self._get_port_int(self._parameter.user_reporitory_port)
-        user = self._parameter.user_repository_user
-        password = self._parameter.user_repository_password
-        if repo_type == const.USER_REPOSITORY_TYPE_POSTGRES.lower():
-            return PostgresUserRepository(host, port, user, password, logger)
-        if repo_type == const.USER_REPOSITORY_TYPE_ORACLE.lower():
-            return OracleUserRepository(host, port, user, password, logger)
+    def _create_cached_user_repository(
+        self,
+        logger: Logger,
+        inner: AbstractUserRepository,
+    ) -> AbstractUserRepository:
+        repository = CachedUserRepository(
+            inner,
+            logger,
+            maxsize=self._get_int(
+                self._parameter.user_repository_cache_size, "User cache size"
+            ),
+            ttl=self._get_float(
+                self._parameter.user_repository_cache_ttl, "User cache TTL"
+            ),
+            negative_ttl=self._get_float(
+                self._parameter.user_repository_negative_cache_ttl,
+                "User negative cache TTL",
+            ),
+        )
+        self._register_stats("user_cache", repository.stats)
+        return repository
 
-        raise ValueError("User DB type must be [mock|postgres|oracle]")
+    def _create_single_flight_user_repository(
+        self,
+        logger: Logger,
+        inner: AbstractUserRepository,
+    ) -> AbstractUserRepository:
+        repository = SingleFlightUserRepository(inner, logger)
+        self._register_stats("user_repository_single_flight", repository.stats)
+        return repository
+
+    def _create_metrics_user_repository(
+        self,
+        logger: Logger,
+        inner: AbstractUserRepository,
+    ) -> AbstractUserRepository:
+        return self._instrument(inner, LAYER_USER_REPOSITORY)
+
+    def _create_mock_user_repository(self, logger: Logger) -> AbstractUserRepository:
+        return _load("authapp.repositories.user.mock", "MockUserRepository")(logger)
+
+    def _create_memory_user_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractUserRepository:
+        return _load("authapp.repositories.user.memory", "InMemoryUserRepository")(
+            logger
+        )
+
+    def _create_postgres_user_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractUserRepository:
+        backend = _load("authapp.repositories.user.postgres", "PostgresUserRepository")
+        repository = backend(
+            self._parameter.user_repository_host,
+            self._get_port_int(self._parameter.user_repository_port),
+            self._parameter.user_repository_user,
+            self._parameter.user_repository_password,
+            logger,
+            database=self._parameter.user_repository_database,
+            pool_min_size=self._get_int(
+                self._parameter.user_repository_pool_min_size, "Pool min size"
+            ),
+            pool_max_size=self._get_int(
+                self._parameter.user_repository_pool_max_size, "Pool max size"
+            ),
+            pool_timeout=self._get_float(
+                self._parameter.user_repository_pool_timeout, "Pool timeout"
+            ),
+            pool_recycle_uses=self._get_int(
+                self._parameter.user_repository_pool_recycle_uses,
+                "Pool recycle uses",
+            ),
+        )
+        # connections in use, waits for a free one and their time
+        self._register_stats("user_db_pool", repository.get_pool_stats)
+        return repository
+
+    def _create_oracle_user_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractUserRepository:
+        backend = _load("authapp.repositories.user.oracle", "OracleUserRepository")
+        return backend(
+            self._parameter.user_repository_host,
+            self._get_port_int(self._parameter.user_repository_port),
+            self._parameter.user_repository_user,
+            self._parameter.user_repository_password,
+            logger,
+        )
+
+    def _instrument(self, repository, layer: str):
+        # a layer of its own, e.g. layer="user_repository:PostgresUserRepository",
+        # so it is told apart from the outermost repository timed by metrics
+        metrics = self.get_metrics()
+        if metrics is None:
+            raise ValueError("Metrics wrapper needs metrics to be true")
+        return instrument(repository, f"{layer}:{type(repository).__name__}", metrics)
+
+    def _register_stats(self, component: str, stats: Callable[[], dict[str, float]]):
+        # stats() of the component is published on /metrics when metrics are on
+        metrics = self.get_metrics()
+        if metrics is not None:
+            metrics.register_stats(component, stats)
 
     def _get_session_repository(
         self,
         logger: Logger,
     ) -> AbstractSessionRepository:
-        repo_type = self._parameter.session_repository_type.lower()
-        if repo_type == const.SESSION_REPOSITORY_TYPE_MOCK.lower():
-            return MockSessionRepository(logger)
+        # --session_cache_type is a spec such as "near_cache(redis)"
+        names = parse_spec(self._parameter.session_repository_type)
+        if self._get_bool(self._parameter.session_near_cache, "Near cache"):
+            names = [_NEAR_CACHE] + names
+        repository = self._get_repository(SESSION_REPOSITORIES, names, logger)
+        # the backend was built for the spec above, so this returns it
+        backend = self._get_repository(SESSION_REPOSITORIES, names[-1:], logger)
+        if hasattr(backend, "stats"):
+            # e.g. live, expired but not reclaimed and evicted sessions
+            self._register_stats("session_store", backend.stats)
+        return repository
+
+    def _get_session_backend_type(self) -> str:
+        return parse_spec(self._parameter.session_repository_type)[-1]
+
+    def _create_near_cache_session_repository(
+        self,
+        logger: Logger,
+        inner: AbstractSessionRepository,
+    ) -> AbstractSessionRepository:
+        repository = NearCacheSessionRepository(
+            inner,
+            logger,
+            maxsize=self._get_int(
+                self._parameter.session_near_cache_size, "Near cache size"
+            ),
+            ttl=self._get_float(
+                self._parameter.session_near_cache_ttl, "Near cache TTL"
+            ),
+            channel=self._get_invalidation_channel(logger),
+        )
+        self._register_stats("session_near_cache", repository.stats)
+        return repository
+
+    def _create_single_flight_session_repository(
+        self,
+        logger: Logger,
+        inner: AbstractSessionRepository,
+    ) -> AbstractSessionRepository:
+        repository = SingleFlightSessionRepository(inner, logger)
+        self._register_stats("session_repository_single_flight", repository.stats)
+        return repository
+
+    def _create_metrics_session_repository(
+        self,
+        logger: Logger,
+        inner: AbstractSessionRepository,
+    ) -> AbstractSessionRepository:
+        return self._instrument(inner, LAYER_SESSION_REPOSITORY)
 
-        host = self._parameter.session_repository_host
-        port = self._get_port_int(self._parameter.session_reporitory_port)
-        user = self._parameter.session_repository_user
-        password = self._parameter.session_repository_password
-        if repo_type == const.SESSION_REPOSITORY_TYPE_REDIS.lower():
-            return RedisSessionRepository(host, port, user, password, logger)
+    def _get_invalidation_channel(
+        self,
+        logger: Logger,
+    ) -> AbstractInvalidationChannel | None:
+        channel_type = self._parameter.session_invalidation_channel.lower()
+        if channel_type == const.SESSION_INVALIDATION_CHANNEL_NONE:
+            return None
+        if channel_type == const.SESSION_INVALIDATION_CHANNEL_REDIS:
+            import redis
+
+            client = redis.Redis(
+                host=self._parameter.session_repository_host,
+                port=self._get_port_int(self._parameter.session_repository_port),
+                username=self._parameter.session_repository_user or None,
+                password=self._parameter.session_repository_password or None,
+            )
+            return RedisInvalidationChannel(client, logger)
+        raise ValueError("Session invalidation channel must be [none|redis]")
 
-        raise ValueError("Session cache type must be [mock|redis]")
+    def _get_session_ttl(self) -> int:
+        return self._get_int(self._parameter.session_ttl, "Session TTL")
+
+    def _get_session_max_per_user(self) -> int:
+        return self._get_int(
+            self._parameter.session_max_per_user, "Max sessions per user"
+        )
+
+    def _get_session_store_size(self) -> int:
+        return self._get_int(self._parameter.session_store_size, "Session store size")
+
+    def _create_mock_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        backend = _load("authapp.repositories.session.mock", "MockSessionRepository")
+        return backend(
+            logger,
+            ttl=self._get_session_ttl(),
+            max_sessions_per_user=self._get_session_max_per_user(),
+        )
+
+    def _create_sharded_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        backend = _load(
+            "authapp.repositories.session.sharded", "ShardedSessionRepository"
+        )
+        return backend(
+            logger,
+            ttl=self._get_session_ttl(),
+            shards=self._get_int(self._parameter.session_shards, "Session shards"),
+            maxsize=self._get_session_store_size(),
+            max_sessions_per_user=self._get_session_max_per_user(),
+        )
+
+    def _create_memory_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        backend = _load(
+            "authapp.repositories.session.memory", "InMemorySessionRepository"
+        )
+        return backend(
+            logger,
+            ttl=self._get_session_ttl(),
+            maxsize=self._get_session_store_size(),
+            sweep_interval=self._get_float(
+                self._parameter.session_sweep_interval, "Session sweep interval"
+            ),
+            sweep_batch=self._get_int(
+                self._parameter.session_sweep_batch, "Session sweep batch"
+            ),
+            max_sessions_per_user=self._get_session_max_per_user(),
+        )
+
+    def _create_compact_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        backend = _load(
+            "authapp.repositories.session.compact", "CompactSessionRepository"
+        )
+        return backend(
+            logger,
+            ttl=self._get_session_ttl(),
+            maxsize=self._get_session_store_size(),
+            max_sessions_per_user=self._get_session_max_per_user(),
+        )
 
-    def _get_port_int(num: str) -> int:
+    def _create_persistent_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        backend = _load(
+            "authapp.repositories.session.persistent", "PersistentSessionRepository"
+        )
+        return backend(
+            logger,
+            self._parameter.session_snapshot_path,
+            ttl=self._get_session_ttl(),
+            maxsize=self._get_session_store_size(),
+            snapshot_interval=self._get_float(
+                self._parameter.session_snapshot_interval,
+                "Session snapshot interval",
+            ),
+            max_sessions_per_user=self._get_session_max_per_user(),
+        )
+
+    def _create_token_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        if self._get_session_max_per_user():
+            raise ValueError("Max sessions per user is not supported by token")
+        module = "authapp.repositories.session.token"
+        backend = _load(module, "SignedTokenSessionRepository")
+        parse_keys = _load(module, "parse_keys")
+        return backend(
+            logger,
+            keys=parse_keys(self._parameter.session_token_keys),
+            ttl=self._get_session_ttl(),
+            channel=self._get_invalidation_channel(logger),
+        )
+
+    def _create_redis_session_repository(
+        self,
+        logger: Logger,
+    ) -> AbstractSessionRepository:
+        backend = _load("authapp.repositories.session.redis", "RedisSessionRepository")
+        return backend(
+            self._parameter.session_repository_host,
+            self._get_port_int(self._parameter.session_repository_port),
+            self._parameter.session_repository_user,
+            self._parameter.session_repository_password,
+            logger,
+            ttl=self._get_session_ttl(),
+            pool_size=self._get_int(
+                self._parameter.session_repository_pool_size, "Pool size"
+            ),
+            sliding_expiry=self._get_bool(
+                self._parameter.session_sliding_expiry, "Sliding expiry"
+            ),
+            max_sessions_per_user=self._get_session_max_per_user(),
+        )
+
+    def _get_port_int(self, num: str) -> int:
         try:
             int_num = int(num)
         except Exception:
@@ -83,3 +593,86 @@ class DiContainer:
         if 0 <= int_num <= 65535:
             return int_num
         raise ValueError("Port number must be within 0-65535")
+
+    def _get_int(self, num: str, name: str) -> int:
+        try:
+            int_num = int(num)
+        except Exception:
+            raise ValueError(f"{name} must be integer.")
+        if int_num < 0:
+            raise ValueError(f"{name} must not be negative")
+        return int_num
+
+    def _get_bool(self, value: str, name: str) -> bool:
+        if value.lower() in ["true", "1", "yes"]:
+            return True
+        if value.lower() in ["false", "0", "no"]:
+            return False
+        raise ValueError(f"{name} must be [true|false]")
+
+    def _get_float(self, num: str, name: str) -> float:
+        try:
+            float_num = float(num)
+        except Exception:
+            raise ValueError(f"{name} must be number.")
+        if float_num < 0:
+            raise ValueError(f"{name} must not be negative")
+        return float_num
+
+
+def _load(module: str, name: str):
+    return getattr(importlib.import_module(module), name)
+
+
+# backends are imported when selected, so pandas, psycopg2 and redis are
+# loaded only by the configurations that use them
+for _name, _factory in [
+    (const.USER_REPOSITORY_TYPE_MOCK, DiContainer._create_mock_user_repository),
+    (const.USER_REPOSITORY_TYPE_MEMORY, DiContainer._create_memory_user_repository),
+    (
+        const.USER_REPOSITORY_TYPE_POSTGRES,
+        DiContainer._create_postgres_user_repository,
+    ),
+    (const.USER_REPOSITORY_TYPE_ORACLE, DiContainer._create_oracle_user_repository),
+]:
+    USER_REPOSITORIES.register_backend(_name, _factory)
+for _name, _factory in [
+    (_CACHED, DiContainer._create_cached_user_repository),
+    (_SINGLE_FLIGHT, DiContainer._create_single_flight_user_repository),
+    (_METRICS, DiContainer._create_metrics_user_repository),
+]:
+    USER_REPOSITORIES.register_wrapper(_name, _factory)
+for _name, _factory in [
+    (const.SESSION_REPOSITORY_TYPE_MOCK, DiContainer._create_mock_session_repository),
+    (
+        const.SESSION_REPOSITORY_TYPE_REDIS,
+        DiContainer._create_redis_session_repository,
+    ),
+    (
+        const.SESSION_REPOSITORY_TYPE_SHARDED,
+        DiContainer._create_sharded_session_repository,
+    ),
+    (
+        const.SESSION_REPOSITORY_TYPE_TOKEN,
+        DiContainer._create_token_session_repository,
+    ),
+    (
+        const.SESSION_REPOSITORY_TYPE_MEMORY,
+        DiContainer._create_memory_session_repository,
+    ),
+    (
+        const.SESSION_REPOSITORY_TYPE_COMPACT,
+        DiContainer._create_compact_session_repository,
+    ),
+    (
+        const.SESSION_REPOSITORY_TYPE_PERSISTENT,
+        DiContainer._create_persistent_session_repository,
+    ),
+]:
+    SESSION_REPOSITORIES.register_backend(_name, _factory)
+for _name, _factory in [
+    (_NEAR_CACHE, DiContainer._create_near_cache_session_repository),
+    (_SINGLE_FLIGHT, DiContainer._create_single_flight_session_repository),
+    (_METRICS, DiContainer._create_metrics_session_repository),
+]:
+    SESSION_REPOSITORIES.register_wrapper(_name, _factory)
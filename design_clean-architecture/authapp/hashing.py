@@ -0,0 +1,240 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from logging import Logger
+from threading import BoundedSemaphore, Lock
+from typing import Optional
+
+import authapp.const as const
+from authapp.exceptions import ServerException
+
+# placeholder scheme of util.get_hashed_password(). verified, then rehashed
+_LEGACY_PREFIX = "hashed_"
+
+_DEFAULT_COST = {
+    # log2 of scrypt N
+    const.PASSWORD_HASH_ALGORITHM_SCRYPT: 14,
+    # pbkdf2 iterations
+    const.PASSWORD_HASH_ALGORITHM_PBKDF2: 600_000,
+}
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+_SALT_SIZE = 16
+_KEY_SIZE = 32
+# hashes PasswordHasher makes. the legacy placeholder is not accepted from outside
+_HASH_REGEX = re.compile(
+    r"\$(scrypt\$ln=\d+,r=\d+,p=\d+|pbkdf2-sha256\$i=\d+)"
+    r"\$[A-Za-z0-9+/]+\$[A-Za-z0-9+/]+"
+)
+
+
+class PasswordHasher:
+    # hash string format. algorithm and parameters are stored with the hash,
+    # so hashes made with old settings still verify and can be upgraded.
+    #   $scrypt$ln=14,r=8,p=1$<salt>$<hash>
+    #   $pbkdf2-sha256$i=600000$<salt>$<hash>
+    #
+    # with workers > 0, hashing runs in a dedicated process pool.
+    # at most queue_size hashes are in flight. more raise ServerException,
+    # so a signin flood cannot occupy every request thread.
+    def __init__(
+        self,
+        logger: Logger,
+        algorithm: str = const.PASSWORD_HASH_ALGORITHM_SCRYPT,
+        cost: Optional[int] = None,
+        workers: int = 0,
+        queue_size: int = 64,
+    ):
+        if algorithm not in _DEFAULT_COST:
+            raise ValueError(
+                "Password hash algorithm must be [scrypt|pbkdf2-sha256]"
+            )
+        self._logger = logger
+        self._algorithm = algorithm
+        self._cost = _DEFAULT_COST[algorithm] if cost is None else cost
+        self._dummy_hash = _get_dummy_hash(self._algorithm, self._cost)
+        self._workers = workers
+        self._slots = BoundedSemaphore(queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = Lock()
+
+    def hash(self, raw_password: str) -> str:
+        return self._submit(_hash, self._algorithm, self._cost, raw_password).result()
+
+    def verify(self, raw_password: str, hashed_password: str) -> bool:
+        return self._submit(_verify, raw_password, hashed_password).result()
+
+    def hash_many(self, raw_passwords: list[str]) -> list[str]:
+        # bulk import. every hash takes a slot, waiting for one if needed.
+        # at most one hash per worker is in flight, so the rest of the queue
+        # stays free for signins
+        hashed: list[str] = []
+        futures: deque[Future] = deque()
+        for raw_password in raw_passwords:
+            if len(futures) >= max(1, self._workers):
+                hashed.append(futures.popleft().result())
+            futures.append(
+                self._submit(
+                    _hash, self._algorithm, self._cost, raw_password, blocking=True
+                )
+            )
+        hashed.extend(future.result() for future in futures)
+        return hashed
+
+    async def hash_many_async(self, raw_passwords: list[str]) -> list[str]:
+        return await asyncio.to_thread(self.hash_many, raw_passwords)
+
+    async def hash_async(self, raw_password: str) -> str:
+        future = self._submit_async(_hash, self._algorithm, self._cost, raw_password)
+        return await future
+
+    async def verify_async(self, raw_password: str, hashed_password: str) -> bool:
+        return await self._submit_async(_verify, raw_password, hashed_password)
+
+    def get_dummy_hash(self) -> str:
+        # matches no password. verifying it costs as much as a real hash, so
+        # a signin for an unknown user takes as long as a wrong password
+        return self._dummy_hash
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return _get_scheme(hashed_password) != (self._algorithm, self._cost)
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, func, *args, blocking: bool = False) -> Future:
+        if not self._slots.acquire(blocking=blocking):
+            raise ServerException("too many password hashing requests")
+        if self._workers == 0:
+            future = Future()
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            self._slots.release()
+            return future
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _submit_async(self, func, *args) -> asyncio.Future:
+        if self._workers == 0:
+            # hashlib releases the GIL. keep the event loop free with a thread
+            if not self._slots.acquire(blocking=False):
+                raise ServerException("too many password hashing requests")
+
+            async def run():
+                try:
+                    return await asyncio.to_thread(func, *args)
+                finally:
+                    self._slots.release()
+
+            return asyncio.ensure_future(run())
+        return asyncio.wrap_future(self._submit(func, *args))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a process that runs threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._logger.info(f"started {self._workers} password hash workers")
+            return self._executor
+
+
+def is_supported_hash(hashed_password: str) -> bool:
+    # for hashes imported as is
+    return _HASH_REGEX.fullmatch(hashed_password) is not None
+
+
+def _hash(algorithm: str, cost: int, raw_password: str) -> str:
+    salt = os.urandom(_SALT_SIZE)
+    if algorithm == const.PASSWORD_HASH_ALGORITHM_SCRYPT:
+        key = _scrypt(raw_password, salt, cost, _SCRYPT_R, _SCRYPT_P)
+        params = f"ln={cost},r={_SCRYPT_R},p={_SCRYPT_P}"
+    else:
+        key = _pbkdf2(raw_password, salt, cost)
+        params = f"i={cost}"
+    return f"${algorithm}${params}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def _get_dummy_hash(algorithm: str, cost: int) -> str:
+    # same parameters as _hash. the cost does not depend on salt and key
+    if algorithm == const.PASSWORD_HASH_ALGORITHM_SCRYPT:
+        params = f"ln={cost},r={_SCRYPT_R},p={_SCRYPT_P}"
+    else:
+        params = f"i={cost}"
+    salt = _b64encode(bytes(_SALT_SIZE))
+    return f"${algorithm}${params}${salt}${_b64encode(bytes(_KEY_SIZE))}"
+
+
+def _verify(raw_password: str, hashed_password: str) -> bool:
+    if hashed_password.startswith(_LEGACY_PREFIX):
+        expected = _LEGACY_PREFIX + raw_password
+        return hmac.compare_digest(hashed_password.encode(), expected.encode())
+    try:
+        _, algorithm, params, salt, key = hashed_password.split("$")
+        values = dict(kv.split("=") for kv in params.split(","))
+        salt = _b64decode(salt)
+        key = _b64decode(key)
+        if algorithm == const.PASSWORD_HASH_ALGORITHM_SCRYPT:
+            n = int(values["ln"])
+            actual = _scrypt(raw_password, salt, n, int(values["r"]), int(values["p"]))
+        elif algorithm == const.PASSWORD_HASH_ALGORITHM_PBKDF2:
+            actual = _pbkdf2(raw_password, salt, int(values["i"]))
+        else:
+            return False
+    except (ValueError, KeyError):
+        return False
+    return hmac.compare_digest(actual, key)
+
+
+def _get_scheme(hashed_password: str) -> Optional[tuple[str, int]]:
+    try:
+        _, algorithm, params, _, _ = hashed_password.split("$")
+        first = params.split(",")[0]
+        return algorithm, int(first.split("=")[1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _scrypt(raw_password: str, salt: bytes, ln: int, r: int, p: int) -> bytes:
+    n = 1 << ln
+    return hashlib.scrypt(
+        raw_password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r * p,
+        dklen=_KEY_SIZE,
+    )
+
+
+def _pbkdf2(raw_password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac(
+        "sha256", raw_password.encode(), salt, iterations, dklen=_KEY_SIZE
+    )
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
@@ -0,0 +1,249 @@
+import gc
+import os
+import select
+import signal
+import socket
+import time
+from logging import Logger
+from typing import Callable, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+_LISTEN_BACKLOG = 2048
+_READY_TIMEOUT = 30
+_POLL_INTERVAL = 0.2
+_KILL_GRACE = 5
+
+
+class _WorkerServer(uvicorn.Server):
+    # tells the master through a pipe once the worker accepts requests
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self._ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        os.write(self._ready_fd, b"1")
+        os.close(self._ready_fd)
+
+
+class Launcher:
+    # prefork server. the master binds the socket, then forks workers that
+    # accept on it. imported modules, and with preload the app itself, are
+    # shared copy-on-write. gc.freeze() keeps the collector from writing to
+    # those pages in the workers.
+    # without preload, each worker builds its own app after the fork, so
+    # connections and threads are never shared between processes.
+    #
+    # SIGHUP replaces the workers one at a time. a new worker is ready before
+    # the old one is stopped, and the old one finishes its in-flight requests.
+    # SIGTERM and SIGINT stop all workers gracefully. crashed workers are
+    # restarted.
+    def __init__(
+        self,
+        create_app: Callable[[], FastAPI],
+        logger: Logger,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int = 1,
+        graceful_timeout: float = 30,
+        log_level: str = "info",
+        preload: bool = False,
+    ):
+        self._create_app = create_app
+        self._logger = logger
+        self._host = host
+        self._port = port
+        self._workers = workers
+        self._graceful_timeout = graceful_timeout
+        self._log_level = log_level
+        self._preload = preload
+        self._app: Optional[FastAPI] = None
+        self._socket: Optional[socket.socket] = None
+        self._pids: set[int] = set()
+        self._retiring: set[int] = set()
+        self._stopping = False
+        self._reloading = False
+
+    def run(self):
+        if self._workers == 1:
+            uvicorn.run(
+                self._create_app(),
+                host=self._host,
+                port=self._port,
+                log_level=self._log_level,
+                timeout_graceful_shutdown=self._graceful_timeout,
+            )
+            return
+
+        self._socket = self._bind()
+        if self._preload:
+            self._app = self._create_app()
+        self._freeze()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        self._logger.info(
+            f"starting {self._workers} workers on {self._host}:{self._port}"
+        )
+        try:
+            for _ in range(self._workers):
+                if self._spawn() is None:
+                    raise RuntimeError("worker failed to start")
+            while not self._stopping:
+                self._reap()
+                if self._reloading:
+                    self._reloading = False
+                    self._reload()
+                self._restart()
+                time.sleep(_POLL_INTERVAL)
+        finally:
+            self._stop()
+            self._socket.close()
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self._host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self._host, self._port))
+        sock.listen(_LISTEN_BACKLOG)
+        sock.set_inheritable(True)
+        return sock
+
+    def _freeze(self):
+        # objects alive now are never scanned again, so their pages stay shared
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self) -> Optional[int]:
+        # forks a worker and waits until it accepts requests.
+        # returns None when it exits or times out before that
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._run_worker(ready_w)
+        os.close(ready_w)
+        try:
+            readable, _, _ = select.select([ready_r], [], [], _READY_TIMEOUT)
+            ready = bool(readable) and os.read(ready_r, 1) == b"1"
+        finally:
+            os.close(ready_r)
+        if not ready:
+            self._logger.error(f"worker {pid} failed to start")
+            self._kill(pid)
+            return None
+        self._pids.add(pid)
+        return pid
+
+    def _run_worker(self, ready_fd: int):
+        # never returns. os._exit skips the finalizers of objects inherited
+        # from the master, e.g. connections the master still owns
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # the master handles reload. a terminal hangup must not kill workers
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            app = self._app if self._app is not None else self._create_app()
+            config = uvicorn.Config(
+                app,
+                log_level=self._log_level,
+                timeout_graceful_shutdown=self._graceful_timeout,
+            )
+            _WorkerServer(config, ready_fd).run(sockets=[self._socket])
+        except BaseException:
+            self._logger.exception(f"worker {os.getpid()} failed")
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+                continue
+            if pid not in self._pids:
+                continue
+            self._pids.discard(pid)
+            if not self._stopping:
+                self._logger.warning(
+                    f"worker {pid} exited with {os.waitstatus_to_exitcode(status)}"
+                )
+
+    def _restart(self):
+        # brings crashed workers back. retried on the next poll if it fails
+        for _ in range(self._workers - len(self._pids)):
+            if self._stopping or self._spawn() is None:
+                return
+
+    def _reload(self):
+        self._logger.info("replacing workers")
+        if self._preload:
+            # lets the old app be collected before the new one is frozen
+            gc.unfreeze()
+            self._app = self._create_app()
+            self._freeze()
+        for pid in list(self._pids):
+            if self._stopping:
+                return
+            if self._spawn() is None:
+                self._logger.error("reload aborted. old workers keep running")
+                return
+            self._pids.discard(pid)
+            self._retiring.add(pid)
+            self._signal(pid, signal.SIGTERM)
+            self._reap()
+
+    def _stop(self):
+        pids = self._pids | self._retiring
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self._graceful_timeout + _KILL_GRACE
+        while pids and time.monotonic() < deadline:
+            pids = {pid for pid in pids if not self._exited(pid)}
+            time.sleep(_POLL_INTERVAL)
+        for pid in pids:
+            self._logger.warning(f"worker {pid} did not stop. killing")
+            self._kill(pid)
+        self._pids.clear()
+        self._retiring.clear()
+
+    def _kill(self, pid: int):
+        self._signal(pid, signal.SIGKILL)
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _exited(self, pid: int) -> bool:
+        try:
+            return os.waitpid(pid, os.WNOHANG)[0] != 0
+        except ChildProcessError:
+            return True
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reloading = True
+
+
+def get_available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,214 @@
+import bisect
+import functools
+import inspect
+import time
+from threading import Lock, local
+from typing import Callable
+
+# histogram bucket upper bounds in seconds. 10us to about 42s, two per doubling
+_BUCKETS = tuple(1e-5 * 2 ** (i / 2) for i in range(45))
+_QUANTILES = [0.5, 0.95, 0.99]
+
+LAYER_HTTP = "http"
+LAYER_CONTROLLER = "controller"
+LAYER_SERVICE = "service"
+LAYER_HASHER = "hasher"
+LAYER_USER_REPOSITORY = "user_repository"
+LAYER_SESSION_REPOSITORY = "session_repository"
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    # fixed log-spaced buckets, counted per thread without a lock.
+    # one observation is a bisect and two adds, so it is cheap enough to
+    # stay on in production. readers add the per thread counts up.
+    # quantiles are estimated from the buckets, so they are off by at most
+    # one bucket (a factor of 1.41), and cover the whole process lifetime.
+    def __init__(self):
+        self._lock = Lock()
+        self._local = local()
+        # per thread: bucket counts, the +Inf count, then the sum of seconds
+        self._shards: list[list] = []
+
+    def observe(self, seconds: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._add_shard()
+        shard[bisect.bisect_left(_BUCKETS, seconds)] += 1
+        shard[-1] += seconds
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        counts = [0] * (len(_BUCKETS) + 1)
+        total = 0.0
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            values = list(shard)
+            for i, count in enumerate(values[:-1]):
+                counts[i] += count
+            total += values[-1]
+        return counts, total, sum(counts)
+
+    def quantile(self, q: float) -> float:
+        counts, _, count = self.snapshot()
+        return _estimate_quantile(counts, count, q)
+
+    def _add_shard(self) -> list:
+        shard = [0] * (len(_BUCKETS) + 1) + [0.0]
+        self._local.shard = shard
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+
+class MetricsRegistry:
+    # latency histograms per (layer, name), http responses per status, and
+    # the stats() of components such as caches, pools and session stores
+    def __init__(self):
+        self._lock = Lock()
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._responses: dict[tuple[str, int], int] = {}
+        self._stats: dict[str, Callable[[], dict[str, float]]] = {}
+
+    def histogram(self, layer: str, name: str) -> Histogram:
+        key = (layer, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            return histogram
+
+    def count_response(self, name: str, status: int):
+        key = (name, status)
+        with self._lock:
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def register_stats(self, component: str, stats: Callable[[], dict[str, float]]):
+        # stats is called on every scrape. a component registered again
+        # replaces the previous one
+        with self._lock:
+            self._stats[component] = stats
+
+    def render(self) -> str:
+        # prometheus text exposition format
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            responses = sorted(self._responses.items())
+            stats = sorted(self._stats.items())
+        lines = [
+            "# HELP authapp_span_duration_seconds Time spent in a layer call.",
+            "# TYPE authapp_span_duration_seconds histogram",
+        ]
+        quantile_lines = [
+            "# HELP authapp_span_duration_quantile_seconds "
+            "Estimated latency quantiles since start.",
+            "# TYPE authapp_span_duration_quantile_seconds gauge",
+        ]
+        for (layer, name), histogram in histograms:
+            counts, total, count = histogram.snapshot()
+            if count == 0:
+                continue
+            labels = f'layer="{layer}",name="{_escape(name)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"authapp_span_duration_seconds_bucket"
+                    f'{{{labels},le="{bound:.6g}"}} {cumulative}'
+                )
+            lines.append(
+                f'authapp_span_duration_seconds_bucket{{{labels},le="+Inf"}} {count}'
+            )
+            lines.append(f"authapp_span_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"authapp_span_duration_seconds_count{{{labels}}} {count}")
+            for q in _QUANTILES:
+                value = _estimate_quantile(counts, count, q)
+                quantile_lines.append(
+                    f"authapp_span_duration_quantile_seconds"
+                    f'{{{labels},quantile="{q}"}} {value:.6g}'
+                )
+        lines.extend(quantile_lines)
+        lines.append("# HELP authapp_http_responses_total HTTP responses by status.")
+        lines.append("# TYPE authapp_http_responses_total counter")
+        for (name, status), count in responses:
+            lines.append(
+                f'authapp_http_responses_total{{name="{_escape(name)}",'
+                f'status="{status}"}} {count}'
+            )
+        lines.append("# HELP authapp_component_stat Statistics of a component.")
+        lines.append("# TYPE authapp_component_stat gauge")
+        for component, get_stats in stats:
+            try:
+                values = get_stats()
+            except Exception:
+                # a failing component must not hide the other metrics
+                continue
+            for name, value in sorted(values.items()):
+                lines.append(
+                    f'authapp_component_stat{{component="{_escape(component)}",'
+                    f'name="{_escape(name)}"}} {value}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def timed(func: Callable, histogram: Histogram) -> Callable:
+    # same signature as func, so FastAPI still sees the handler parameters
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def timed_async(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return timed_async
+
+    @functools.wraps(func)
+    def timed_sync(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return timed_sync
+
+
+def instrument(obj, layer: str, registry: MetricsRegistry):
+    # times every public method of obj in place. the type of obj is kept,
+    # so isinstance checks and wrapper chains keep working.
+    # generators are skipped: their call returns before any work is done.
+    for name in dir(type(obj)):
+        if name.startswith("_"):
+            continue
+        method = getattr(obj, name)
+        if not inspect.ismethod(method):
+            continue
+        if inspect.isgeneratorfunction(method) or inspect.isasyncgenfunction(method):
+            continue
+        setattr(obj, name, timed(method, registry.histogram(layer, name)))
+    return obj
+
+
+def _estimate_quantile(counts: list[int], count: int, q: float) -> float:
+    # linear interpolation inside the bucket holding the q-th observation
+    if count == 0:
+        return 0.0
+    rank = q * count
+    cumulative = 0
+    for i, bucket_count in enumerate(counts):
+        if bucket_count and cumulative + bucket_count >= rank:
+            if i == len(_BUCKETS):
+                return _BUCKETS[-1]
+            lower = _BUCKETS[i - 1] if i > 0 else 0.0
+            return lower + (_BUCKETS[i] - lower) * (rank - cumulative) / bucket_count
+        cumulative += bucket_count
+    return _BUCKETS[-1]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -15,3 +15,9 @@ class SignupBody(BaseModel):
 class SigninBody(BaseModel):
     username_or_email: str
     password: str
+
+
+class UserLookupBody(BaseModel):
+    ids: list[str] = []
+    usernames: list[str] = []
+    emails: list[str] = []
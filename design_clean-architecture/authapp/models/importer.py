@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class ImportRejection(BaseModel):
+    line: int
+    username: str
+    reason: str
+
+
+class ImportReport(BaseModel):
+    total: int
+    imported: int
+    rejected: list[ImportRejection]
+    elapsed_seconds: float
@@ -7,6 +7,14 @@ class UserSchema(BaseModel):
     email: str
     hashed_password: str
 
+    def to_user_without_password(self) -> "UserSchemaWithoutPassword":
+        # fields are already validated. skip re-validation
+        return UserSchemaWithoutPassword.model_construct(
+            id=self.id,
+            username=self.username,
+            email=self.email,
+        )
+
 
 class UserSchemaWithoutPassword(BaseModel):
     id: str
@@ -9,12 +9,39 @@ class Parameter:
         # logging param
         self.log_level: str = const.LOG_LEVEL_INFO
 
+        # server params
+        self.server_host: str = "127.0.0.1"
+        self.server_port: str = "8000"
+        self.server_workers: str = "1"
+        self.server_graceful_timeout: str = "30"
+
+        # service params
+        self.service_mode: str = const.SERVICE_MODE_SYNC
+        self.single_flight: str = "false"
+        self.metrics: str = "false"
+        self.admin_import: str = "false"
+
+        # password hash params
+        self.password_hash_algorithm: str = const.PASSWORD_HASH_ALGORITHM_SCRYPT
+        self.password_hash_cost: str = ""
+        self.password_hash_workers: str = "2"
+        self.password_hash_queue_size: str = "64"
+
         # user repo params
-        self.user_repository_type: str = const.USER_REPOSITORY_TYPE_MOCK
+        self.user_repository_type: str = const.USER_REPOSITORY_TYPE_MEMORY
         self.user_repository_host: str = "0.0.0.0"
         self.user_repository_port: str = "-1"
         self.user_repository_user: str = "admin"
         self.user_repository_password: str = "password"
+        self.user_repository_database: str = "authapp"
+        self.user_repository_pool_min_size: str = "1"
+        self.user_repository_pool_max_size: str = "10"
+        self.user_repository_pool_timeout: str = "5"
+        self.user_repository_pool_recycle_uses: str = "1000"
+        self.user_repository_cache: str = "false"
+        self.user_repository_cache_size: str = "10000"
+        self.user_repository_cache_ttl: str = "60"
+        self.user_repository_negative_cache_ttl: str = "5"
 
         # session repo params
         self.session_repository_type: str = const.SESSION_REPOSITORY_TYPE_MOCK
@@ -22,10 +49,31 @@ class Parameter:
         self.session_repository_port: str = "-1"
         self.session_repository_user: str = "admin"
         self.session_repository_password: str = "password"
+        self.session_repository_pool_size: str = "10"
+        self.session_ttl: str = str(60 * 60 * 3)
+        self.session_sliding_expiry: str = "false"
+        self.session_shards: str = "16"
+        self.session_store_size: str = "100000"
+        self.session_sweep_interval: str = "1"
+        self.session_sweep_batch: str = "1000"
+        self.session_snapshot_path: str = "sessions"
+        self.session_snapshot_interval: str = "60"
+        self.session_token_keys: str = ""
+        self.session_max_per_user: str = "0"
+        self.session_near_cache: str = "false"
+        self.session_near_cache_size: str = "10000"
+        self.session_near_cache_ttl: str = "5"
+        self.session_invalidation_channel: str = (
+            const.SESSION_INVALIDATION_CHANNEL_NONE
+        )
 
         self._args, _ = _parser.parse_known_args()
 
     def load(self):
+        self._load_logging_parameters()
+        self._load_server_parameters()
+        self._load_service_parameters()
+        self._load_password_hash_parameters()
         self._load_user_repository_parameters()
         self._load_session_repository_parameters()
 
@@ -39,6 +87,108 @@ class Parameter:
 
         set_level()
 
+    def _load_server_parameters(self):
+        def set_host():
+            self.server_host = self._get_arg1st_env2nd_default3rd(
+                self._args.host,
+                "SERVER_HOST",
+                self.server_host,
+            )
+
+        def set_port():
+            self.server_port = self._get_arg1st_env2nd_default3rd(
+                self._args.port,
+                "SERVER_PORT",
+                self.server_port,
+            )
+
+        def set_workers():
+            self.server_workers = self._get_arg1st_env2nd_default3rd(
+                self._args.workers,
+                "SERVER_WORKERS",
+                self.server_workers,
+            )
+
+        def set_graceful_timeout():
+            self.server_graceful_timeout = self._get_arg1st_env2nd_default3rd(
+                self._args.graceful_timeout,
+                "SERVER_GRACEFUL_TIMEOUT",
+                self.server_graceful_timeout,
+            )
+
+        set_host()
+        set_port()
+        set_workers()
+        set_graceful_timeout()
+
+    def _load_service_parameters(self):
+        def set_mode():
+            self.service_mode = self._get_arg1st_env2nd_default3rd(
+                self._args.service_mode,
+                "SERVICE_MODE",
+                self.service_mode,
+            )
+
+        def set_single_flight():
+            self.single_flight = self._get_arg1st_env2nd_default3rd(
+                self._args.single_flight,
+                "SINGLE_FLIGHT",
+                self.single_flight,
+            )
+
+        def set_metrics():
+            self.metrics = self._get_arg1st_env2nd_default3rd(
+                self._args.metrics,
+                "METRICS",
+                self.metrics,
+            )
+
+        def set_admin_import():
+            self.admin_import = self._get_arg1st_env2nd_default3rd(
+                self._args.admin_import,
+                "ADMIN_IMPORT",
+                self.admin_import,
+            )
+
+        set_mode()
+        set_single_flight()
+        set_metrics()
+        set_admin_import()
+
+    def _load_password_hash_parameters(self):
+        def set_algorithm():
+            self.password_hash_algorithm = self._get_arg1st_env2nd_default3rd(
+                self._args.password_hash_algorithm,
+                "PASSWORD_HASH_ALGORITHM",
+                self.password_hash_algorithm,
+            )
+
+        def set_cost():
+            self.password_hash_cost = self._get_arg1st_env2nd_default3rd(
+                self._args.password_hash_cost,
+                "PASSWORD_HASH_COST",
+                self.password_hash_cost,
+            )
+
+        def set_workers():
+            self.password_hash_workers = self._get_arg1st_env2nd_default3rd(
+                self._args.password_hash_workers,
+                "PASSWORD_HASH_WORKERS",
+                self.password_hash_workers,
+            )
+
+        def set_queue_size():
+            self.password_hash_queue_size = self._get_arg1st_env2nd_default3rd(
+                self._args.password_hash_queue_size,
+                "PASSWORD_HASH_QUEUE_SIZE",
+                self.password_hash_queue_size,
+            )
+
+        set_algorithm()
+        set_cost()
+        set_workers()
+        set_queue_size()
+
     def _load_user_repository_parameters(self):
         def set_type():
             self.user_repository_type = self._get_arg1st_env2nd_default3rd(
@@ -75,11 +225,87 @@ class Parameter:
                 self.user_repository_password,
             )
 
+        def set_database():
+            self.user_repository_database = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_name,
+                "USER_DB_NAME",
+                self.user_repository_database,
+            )
+
+        def set_pool_min_size():
+            self.user_repository_pool_min_size = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_pool_min_size,
+                "USER_DB_POOL_MIN_SIZE",
+                self.user_repository_pool_min_size,
+            )
+
+        def set_pool_max_size():
+            self.user_repository_pool_max_size = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_pool_max_size,
+                "USER_DB_POOL_MAX_SIZE",
+                self.user_repository_pool_max_size,
+            )
+
+        def set_pool_timeout():
+            self.user_repository_pool_timeout = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_pool_timeout,
+                "USER_DB_POOL_TIMEOUT",
+                self.user_repository_pool_timeout,
+            )
+
+        def set_pool_recycle_uses():
+            self.user_repository_pool_recycle_uses = (
+                self._get_arg1st_env2nd_default3rd(
+                    self._args.user_db_pool_recycle_uses,
+                    "USER_DB_POOL_RECYCLE_USES",
+                    self.user_repository_pool_recycle_uses,
+                )
+            )
+
+        def set_cache():
+            self.user_repository_cache = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_cache,
+                "USER_DB_CACHE",
+                self.user_repository_cache,
+            )
+
+        def set_cache_size():
+            self.user_repository_cache_size = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_cache_size,
+                "USER_DB_CACHE_SIZE",
+                self.user_repository_cache_size,
+            )
+
+        def set_cache_ttl():
+            self.user_repository_cache_ttl = self._get_arg1st_env2nd_default3rd(
+                self._args.user_db_cache_ttl,
+                "USER_DB_CACHE_TTL",
+                self.user_repository_cache_ttl,
+            )
+
+        def set_negative_cache_ttl():
+            self.user_repository_negative_cache_ttl = (
+                self._get_arg1st_env2nd_default3rd(
+                    self._args.user_db_negative_cache_ttl,
+                    "USER_DB_NEGATIVE_CACHE_TTL",
+                    self.user_repository_negative_cache_ttl,
+                )
+            )
+
         set_type()
         set_host()
         set_port()
         set_user()
         set_password()
+        set_database()
+        set_pool_min_size()
+        set_pool_max_size()
+        set_pool_timeout()
+        set_pool_recycle_uses()
+        set_cache()
+        set_cache_size()
+        set_cache_ttl()
+        set_negative_cache_ttl()
 
     def _load_session_repository_parameters(self):
         def set_type():
@@ -117,11 +343,131 @@ class Parameter:
                 self.session_repository_password,
             )
 
+        def set_pool_size():
+            self.session_repository_pool_size = self._get_arg1st_env2nd_default3rd(
+                self._args.session_cache_pool_size,
+                "SESSION_CACHE_POOL_SIZE",
+                self.session_repository_pool_size,
+            )
+
+        def set_ttl():
+            self.session_ttl = self._get_arg1st_env2nd_default3rd(
+                self._args.session_ttl,
+                "SESSION_TTL",
+                self.session_ttl,
+            )
+
+        def set_sliding_expiry():
+            self.session_sliding_expiry = self._get_arg1st_env2nd_default3rd(
+                self._args.session_sliding_expiry,
+                "SESSION_SLIDING_EXPIRY",
+                self.session_sliding_expiry,
+            )
+
+        def set_shards():
+            self.session_shards = self._get_arg1st_env2nd_default3rd(
+                self._args.session_shards,
+                "SESSION_SHARDS",
+                self.session_shards,
+            )
+
+        def set_store_size():
+            self.session_store_size = self._get_arg1st_env2nd_default3rd(
+                self._args.session_store_size,
+                "SESSION_STORE_SIZE",
+                self.session_store_size,
+            )
+
+        def set_sweep_interval():
+            self.session_sweep_interval = self._get_arg1st_env2nd_default3rd(
+                self._args.session_sweep_interval,
+                "SESSION_SWEEP_INTERVAL",
+                self.session_sweep_interval,
+            )
+
+        def set_sweep_batch():
+            self.session_sweep_batch = self._get_arg1st_env2nd_default3rd(
+                self._args.session_sweep_batch,
+                "SESSION_SWEEP_BATCH",
+                self.session_sweep_batch,
+            )
+
+        def set_snapshot_path():
+            self.session_snapshot_path = self._get_arg1st_env2nd_default3rd(
+                self._args.session_snapshot_path,
+                "SESSION_SNAPSHOT_PATH",
+                self.session_snapshot_path,
+            )
+
+        def set_snapshot_interval():
+            self.session_snapshot_interval = self._get_arg1st_env2nd_default3rd(
+                self._args.session_snapshot_interval,
+                "SESSION_SNAPSHOT_INTERVAL",
+                self.session_snapshot_interval,
+            )
+
+        def set_token_keys():
+            self.session_token_keys = self._get_arg1st_env2nd_default3rd(
+                self._args.session_token_keys,
+                "SESSION_TOKEN_KEYS",
+                self.session_token_keys,
+            )
+
+        def set_max_per_user():
+            self.session_max_per_user = self._get_arg1st_env2nd_default3rd(
+                self._args.session_max_per_user,
+                "SESSION_MAX_PER_USER",
+                self.session_max_per_user,
+            )
+
+        def set_near_cache():
+            self.session_near_cache = self._get_arg1st_env2nd_default3rd(
+                self._args.session_near_cache,
+                "SESSION_NEAR_CACHE",
+                self.session_near_cache,
+            )
+
+        def set_near_cache_size():
+            self.session_near_cache_size = self._get_arg1st_env2nd_default3rd(
+                self._args.session_near_cache_size,
+                "SESSION_NEAR_CACHE_SIZE",
+                self.session_near_cache_size,
+            )
+
+        def set_near_cache_ttl():
+            self.session_near_cache_ttl = self._get_arg1st_env2nd_default3rd(
+                self._args.session_near_cache_ttl,
+                "SESSION_NEAR_CACHE_TTL",
+                self.session_near_cache_ttl,
+            )
+
+        def set_invalidation_channel():
+            self.session_invalidation_channel = self._get_arg1st_env2nd_default3rd(
+                self._args.session_invalidation_channel,
+                "SESSION_INVALIDATION_CHANNEL",
+                self.session_invalidation_channel,
+            )
+
         set_type()
         set_host()
         set_port()
         set_user()
         set_password()
+        set_pool_size()
+        set_ttl()
+        set_sliding_expiry()
+        set_shards()
+        set_store_size()
+        set_sweep_interval()
+        set_sweep_batch()
+        set_snapshot_path()
+        set_snapshot_interval()
+        set_token_keys()
+        set_max_per_user()
+        set_near_cache()
+        set_near_cache_size()
+        set_near_cache_ttl()
+        set_invalidation_channel()
 
     def _get_arg1st_env2nd_default3rd(
         self,
@@ -139,6 +485,7 @@ class Parameter:
 def _get_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="TZ Userapp.",
+        allow_abbrev=False,
     )
     # logging
     parser.add_argument(
@@ -146,10 +493,64 @@ def _get_arg_parser() -> argparse.ArgumentParser:
         help="log level. [debug|info|warning|error|critical]",
     )
 
+    # server
+    parser.add_argument(
+        "--host",
+        help="address to listen on",
+    )
+    parser.add_argument(
+        "--port",
+        help="port to listen on",
+    )
+    parser.add_argument(
+        "--workers",
+        help="worker processes. 0 for one per available core",
+    )
+    parser.add_argument(
+        "--graceful_timeout",
+        help="seconds a stopping worker may spend on in-flight requests",
+    )
+
+    # service
+    parser.add_argument(
+        "--service_mode",
+        help="service execution mode. [sync|async]",
+    )
+    parser.add_argument(
+        "--single_flight",
+        help="coalesce concurrent identical repository reads. [true|false]",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="latency histograms per layer, served at /metrics. [true|false]",
+    )
+    parser.add_argument(
+        "--admin_import",
+        help="mount the unauthenticated bulk import endpoint. [true|false]",
+    )
+
+    # password hash
+    parser.add_argument(
+        "--password_hash_algorithm",
+        help="password hash algorithm. [scrypt|pbkdf2-sha256]",
+    )
+    parser.add_argument(
+        "--password_hash_cost",
+        help="log2 of N for scrypt, iterations for pbkdf2. empty for default",
+    )
+    parser.add_argument(
+        "--password_hash_workers",
+        help="password hash worker processes. 0 hashes in the caller",
+    )
+    parser.add_argument(
+        "--password_hash_queue_size",
+        help="max password hashes in flight. more are rejected",
+    )
+
     # database
     parser.add_argument(
         "--user_db_type",
-        help="DB type. [MOCK|POSTGRES|ORACLE]",
+        help="DB type. [MOCK|MEMORY|POSTGRES|ORACLE] or a spec like cached(postgres)",
     )
     parser.add_argument(
         "--user_db_host",
@@ -167,11 +568,48 @@ def _get_arg_parser() -> argparse.ArgumentParser:
         "--user_db_password",
         help="DB password",
     )
+    parser.add_argument(
+        "--user_db_name",
+        help="DB database name",
+    )
+    parser.add_argument(
+        "--user_db_pool_min_size",
+        help="DB connection pool minimum size",
+    )
+    parser.add_argument(
+        "--user_db_pool_max_size",
+        help="DB connection pool maximum size",
+    )
+    parser.add_argument(
+        "--user_db_pool_timeout",
+        help="DB connection pool wait timeout in seconds",
+    )
+    parser.add_argument(
+        "--user_db_pool_recycle_uses",
+        help="DB connection is recycled after this number of uses",
+    )
+    parser.add_argument(
+        "--user_db_cache",
+        help="Cache users in process in front of the DB. [true|false]",
+    )
+    parser.add_argument(
+        "--user_db_cache_size",
+        help="User cache max entries",
+    )
+    parser.add_argument(
+        "--user_db_cache_ttl",
+        help="User cache time to live in seconds",
+    )
+    parser.add_argument(
+        "--user_db_negative_cache_ttl",
+        help="Time to remember nonexistent users in seconds",
+    )
 
     # cache
     parser.add_argument(
         "--session_cache_type",
-        help="Cache type. [MOCK|REDIS]",
+        help="Cache type. [MOCK|REDIS|SHARDED|TOKEN|MEMORY|COMPACT|PERSISTENT] "
+        "or a spec like near_cache(redis)",
     )
     parser.add_argument(
         "--session_cache_host",
@@ -189,6 +627,66 @@ def _get_arg_parser() -> argparse.ArgumentParser:
         "--session_cache_password",
         help="Cache password",
     )
+    parser.add_argument(
+        "--session_cache_pool_size",
+        help="Cache connection pool size",
+    )
+    parser.add_argument(
+        "--session_ttl",
+        help="Session time to live in seconds",
+    )
+    parser.add_argument(
+        "--session_sliding_expiry",
+        help="Refresh session TTL on every access. [true|false]",
+    )
+    parser.add_argument(
+        "--session_shards",
+        help="Lock shards of the sharded in-process session store",
+    )
+    parser.add_argument(
+        "--session_store_size",
+        help="Max sessions of the in-process session stores",
+    )
+    parser.add_argument(
+        "--session_sweep_interval",
+        help="Seconds between expiry sweeps of the memory session store",
+    )
+    parser.add_argument(
+        "--session_sweep_batch",
+        help="Max expired sessions reclaimed per sweep of the memory session store",
+    )
+    parser.add_argument(
+        "--session_snapshot_path",
+        help="File path prefix of the persistent session store snapshot and log",
+    )
+    parser.add_argument(
+        "--session_snapshot_interval",
+        help="Seconds between snapshots of the persistent session store",
+    )
+    parser.add_argument(
+        "--session_token_keys",
+        help="HMAC keys of signed session tokens. <id>:<secret>,... first one signs",
+    )
+    parser.add_argument(
+        "--session_max_per_user",
+        help="Max sessions per user. the oldest ones are deleted. 0 for no limit",
+    )
+    parser.add_argument(
+        "--session_near_cache",
+        help="Cache sessions in process in front of the cache. [true|false]",
+    )
+    parser.add_argument(
+        "--session_near_cache_size",
+        help="Near cache max entries",
+    )
+    parser.add_argument(
+        "--session_near_cache_ttl",
+        help="Near cache time to live in seconds",
+    )
+    parser.add_argument(
+        "--session_invalidation_channel",
+        help="Channel to propagate signout to near caches. [none|redis]",
+    )
     return parser
 
 
@@ -0,0 +1,89 @@
+import importlib
+import re
+from importlib.metadata import entry_points
+from typing import Any, Callable, Union
+
+# a spec names a backend inside any number of wrapper layers, outermost first.
+#   postgres
+#   cached(postgres)
+#   single_flight(cached(postgres))
+_NAME = re.compile(r"[a-z][a-z0-9_]*")
+
+Factory = Callable[..., Any]
+
+
+class Registry:
+    # backend and wrapper factories by name.
+    # a factory is a callable or a "module:attribute" string imported on first
+    # use. names not registered here are looked up in the entry point groups,
+    # so other packages can add backends and wrappers without touching authapp:
+    #   [tool.poetry.plugins."authapp.user_repositories"]
+    #   mydb = "mypackage.repository:create_user_repository"
+    def __init__(self, kind: str, backend_group: str, wrapper_group: str):
+        self._kind = kind
+        self._backend_group = backend_group
+        self._wrapper_group = wrapper_group
+        self._backends: dict[str, Union[Factory, str]] = {}
+        self._wrappers: dict[str, Union[Factory, str]] = {}
+
+    def register_backend(self, name: str, factory: Union[Factory, str]):
+        self._backends[self._check_name(name)] = factory
+
+    def register_wrapper(self, name: str, factory: Union[Factory, str]):
+        self._wrappers[self._check_name(name)] = factory
+
+    def get_backend(self, name: str) -> Factory:
+        return self._get(self._backends, self._backend_group, self._kind, name)
+
+    def get_wrapper(self, name: str) -> Factory:
+        kind = f"{self._kind} wrapper"
+        return self._get(self._wrappers, self._wrapper_group, kind, name)
+
+    def _check_name(self, name: str) -> str:
+        if _NAME.fullmatch(name) is None:
+            raise ValueError(f"{self._kind} name must match {_NAME.pattern}: {name}")
+        return name
+
+    def _get(
+        self,
+        factories: dict[str, Union[Factory, str]],
+        group: str,
+        kind: str,
+        name: str,
+    ) -> Factory:
+        factory = factories.get(name)
+        if factory is None:
+            found = entry_points(group=group, name=name)
+            if not found:
+                names = "|".join(sorted(factories))
+                raise ValueError(f"{kind} must be [{names}]: {name}")
+            factory = next(iter(found)).load()
+        elif isinstance(factory, str):
+            module, _, attribute = factory.partition(":")
+            factory = getattr(importlib.import_module(module), attribute)
+        factories[name] = factory
+        return factory
+
+
+def parse_spec(spec: str) -> list[str]:
+    # "a(b(c))" -> ["a", "b", "c"]. the last name is the backend
+    names = []
+    rest = spec.replace(" ", "").lower()
+    while "(" in rest:
+        name, _, rest = rest.partition("(")
+        if not rest.endswith(")"):
+            raise ValueError(f"Repository spec is not balanced: {spec}")
+        names.append(name)
+        rest = rest[:-1]
+    names.append(rest)
+    for name in names:
+        if _NAME.fullmatch(name) is None:
+            raise ValueError(f"Repository spec is invalid: {spec}")
+    return names
+
+
+def format_spec(names: list[str]) -> str:
+    spec = names[-1]
+    for name in reversed(names[:-1]):
+        spec = f"{name}({spec})"
+    return spec
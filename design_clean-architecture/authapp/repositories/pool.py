@@ -0,0 +1,192 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging import Logger
+from threading import Condition
+from typing import Any, Callable, Iterator, Optional
+
+from authapp.exceptions import ServerException
+
+
+class _PooledConnection:
+    __slots__ = ("connection", "uses", "last_used")
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    # bounded thread-safe connection pool.
+    # - keeps at least min_size connections open, never more than max_size.
+    # - borrowers wait up to timeout seconds, then ServerException is raised.
+    # - a connection idle longer than health_check_interval is checked
+    #   by health_check() before it is handed out.
+    # - a connection is closed after recycle_uses checkouts.
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        logger: Logger,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5.0,
+        recycle_uses: int = 1000,
+        health_check: Optional[Callable[[Any], bool]] = None,
+        health_check_interval: float = 30.0,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                "Pool size must be 0 <= min_size <= max_size, 1 <= max_size"
+            )
+        self._connect = connect
+        self._logger = logger
+        self._min_size = min_size
+        self._max_size = max_size
+        self._timeout = timeout
+        self._recycle_uses = recycle_uses
+        self._health_check = health_check
+        self._health_check_interval = health_check_interval
+
+        self._condition = Condition()
+        self._idle: deque[_PooledConnection] = deque()
+        self._size = 0
+        self._closed = False
+
+        # metrics
+        self._wait_count = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+        for _ in range(min_size):
+            self._idle.append(self._new_connection())
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        pooled = self._acquire()
+        try:
+            yield pooled.connection
+        except BaseException:
+            # state of the connection is unknown. do not reuse it.
+            self._release(pooled, broken=True)
+            raise
+        self._release(pooled, broken=False)
+
+    def stats(self) -> dict[str, float]:
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self._max_size,
+                "wait_count": self._wait_count,
+                "wait_time_total": self._wait_time_total,
+                "wait_time_max": self._wait_time_max,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+            }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def _acquire(self) -> _PooledConnection:
+        start = time.monotonic()
+        deadline = start + self._timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ServerException("connection pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self._max_size:
+                    # reserve the slot, connect outside of the lock
+                    self._size += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise ServerException("connection pool timeout")
+                self._condition.wait(remaining)
+            waited = time.monotonic() - start
+            self._wait_count += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+
+        if pooled is None:
+            try:
+                return self._create()
+            except BaseException:
+                self._forget()
+                raise
+        if not self._is_healthy(pooled):
+            self._close_quietly(pooled)
+            with self._condition:
+                self._discarded += 1
+            try:
+                return self._create()
+            except BaseException:
+                self._forget()
+                raise
+        return pooled
+
+    def _release(self, pooled: _PooledConnection, broken: bool):
+        pooled.uses += 1
+        pooled.last_used = time.monotonic()
+        if broken or self._closed or pooled.uses >= self._recycle_uses:
+            self._close_quietly(pooled)
+            self._forget()
+            return
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._discarded += 1
+            self._condition.notify()
+
+    def _new_connection(self) -> _PooledConnection:
+        pooled = _PooledConnection(self._connect())
+        with self._condition:
+            self._size += 1
+            self._created += 1
+        return pooled
+
+    def _create(self) -> _PooledConnection:
+        # slot is already reserved by _acquire()
+        pooled = _PooledConnection(self._connect())
+        with self._condition:
+            self._created += 1
+        return pooled
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if getattr(pooled.connection, "closed", False):
+            return False
+        if self._health_check is None:
+            return True
+        if time.monotonic() - pooled.last_used < self._health_check_interval:
+            return True
+        try:
+            return self._health_check(pooled.connection)
+        except Exception:
+            return False
+
+    def _close_quietly(self, pooled: _PooledConnection):
+        try:
+            pooled.connection.close()
+        except Exception as e:
+            self._logger.warning(f"failed to close pooled connection: {e}")
@@ -17,3 +17,38 @@ class AbstractSessionRepository(ABC):
     @abstractmethod
     def delete_session(self, session_uuid: str) -> str:
         ...
+
+    # "sign out everywhere". returns the uuids of the deleted live sessions
+    @abstractmethod
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        ...
+
+    @abstractmethod
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        ...
+
+
+class AbstractAsyncSessionRepository(ABC):
+    @abstractmethod
+    async def exist_session(self, session_uuid: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_session_user_uuid(self, session_uuid: str) -> str:
+        ...
+
+    @abstractmethod
+    async def create_session(self, user_uuid: str) -> str:
+        ...
+
+    @abstractmethod
+    async def delete_session(self, session_uuid: str) -> str:
+        ...
+
+    @abstractmethod
+    async def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        ...
+
+    @abstractmethod
+    async def count_sessions_for_user(self, user_uuid: str) -> int:
+        ...
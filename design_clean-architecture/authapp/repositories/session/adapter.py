@@ -0,0 +1,38 @@
+import asyncio
+
+from authapp.repositories.session.abstract import (
+    AbstractAsyncSessionRepository,
+    AbstractSessionRepository,
+)
+
+
+class AsyncSessionRepositoryAdapter(AbstractAsyncSessionRepository):
+    # exposes a sync repository to the async stack.
+    # in-memory repositories never block, so they are called inline.
+    # blocking (network) repositories must set offload to run on a thread.
+    def __init__(self, repo: AbstractSessionRepository, offload: bool):
+        self._repo = repo
+        self._offload = offload
+
+    async def exist_session(self, session_uuid: str) -> bool:
+        return await self._call(self._repo.exist_session, session_uuid)
+
+    async def get_session_user_uuid(self, session_uuid: str) -> str:
+        return await self._call(self._repo.get_session_user_uuid, session_uuid)
+
+    async def create_session(self, user_uuid: str) -> str:
+        return await self._call(self._repo.create_session, user_uuid)
+
+    async def delete_session(self, session_uuid: str) -> str:
+        return await self._call(self._repo.delete_session, session_uuid)
+
+    async def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        return await self._call(self._repo.delete_sessions_for_user, user_uuid)
+
+    async def count_sessions_for_user(self, user_uuid: str) -> int:
+        return await self._call(self._repo.count_sessions_for_user, user_uuid)
+
+    async def _call(self, func, *args):
+        if self._offload:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
@@ -0,0 +1,336 @@
+import math
+import random
+import time
+import uuid
+from array import array
+from logging import Logger
+from threading import Lock
+from typing import Callable
+
+from authapp.repositories.session.abstract import AbstractSessionRepository
+
+_THREE_HOUR = 60 * 60 * 3
+_MAX_SIZE = 1000000
+_UUID_SIZE = 16
+# live sessions per slot. lower load means shorter probe sequences
+_MAX_LOAD = 0.75
+# live sessions plus tombstones per slot. above it, writes clean until below
+_MAX_FILL = 0.875
+# slots the cleaner walks per write
+_CLEAN_STEP = 8
+_EVICTION_SAMPLES = 16
+
+# expiry column values. anything else is expires_at + _OFFSET
+_EMPTY = 0
+_DELETED = 1
+_OFFSET = 2
+# end of a per-user chain
+_NO_SLOT = -1
+
+
+class CompactSessionRepository(AbstractSessionRepository):
+    # session store for millions of sessions on one node.
+    # an open addressing hash table (linear probing) over preallocated columns:
+    #   keys:   16 byte binary session uuids
+    #   users:  16 byte binary user uuids
+    #   expiry: uint32 seconds since the store was created, or a slot state
+    #   next/prev: int32 slots of the same user (doubly linked chain)
+    # about 59 bytes per session at full load, plus one dict entry per user
+    # pointing at the head of the chain. hundreds for python str objects in
+    # a TTLCache. uuids are converted from/to str only at the method
+    # boundary, so user_uuid must be a uuid string.
+    #
+    # expired sessions are removed when read. when the store is full, a
+    # random sample of slots is checked and its expired sessions are removed,
+    # or the one closest to expiry is evicted (approximate LRU).
+    # removes leave tombstones. there is no stop-the-world rehash: each write
+    # walks a few slots of the table and turns the tombstones it meets back
+    # into empty slots, moving sessions of the same cluster closer to their
+    # hash slot (Knuth's algorithm R for linear probing).
+    # the chains give the sessions of a user without a scan. with
+    # max_sessions_per_user > 0, a new session over the limit removes the
+    # sessions of the user closest to expiry, which are the oldest ones.
+    def __init__(
+        self,
+        logger: Logger,
+        ttl: int = _THREE_HOUR,
+        maxsize: int = _MAX_SIZE,
+        max_sessions_per_user: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < _EVICTION_SAMPLES:
+            raise ValueError(f"Session store size must be at least {_EVICTION_SAMPLES}")
+        self._logger = logger
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._max_sessions_per_user = max_sessions_per_user
+        self._clock = clock
+        self._origin = clock()
+        self._lock = Lock()
+        # not rounded up to a power of two. modulo costs less than the memory
+        capacity = max(_EVICTION_SAMPLES * 2, math.ceil(maxsize / _MAX_LOAD))
+        self._capacity = capacity
+        self._max_fill = int(capacity * _MAX_FILL)
+        self._keys = bytearray(_UUID_SIZE * capacity)
+        self._users = bytearray(_UUID_SIZE * capacity)
+        self._expiry = array("I", bytes(4 * capacity))
+        self._next = array("i", [_NO_SLOT]) * capacity
+        self._prev = array("i", [_NO_SLOT]) * capacity
+        # user uuid -> newest slot of the user
+        self._heads: dict[bytes, int] = {}
+        self._size = 0
+        self._deleted = 0
+        self._evictions = 0
+        # next slot the cleaner looks at
+        self._cursor = 0
+
+    def exist_session(self, session_uuid: str) -> bool:
+        try:
+            self.get_session_user_uuid(session_uuid)
+        except KeyError:
+            return False
+        return True
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        key = _to_bytes(session_uuid)
+        now = self._now()
+        with self._lock:
+            slot = self._find(key)
+            if slot < 0:
+                raise KeyError(session_uuid)
+            if self._expiry[slot] - _OFFSET <= now:
+                self._remove(slot)
+                raise KeyError(session_uuid)
+            start = slot * _UUID_SIZE
+            user = bytes(self._users[start : start + _UUID_SIZE])
+        return str(uuid.UUID(bytes=user))
+
+    def create_session(self, user_uuid: str) -> str:
+        user = uuid.UUID(user_uuid).bytes
+        key = uuid.uuid4().bytes
+        now = self._now()
+        with self._lock:
+            slot = self._add(key, user, now + self._ttl + _OFFSET, now)
+            if self._max_sessions_per_user > 0:
+                self._limit_sessions(user, slot, now)
+        return str(uuid.UUID(bytes=key))
+
+    def delete_session(self, session_uuid: str) -> bool:
+        try:
+            key = _to_bytes(session_uuid)
+        except KeyError:
+            return False
+        with self._lock:
+            slot = self._find(key)
+            if slot < 0:
+                return False
+            self._remove(slot)
+        return True
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        try:
+            user = uuid.UUID(user_uuid).bytes
+        except ValueError:
+            return []
+        now = self._now()
+        deleted = []
+        with self._lock:
+            for slot in self._get_user_slots(user):
+                if self._expiry[slot] - _OFFSET > now:
+                    start = slot * _UUID_SIZE
+                    deleted.append(bytes(self._keys[start : start + _UUID_SIZE]))
+                self._remove(slot)
+        return [str(uuid.UUID(bytes=key)) for key in deleted]
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        try:
+            user = uuid.UUID(user_uuid).bytes
+        except ValueError:
+            return 0
+        now = self._now()
+        with self._lock:
+            expiry = self._expiry
+            slots = self._get_user_slots(user)
+            return sum(1 for slot in slots if expiry[slot] - _OFFSET > now)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            columns = [self._keys, self._users, self._expiry, self._next, self._prev]
+            return {
+                "size": self._size,
+                "capacity": self._capacity,
+                "tombstones": self._deleted,
+                "evictions": self._evictions,
+                "users": len(self._heads),
+                "bytes": sum(len(c) * getattr(c, "itemsize", 1) for c in columns),
+            }
+
+    def _now(self) -> int:
+        return int(self._clock() - self._origin)
+
+    def _find(self, key: bytes) -> int:
+        # caller must hold the lock. slot of key or -1
+        keys = self._keys
+        expiry = self._expiry
+        slot = int.from_bytes(key[:8], "little") % self._capacity
+        while True:
+            state = expiry[slot]
+            if state == _EMPTY:
+                return -1
+            start = slot * _UUID_SIZE
+            if state != _DELETED and keys[start : start + _UUID_SIZE] == key:
+                return slot
+            slot = (slot + 1) % self._capacity
+
+    def _add(self, key: bytes, user: bytes, state: int, now: int) -> int:
+        # caller must hold the lock. returns the slot
+        if self._size >= self._maxsize:
+            self._make_room(now)
+        self._clean(_CLEAN_STEP)
+        # over the fill limit at least one slot in eight is a tombstone,
+        # so this stops after a few slots
+        while self._size + self._deleted >= self._max_fill:
+            self._clean(1)
+        return self._insert(key, user, state)
+
+    def _insert(self, key: bytes, user: bytes, state: int) -> int:
+        # caller must hold the lock. session uuids are random, never duplicated
+        expiry = self._expiry
+        slot = int.from_bytes(key[:8], "little") % self._capacity
+        while expiry[slot] > _DELETED:
+            slot = (slot + 1) % self._capacity
+        if expiry[slot] == _DELETED:
+            self._deleted -= 1
+        start = slot * _UUID_SIZE
+        self._keys[start : start + _UUID_SIZE] = key
+        self._users[start : start + _UUID_SIZE] = user
+        expiry[slot] = state
+        self._size += 1
+        # becomes the head of the user chain
+        head = self._heads.get(user, _NO_SLOT)
+        self._next[slot] = head
+        self._prev[slot] = _NO_SLOT
+        if head != _NO_SLOT:
+            self._prev[head] = slot
+        self._heads[user] = slot
+        return slot
+
+    def _remove(self, slot: int) -> bool:
+        # caller must hold the lock. a tombstone keeps probe sequences intact.
+        # returns False when the slot holds no session
+        if self._expiry[slot] <= _DELETED:
+            return False
+        self._expiry[slot] = _DELETED
+        self._size -= 1
+        self._deleted += 1
+        prev_slot, next_slot = self._prev[slot], self._next[slot]
+        if prev_slot != _NO_SLOT:
+            self._next[prev_slot] = next_slot
+        else:
+            start = slot * _UUID_SIZE
+            user = bytes(self._users[start : start + _UUID_SIZE])
+            if next_slot != _NO_SLOT:
+                self._heads[user] = next_slot
+            else:
+                del self._heads[user]
+        if next_slot != _NO_SLOT:
+            self._prev[next_slot] = prev_slot
+        return True
+
+    def _get_user_slots(self, user: bytes) -> list[int]:
+        # caller must hold the lock. newest first, expired ones included
+        slots = []
+        slot = self._heads.get(user, _NO_SLOT)
+        while slot != _NO_SLOT:
+            slots.append(slot)
+            slot = self._next[slot]
+        return slots
+
+    def _limit_sessions(self, user: bytes, new_slot: int, now: int):
+        # caller must hold the lock. expired sessions of the user go first
+        expiry = self._expiry
+        slots = [s for s in self._get_user_slots(user) if s != new_slot]
+        for slot in slots:
+            if expiry[slot] - _OFFSET <= now:
+                self._remove(slot)
+        slots = [s for s in slots if expiry[s] > _DELETED]
+        excess = len(slots) + 1 - self._max_sessions_per_user
+        for slot in sorted(slots, key=expiry.__getitem__)[: max(0, excess)]:
+            self._remove(slot)
+
+    def _make_room(self, now: int):
+        # caller must hold the lock
+        expiry = self._expiry
+        while self._size >= self._maxsize:
+            # distinct slots. a scan from a random slot meets every session
+            # once before it wraps around, so it stops at the number of sessions
+            count = min(_EVICTION_SAMPLES, self._size)
+            slot = random.randrange(self._capacity)
+            samples = []
+            while len(samples) < count:
+                if expiry[slot] > _DELETED:
+                    samples.append(slot)
+                slot = (slot + 1) % self._capacity
+            expired = [s for s in samples if expiry[s] - _OFFSET <= now]
+            if expired:
+                for slot in expired:
+                    self._remove(slot)
+            else:
+                self._remove(min(samples, key=expiry.__getitem__))
+                self._evictions += 1
+
+    def _clean(self, steps: int):
+        # caller must hold the lock. walks steps slots from the cursor
+        expiry = self._expiry
+        for _ in range(steps):
+            slot = self._cursor
+            self._cursor = (slot + 1) % self._capacity
+            if expiry[slot] == _DELETED:
+                self._clear_tombstone(slot)
+
+    def _clear_tombstone(self, hole: int):
+        # caller must hold the lock. scans the cluster after the tombstone up
+        # to the next empty slot. a session whose probe sequence passes the
+        # hole is moved into it, and its slot becomes the hole. at the empty
+        # slot no later session needs the hole, so it becomes empty too.
+        # the fill limit keeps clusters short
+        expiry = self._expiry
+        capacity = self._capacity
+        slot = (hole + 1) % capacity
+        while expiry[slot] != _EMPTY:
+            if expiry[slot] > _DELETED:
+                start = slot * _UUID_SIZE
+                home = int.from_bytes(self._keys[start : start + 8], "little")
+                home %= capacity
+                if (slot - home) % capacity >= (slot - hole) % capacity:
+                    self._move(slot, hole)
+                    hole = slot
+            slot = (slot + 1) % capacity
+        expiry[hole] = _EMPTY
+        self._deleted -= 1
+
+    def _move(self, source: int, target: int):
+        # caller must hold the lock. the source slot becomes a tombstone
+        source_start = source * _UUID_SIZE
+        target_start = target * _UUID_SIZE
+        for column in [self._keys, self._users]:
+            data = column[source_start : source_start + _UUID_SIZE]
+            column[target_start : target_start + _UUID_SIZE] = data
+        self._expiry[target] = self._expiry[source]
+        self._expiry[source] = _DELETED
+        prev_slot, next_slot = self._prev[source], self._next[source]
+        self._prev[target], self._next[target] = prev_slot, next_slot
+        if prev_slot != _NO_SLOT:
+            self._next[prev_slot] = target
+        else:
+            user = bytes(self._users[target_start : target_start + _UUID_SIZE])
+            self._heads[user] = target
+        if next_slot != _NO_SLOT:
+            self._prev[next_slot] = target
+
+
+def _to_bytes(session_uuid: str) -> bytes:
+    try:
+        return uuid.UUID(session_uuid).bytes
+    except (ValueError, TypeError, AttributeError):
+        raise KeyError(session_uuid)
@@ -0,0 +1,32 @@
+class UserSessionIndex:
+    # reverse index user_uuid -> session uuids, oldest first.
+    # kept next to the forward map (session_uuid -> user_uuid) of a store,
+    # so the sessions of one user are found without a scan.
+    # not thread-safe. the caller holds the lock of the forward map.
+    def __init__(self):
+        # dict as an insertion ordered set
+        self._sessions: dict[str, dict[str, None]] = {}
+
+    def add(self, user_uuid: str, session_uuid: str):
+        sessions = self._sessions.get(user_uuid)
+        if sessions is None:
+            sessions = self._sessions[user_uuid] = {}
+        sessions[session_uuid] = None
+
+    def remove(self, user_uuid: str, session_uuid: str):
+        sessions = self._sessions.get(user_uuid)
+        if sessions is None:
+            return
+        sessions.pop(session_uuid, None)
+        if not sessions:
+            del self._sessions[user_uuid]
+
+    def pop(self, user_uuid: str) -> list[str]:
+        return list(self._sessions.pop(user_uuid, ()))
+
+    def get(self, user_uuid: str) -> list[str]:
+        return list(self._sessions.get(user_uuid, ()))
+
+    def __len__(self) -> int:
+        # number of users
+        return len(self._sessions)
@@ -0,0 +1,76 @@
+from abc import ABC, abstractmethod
+from logging import Logger
+from threading import Lock
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    # the client is passed in. importing redis costs startup time otherwise
+    import redis
+
+_CHANNEL = "session-invalidation"
+
+
+class AbstractInvalidationChannel(ABC):
+    # broadcasts deleted session uuids to every worker
+    @abstractmethod
+    def publish(self, session_uuid: str) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        ...
+
+
+class LocalInvalidationChannel(AbstractInvalidationChannel):
+    # in-process channel. for tests and single process deployment
+    def __init__(self):
+        self._lock = Lock()
+        self._callbacks: list[Callable[[str], None]] = []
+
+    def publish(self, session_uuid: str) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(session_uuid)
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            self._callbacks.append(callback)
+
+
+class RedisInvalidationChannel(AbstractInvalidationChannel):
+    # redis pub/sub. messages are received on a background thread
+    def __init__(self, client: "redis.Redis", logger: Logger):
+        self._client = client
+        self._logger = logger
+        self._pubsub = None
+        self._thread = None
+
+    def publish(self, session_uuid: str) -> None:
+        self._client.publish(_CHANNEL, session_uuid)
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        def handle(message):
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            callback(data)
+
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{_CHANNEL: handle})
+        if self._thread is None:
+            self._thread = self._pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=self._handle_error,
+            )
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+    def _handle_error(self, error, pubsub, thread):
+        self._logger.warning(f"session invalidation channel error: {error}")
@@ -0,0 +1,192 @@
+import heapq
+import time
+from logging import Logger
+from threading import Event, Lock, Thread
+from typing import Callable
+
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.index import UserSessionIndex
+from authapp.util import get_random_uuid
+
+_THREE_HOUR = 60 * 60 * 3
+_MAX_SIZE = 100000
+_SWEEP_INTERVAL = 1.0
+_SWEEP_BATCH = 1000
+
+
+class InMemorySessionRepository(AbstractSessionRepository):
+    # thread-safe in-process session store with active expiry.
+    # a min-heap orders sessions by expiry time. a background thread pops
+    # at most sweep_batch expired sessions per tick, so dead sessions do not
+    # hold memory until touched, and one tick never stalls requests for long.
+    # when full, expired sessions are reclaimed first. only then is the live
+    # session closest to expiry evicted, and counted as a live eviction.
+    # with max_sessions_per_user > 0, a new session over the limit deletes
+    # the oldest sessions of the user.
+    def __init__(
+        self,
+        logger: Logger,
+        ttl: int = _THREE_HOUR,
+        maxsize: int = _MAX_SIZE,
+        sweep_interval: float = _SWEEP_INTERVAL,
+        sweep_batch: int = _SWEEP_BATCH,
+        max_sessions_per_user: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._logger = logger
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._sweep_batch = sweep_batch
+        self._max_sessions_per_user = max_sessions_per_user
+        self._clock = clock
+        self._lock = Lock()
+        # session_uuid -> (user_uuid, expires_at)
+        self._sessions: dict[str, tuple[str, float]] = {}
+        # (expires_at, session_uuid). deleted sessions leave stale entries
+        self._heap: list[tuple[float, str]] = []
+        self._index = UserSessionIndex()
+        self._live_evictions = 0
+        self._reclaimed = 0
+        self._stop = Event()
+        self._sweeper = None
+        if sweep_interval > 0:
+            self._sweeper = Thread(
+                target=self._run_sweeper, args=(sweep_interval,), daemon=True
+            )
+            self._sweeper.start()
+
+    def exist_session(self, session_uuid: str) -> bool:
+        try:
+            self.get_session_user_uuid(session_uuid)
+        except KeyError:
+            return False
+        return True
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        now = self._clock()
+        with self._lock:
+            user_uuid, expires_at = self._sessions[session_uuid]
+            if expires_at <= now:
+                # reclaimed by the sweeper later
+                raise KeyError(session_uuid)
+            return user_uuid
+
+    def create_session(self, user_uuid: str) -> str:
+        session_uuid = get_random_uuid()
+        now = self._clock()
+        expires_at = now + self._ttl
+        with self._lock:
+            while len(self._sessions) >= self._maxsize:
+                self._evict(now)
+            self._sessions[session_uuid] = (user_uuid, expires_at)
+            heapq.heappush(self._heap, (expires_at, session_uuid))
+            self._index.add(user_uuid, session_uuid)
+            if self._max_sessions_per_user > 0:
+                # oldest first
+                sessions = self._get_live_sessions(user_uuid, now)
+                excess = len(sessions) - self._max_sessions_per_user
+                for old in sessions[: max(0, excess)]:
+                    self._pop(old)
+        return session_uuid
+
+    def delete_session(self, session_uuid: str) -> bool:
+        with self._lock:
+            return self._pop(session_uuid)
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        now = self._clock()
+        deleted = []
+        with self._lock:
+            for session_uuid in self._index.pop(user_uuid):
+                if self._sessions.pop(session_uuid)[1] > now:
+                    deleted.append(session_uuid)
+            self._compact_heap()
+        return deleted
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        now = self._clock()
+        with self._lock:
+            return len(self._get_live_sessions(user_uuid, now))
+
+    def sweep(self) -> int:
+        # reclaims up to sweep_batch expired sessions. returns the number
+        now = self._clock()
+        reclaimed = 0
+        with self._lock:
+            for _ in range(self._sweep_batch):
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, session_uuid = heapq.heappop(self._heap)
+                if self._pop_if_expired(session_uuid, now):
+                    reclaimed += 1
+            self._reclaimed += reclaimed
+        return reclaimed
+
+    def stats(self) -> dict[str, int]:
+        # gauges. scans all sessions, so call it at scrape interval only
+        now = self._clock()
+        with self._lock:
+            expired = sum(1 for _, e in self._sessions.values() if e <= now)
+            return {
+                "live": len(self._sessions) - expired,
+                "expired_unreclaimed": expired,
+                "live_evictions": self._live_evictions,
+                "reclaimed": self._reclaimed,
+                "capacity": self._maxsize,
+            }
+
+    def close(self):
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+
+    def _evict(self, now: float):
+        # caller must hold the lock
+        expires_at, session_uuid = heapq.heappop(self._heap)
+        if self._pop_if_expired(session_uuid, now):
+            self._reclaimed += 1
+        elif self._sessions.get(session_uuid, (None, None))[1] == expires_at:
+            self._pop(session_uuid)
+            self._live_evictions += 1
+
+    def _pop_if_expired(self, session_uuid: str, now: float) -> bool:
+        # caller must hold the lock
+        session = self._sessions.get(session_uuid)
+        if session is None or session[1] > now:
+            return False
+        self._pop(session_uuid)
+        return True
+
+    def _pop(self, session_uuid: str) -> bool:
+        # caller must hold the lock. heap entries are left stale
+        session = self._sessions.pop(session_uuid, None)
+        if session is None:
+            return False
+        self._index.remove(session[0], session_uuid)
+        self._compact_heap()
+        return True
+
+    def _compact_heap(self):
+        # caller must hold the lock. called after every removal
+        if len(self._heap) > 2 * len(self._sessions) + self._sweep_batch:
+            # too many stale heap entries. bounds heap memory
+            self._heap = [(e, s) for e, s in self._heap if s in self._sessions]
+            heapq.heapify(self._heap)
+
+    def _get_live_sessions(self, user_uuid: str, now: float) -> list[str]:
+        # caller must hold the lock. oldest first
+        return [
+            session_uuid
+            for session_uuid in self._index.get(user_uuid)
+            if self._sessions[session_uuid][1] > now
+        ]
+
+    def _run_sweeper(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                reclaimed = self.sweep()
+            except Exception as e:
+                self._logger.warning(f"session sweep failed: {e}")
+                continue
+            if reclaimed:
+                self._logger.debug(f"reclaimed {reclaimed} expired sessions")
@@ -1,15 +1,41 @@
 from logging import Logger
 from cachetools import TTLCache
 from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.index import UserSessionIndex
 from authapp.util import get_random_uuid
 
 _CACHE_SIZE = 10000
 _THREE_HOUR = 60 * 60 * 3
 
 
+class _IndexedTTLCache(TTLCache):
+    # drops expired and evicted sessions from the index as well
+    def __init__(self, maxsize: int, ttl: float, index: UserSessionIndex):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._index = index
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for session_uuid, user_uuid in expired:
+            self._index.remove(user_uuid, session_uuid)
+        return expired
+
+    def popitem(self):
+        session_uuid, user_uuid = super().popitem()
+        self._index.remove(user_uuid, session_uuid)
+        return session_uuid, user_uuid
+
+
 class MockSessionRepository(AbstractSessionRepository):
-    def __init__(self, logger: Logger):
-        self._sessions = TTLCache(maxsize=_CACHE_SIZE, ttl=_THREE_HOUR)
+    def __init__(
+        self,
+        logger: Logger,
+        ttl: int = _THREE_HOUR,
+        max_sessions_per_user: int = 0,
+    ):
+        self._max_sessions_per_user = max_sessions_per_user
+        self._index = UserSessionIndex()
+        self._sessions = _IndexedTTLCache(_CACHE_SIZE, ttl, self._index)
 
     def exist_session(self, session_uuid: str) -> bool:
         return session_uuid in self._sessions
@@ -20,8 +46,32 @@ class MockSessionRepository(AbstractSessionRepository):
     def create_session(self, user_uuid: str) -> str:
         session_uuid = get_random_uuid()
         self._sessions[session_uuid] = user_uuid
+        self._index.add(user_uuid, session_uuid)
+        if self._max_sessions_per_user > 0:
+            # oldest first
+            sessions = self._get_live_sessions(user_uuid)
+            excess = len(sessions) - self._max_sessions_per_user
+            for old in sessions[: max(0, excess)]:
+                self.delete_session(old)
         return session_uuid
 
     def delete_session(self, session_uuid: str) -> bool:
-        if session_uuid in self._sessions:
-            del self._sessions[session_uuid]
+        user_uuid = self._sessions.pop(session_uuid, None)
+        if user_uuid is None:
+            return False
+        self._index.remove(user_uuid, session_uuid)
+        return True
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        deleted = []
+        for session_uuid in self._index.pop(user_uuid):
+            if self._sessions.pop(session_uuid, None) is not None:
+                deleted.append(session_uuid)
+        return deleted
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        return len(self._get_live_sessions(user_uuid))
+
+    def _get_live_sessions(self, user_uuid: str) -> list[str]:
+        # the index may hold expired sessions until cachetools purges them
+        return [s for s in self._index.get(user_uuid) if s in self._sessions]
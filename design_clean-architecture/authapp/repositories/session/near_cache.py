@@ -0,0 +1,157 @@
+from logging import Logger
+from threading import Lock
+from typing import Optional
+
+from cachetools import TTLCache
+
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.invalidation import AbstractInvalidationChannel
+
+_CACHE_SIZE = 10000
+_TTL = 5
+# invalidations remembered for loads in flight before they are pruned
+_INVALIDATED_SIZE = 1024
+
+
+class _CountingTTLCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        # called by cachetools only when the cache is full
+        self.evictions += 1
+        return super().popitem()
+
+
+class NearCacheSessionRepository(AbstractSessionRepository):
+    # process-local cache of session -> user_uuid in front of any backend.
+    # entries live at most ttl seconds, so a session deleted on another worker
+    # is visible here for at most ttl seconds even without a channel.
+    # note: cache hits do not refresh sliding expiry on the backend.
+    # a backend read that overlaps a delete may still see the session. every
+    # invalidation bumps a generation, and a read whose session was
+    # invalidated after it started is returned but not cached.
+    def __init__(
+        self,
+        backend: AbstractSessionRepository,
+        logger: Logger,
+        maxsize: int = _CACHE_SIZE,
+        ttl: float = _TTL,
+        channel: Optional[AbstractInvalidationChannel] = None,
+    ):
+        self._backend = backend
+        self._logger = logger
+        self._lock = Lock()
+        self._cache = _CountingTTLCache(maxsize=maxsize, ttl=ttl)
+        self._channel = channel
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._generation = 0
+        # session -> generation of its last invalidation, while loads are in flight
+        self._invalidated: dict[str, int] = {}
+        self._invalidated_limit = _INVALIDATED_SIZE
+        # generation at the start of a load in flight -> number of such loads
+        self._loads: dict[int, int] = {}
+        if channel is not None:
+            channel.subscribe(self._invalidate)
+
+    def exist_session(self, session_uuid: str) -> bool:
+        with self._lock:
+            if session_uuid in self._cache:
+                self._hits += 1
+                return True
+            self._misses += 1
+        return self._backend.exist_session(session_uuid)
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        with self._lock:
+            user_uuid = self._cache.get(session_uuid)
+            if user_uuid is not None:
+                self._hits += 1
+                return user_uuid
+            self._misses += 1
+            start = self._start_load()
+        try:
+            user_uuid = self._backend.get_session_user_uuid(session_uuid)
+        except BaseException:
+            with self._lock:
+                self._end_load(start)
+            raise
+        with self._lock:
+            if self._invalidated.get(session_uuid, start) <= start:
+                self._cache[session_uuid] = user_uuid
+            self._end_load(start)
+        return user_uuid
+
+    def create_session(self, user_uuid: str) -> str:
+        session_uuid = self._backend.create_session(user_uuid)
+        with self._lock:
+            self._cache[session_uuid] = user_uuid
+        return session_uuid
+
+    def delete_session(self, session_uuid: str) -> bool:
+        # invalidated after the delete too, so a read between the two
+        # cannot put the session back
+        self._invalidate(session_uuid)
+        try:
+            deleted = self._backend.delete_session(session_uuid)
+        finally:
+            self._invalidate(session_uuid)
+        if self._channel is not None:
+            self._channel.publish(session_uuid)
+        return deleted
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        deleted = self._backend.delete_sessions_for_user(user_uuid)
+        for session_uuid in deleted:
+            self._invalidate(session_uuid)
+            if self._channel is not None:
+                self._channel.publish(session_uuid)
+        return deleted
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        return self._backend.count_sessions_for_user(user_uuid)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._cache.evictions,
+                "invalidations": self._invalidations,
+                "size": len(self._cache),
+            }
+
+    def _start_load(self) -> int:
+        # caller must hold the lock. returns the generation the load started at
+        start = self._generation
+        self._loads[start] = self._loads.get(start, 0) + 1
+        return start
+
+    def _end_load(self, start: int):
+        # caller must hold the lock
+        if self._loads[start] == 1:
+            del self._loads[start]
+        else:
+            self._loads[start] -= 1
+        if not self._loads:
+            self._invalidated.clear()
+        elif len(self._invalidated) >= self._invalidated_limit:
+            # only invalidations after the oldest load in flight matter
+            oldest = min(self._loads)
+            self._invalidated = {
+                session_uuid: generation
+                for session_uuid, generation in self._invalidated.items()
+                if generation > oldest
+            }
+            self._invalidated_limit = max(_INVALIDATED_SIZE, 2 * len(self._invalidated))
+
+    def _invalidate(self, session_uuid: str):
+        with self._lock:
+            self._generation += 1
+            if self._loads:
+                self._invalidated[session_uuid] = self._generation
+            if self._cache.pop(session_uuid, None) is not None:
+                self._invalidations += 1
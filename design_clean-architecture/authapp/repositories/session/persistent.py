@@ -0,0 +1,291 @@
+import glob
+import mmap
+import os
+import struct
+import time
+from array import array
+from logging import Logger
+from threading import Event, Lock, Thread
+from typing import Callable
+
+from authapp.repositories.session.compact import (
+    _OFFSET,
+    _UUID_SIZE,
+    CompactSessionRepository,
+)
+
+_THREE_HOUR = 60 * 60 * 3
+_MAX_SIZE = 1000000
+_SNAPSHOT_INTERVAL = 60.0
+
+# snapshot: header, then the raw key, user, expiry, next and prev columns
+# (native order), then the heads of the user chains
+_SNAPSHOT_MAGIC = b"AUTHSNAP"
+_SNAPSHOT_VERSION = 1
+# magic, version
+_SNAPSHOT_PREFIX = struct.Struct("<8sI")
+# magic, version, capacity, size, tombstones, origin, first log generation,
+# number of users
+_SNAPSHOT_HEADER = struct.Struct("<8sIQQQdQQ")
+# user uuid, head slot
+_HEAD_RECORD = struct.Struct("<16si")
+
+# log: header, then fixed size records
+_LOG_MAGIC = b"AUTHSLOG"
+# magic, origin
+_LOG_HEADER = struct.Struct("<8sd")
+# op, session uuid, user uuid, expiry state
+_LOG_RECORD = struct.Struct("<c16s16sI")
+_CREATE = b"C"
+_DELETE = b"D"
+_NO_USER = bytes(_UUID_SIZE)
+
+
+class PersistentSessionRepository(CompactSessionRepository):
+    # CompactSessionRepository that survives restarts.
+    #   <path>.snapshot  the hash table columns as they are in memory.
+    #                    loaded through mmap with one copy per column.
+    #   <path>.log.<n>   creates and deletes after the snapshot. one record
+    #                    per change, written with os.write, so a killed
+    #                    process loses nothing. power loss may lose the tail.
+    # a snapshot switches to a new log generation and drops the older logs.
+    # expiry is stored as seconds since a wall clock origin, which is kept
+    # in the files, so sessions expire on time across restarts.
+    # one path per process. workers must not share the files.
+    def __init__(
+        self,
+        logger: Logger,
+        path: str,
+        ttl: int = _THREE_HOUR,
+        maxsize: int = _MAX_SIZE,
+        snapshot_interval: float = _SNAPSHOT_INTERVAL,
+        max_sessions_per_user: int = 0,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(
+            logger,
+            ttl=ttl,
+            maxsize=maxsize,
+            max_sessions_per_user=max_sessions_per_user,
+            clock=clock,
+        )
+        self._path = path
+        self._snapshot_lock = Lock()
+        self._log_fd = -1
+        self._log_generation = 0
+        self._log_records = 0
+        self._recover()
+        self._stop = Event()
+        self._snapshotter = None
+        if snapshot_interval > 0:
+            self._snapshotter = Thread(
+                target=self._run_snapshotter, args=(snapshot_interval,), daemon=True
+            )
+            self._snapshotter.start()
+
+    def snapshot(self):
+        with self._snapshot_lock:
+            with self._lock:
+                header = _SNAPSHOT_HEADER.pack(
+                    _SNAPSHOT_MAGIC,
+                    _SNAPSHOT_VERSION,
+                    self._capacity,
+                    self._size,
+                    self._deleted,
+                    self._origin,
+                    self._log_generation + 1,
+                    len(self._heads),
+                )
+                columns = [
+                    bytes(self._keys),
+                    bytes(self._users),
+                    self._expiry.tobytes(),
+                    self._next.tobytes(),
+                    self._prev.tobytes(),
+                ]
+                heads = self._heads.copy()
+                # later changes go to the next log
+                self._open_log(self._log_generation + 1)
+
+            # write aside and rename, so a crash keeps the previous snapshot
+            temp_path = self._snapshot_path() + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(header)
+                for column in columns:
+                    f.write(column)
+                f.write(b"".join(_HEAD_RECORD.pack(*head) for head in heads.items()))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._snapshot_path())
+            self._remove_logs_before(self._log_generation)
+        self._logger.debug(f"saved session snapshot to {self._snapshot_path()}")
+
+    def stats(self) -> dict[str, int]:
+        stats = super().stats()
+        stats["log_records"] = self._log_records
+        return stats
+
+    def close(self):
+        self._stop.set()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        self.snapshot()
+        with self._lock:
+            os.close(self._log_fd)
+            self._log_fd = -1
+
+    def _add(self, key: bytes, user: bytes, state: int, now: int) -> int:
+        slot = super()._add(key, user, state, now)
+        self._write_log(_CREATE, key, user, state)
+        return slot
+
+    def _remove(self, slot: int) -> bool:
+        if not super()._remove(slot):
+            return False
+        start = slot * _UUID_SIZE
+        key = bytes(self._keys[start : start + _UUID_SIZE])
+        self._write_log(_DELETE, key, _NO_USER, 0)
+        return True
+
+    def _write_log(self, op: bytes, key: bytes, user: bytes, state: int):
+        # caller must hold the lock. nothing is logged while recovering
+        if self._log_fd < 0:
+            return
+        os.write(self._log_fd, _LOG_RECORD.pack(op, key, user, state))
+        self._log_records += 1
+
+    def _recover(self):
+        start = time.perf_counter()
+        generation = 0
+        if os.path.exists(self._snapshot_path()):
+            generation = self._load_snapshot()
+        generations = [g for g in self._get_log_generations() if g >= generation]
+        replayed = 0
+        for i, log_generation in enumerate(generations):
+            replayed += self._replay_log(log_generation, adopt_origin=(i == 0))
+        self._remove_logs_before(generation)
+        self._open_log(max([generation] + [g + 1 for g in generations]))
+        if generation or generations:
+            elapsed = time.perf_counter() - start
+            self._logger.info(
+                f"recovered {self._size} sessions, "
+                f"replayed {replayed} log records in {elapsed:.2f}s"
+            )
+
+    def _load_snapshot(self) -> int:
+        # returns the first log generation not in the snapshot
+        with open(self._snapshot_path(), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version = _SNAPSHOT_PREFIX.unpack_from(mm)
+                if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+                    raise ValueError(f"{self._snapshot_path()} is not a snapshot")
+                header = _SNAPSHOT_HEADER.unpack_from(mm)
+                _, _, capacity, size, deleted, origin, generation, user_count = header
+                offset = _SNAPSHOT_HEADER.size
+                keys = mm[offset : offset + _UUID_SIZE * capacity]
+                offset += _UUID_SIZE * capacity
+                users = mm[offset : offset + _UUID_SIZE * capacity]
+                offset += _UUID_SIZE * capacity
+                expiry = array("I")
+                expiry.frombytes(mm[offset : offset + 4 * capacity])
+                offset += 4 * capacity
+                next_slots = array("i")
+                next_slots.frombytes(mm[offset : offset + 4 * capacity])
+                offset += 4 * capacity
+                prev_slots = array("i")
+                prev_slots.frombytes(mm[offset : offset + 4 * capacity])
+                offset += 4 * capacity
+                heads = mm[offset : offset + _HEAD_RECORD.size * user_count]
+
+        self._origin = origin
+        if capacity == self._capacity:
+            # same table layout. no per session work, one dict entry per user
+            self._keys = bytearray(keys)
+            self._users = bytearray(users)
+            self._expiry = expiry
+            self._next = next_slots
+            self._prev = prev_slots
+            self._heads = dict(_HEAD_RECORD.iter_unpack(heads))
+            self._size = size
+            self._deleted = deleted
+            return generation
+
+        self._logger.warning("session snapshot layout changed. rehashing the snapshot")
+        now = self._now()
+        for slot, state in enumerate(expiry):
+            if state - _OFFSET > now:
+                start = slot * _UUID_SIZE
+                end = start + _UUID_SIZE
+                self._add(keys[start:end], users[start:end], state, now)
+        return generation
+
+    def _replay_log(self, generation: int, adopt_origin: bool) -> int:
+        path = self._log_path(generation)
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < _LOG_HEADER.size:
+            return 0
+        magic, origin = _LOG_HEADER.unpack_from(data)
+        if magic != _LOG_MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        if adopt_origin and not os.path.exists(self._snapshot_path()):
+            self._origin = origin
+        shift = int(origin - self._origin)
+        now = self._now()
+        records = 0
+        # a torn record at the end (crash while writing) is ignored
+        end = len(data) - (len(data) - _LOG_HEADER.size) % _LOG_RECORD.size
+        for op, key, user, state in _LOG_RECORD.iter_unpack(
+            data[_LOG_HEADER.size : end]
+        ):
+            if op == _CREATE:
+                state += shift
+                if state - _OFFSET > now and self._find(key) < 0:
+                    self._add(key, user, state, now)
+            elif op == _DELETE:
+                slot = self._find(key)
+                if slot >= 0:
+                    self._remove(slot)
+            else:
+                self._logger.warning(f"stopped replaying {path} at a bad record")
+                break
+            records += 1
+        return records
+
+    def _open_log(self, generation: int):
+        # caller must hold the lock, or be the constructor
+        fd = os.open(
+            self._log_path(generation), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+        )
+        os.write(fd, _LOG_HEADER.pack(_LOG_MAGIC, self._origin))
+        if self._log_fd >= 0:
+            os.close(self._log_fd)
+        self._log_fd = fd
+        self._log_generation = generation
+        self._log_records = 0
+
+    def _get_log_generations(self) -> list[int]:
+        generations = []
+        for path in glob.glob(glob.escape(self._path) + ".log.*"):
+            suffix = path.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                generations.append(int(suffix))
+        return sorted(generations)
+
+    def _remove_logs_before(self, generation: int):
+        for log_generation in self._get_log_generations():
+            if log_generation < generation:
+                os.remove(self._log_path(log_generation))
+
+    def _snapshot_path(self) -> str:
+        return self._path + ".snapshot"
+
+    def _log_path(self, generation: int) -> str:
+        return f"{self._path}.log.{generation}"
+
+    def _run_snapshotter(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                self._logger.warning(f"session snapshot failed: {e}")
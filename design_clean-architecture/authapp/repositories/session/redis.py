@@ -1,8 +1,26 @@
+import time
 from logging import Logger
+from typing import Optional
+
+import redis
+
+from authapp.exceptions import ServerException
 from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.util import get_random_uuid
+
+_THREE_HOUR = 60 * 60 * 3
+_KEY_PREFIX = "session:"
+# sorted set of the sessions of a user. score is the creation time
+_USER_KEY_PREFIX = "user_sessions:"
+_CREATE_RETRY = 3
 
 
 class RedisSessionRepository(AbstractSessionRepository):
+    # session:<session uuid> -> user uuid, expiring after ttl.
+    # user_sessions:<user uuid> indexes the sessions of a user, oldest first.
+    # deleted and expired sessions are dropped from the index lazily, when
+    # the sessions of the user are read, so every index operation costs in
+    # proportion to the sessions of that user only.
     def __init__(
         self,
         host: str,
@@ -10,17 +28,117 @@ class RedisSessionRepository(AbstractSessionRepository):
         user: str,
         password: str,
         logger: Logger,
+        ttl: int = _THREE_HOUR,
+        pool_size: int = 10,
+        pool_timeout: float = 5.0,
+        sliding_expiry: bool = False,
+        max_sessions_per_user: int = 0,
+        client: Optional[redis.Redis] = None,
     ):
-        raise NotImplementedError("This class is not implemented yet.")
+        self._logger = logger
+        self._ttl = ttl
+        self._sliding_expiry = sliding_expiry
+        self._max_sessions_per_user = max_sessions_per_user
+        if client is None:
+            # blocking pool: waits for a free connection instead of failing
+            pool = redis.BlockingConnectionPool(
+                host=host,
+                port=port,
+                username=user or None,
+                password=password or None,
+                max_connections=pool_size,
+                timeout=pool_timeout,
+                decode_responses=True,
+            )
+            client = redis.Redis(connection_pool=pool)
+        self._client = client
 
     def exist_session(self, session_uuid: str) -> bool:
-        ...
+        return self._client.exists(_key(session_uuid)) == 1
 
     def get_session_user_uuid(self, session_uuid: str) -> str:
-        ...
+        key = _key(session_uuid)
+        if self._sliding_expiry:
+            # one round trip for read and refresh
+            pipe = self._client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.expire(key, self._ttl)
+            user_uuid, _ = pipe.execute()
+        else:
+            user_uuid = self._client.get(key)
+        if user_uuid is None:
+            raise KeyError(session_uuid)
+        return user_uuid
 
     def create_session(self, user_uuid: str) -> str:
-        ...
+        for _ in range(_CREATE_RETRY):
+            session_uuid = get_random_uuid()
+            # SET key val EX ttl NX. never overwrites an existing session
+            if self._client.set(_key(session_uuid), user_uuid, ex=self._ttl, nx=True):
+                self._index(user_uuid, session_uuid)
+                return session_uuid
+        raise ServerException("failed to create session")
 
     def delete_session(self, session_uuid: str) -> bool:
-        ...
+        return self._client.delete(_key(session_uuid)) == 1
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        sessions = self._get_live_sessions(user_uuid)
+        if not sessions:
+            return []
+        # sessions created meanwhile stay indexed
+        pipe = self._client.pipeline(transaction=False)
+        for session_uuid in sessions:
+            pipe.delete(_key(session_uuid))
+        pipe.zrem(_user_key(user_uuid), *sessions)
+        deleted = pipe.execute()
+        return [s for s, n in zip(sessions, deleted) if n == 1]
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        return len(self._get_live_sessions(user_uuid))
+
+    def _index(self, user_uuid: str, session_uuid: str):
+        user_key = _user_key(user_uuid)
+        now = time.time()
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zadd(user_key, {session_uuid: now})
+        # with sliding expiry a session can outlive ttl. the index then does
+        # not expire and is pruned only when read
+        if not self._sliding_expiry:
+            # every session created before now - ttl has expired
+            pipe.zremrangebyscore(user_key, "-inf", now - self._ttl)
+            pipe.expire(user_key, self._ttl)
+        pipe.execute()
+        if self._max_sessions_per_user > 0:
+            sessions = self._get_live_sessions(user_uuid)
+            excess = len(sessions) - self._max_sessions_per_user
+            if excess > 0:
+                pipe = self._client.pipeline(transaction=False)
+                for old in sessions[:excess]:
+                    pipe.delete(_key(old))
+                    pipe.zrem(user_key, old)
+                pipe.execute()
+
+    def _get_live_sessions(self, user_uuid: str) -> list[str]:
+        # oldest first. drops deleted and expired sessions from the index
+        user_key = _user_key(user_uuid)
+        sessions = self._client.zrange(user_key, 0, -1)
+        if not sessions:
+            return []
+        pipe = self._client.pipeline(transaction=False)
+        for session_uuid in sessions:
+            pipe.exists(_key(session_uuid))
+        exists = pipe.execute()
+        live = [s for s, n in zip(sessions, exists) if n == 1]
+        if len(live) < len(sessions):
+            dead = [s for s, n in zip(sessions, exists) if n != 1]
+            self._client.zrem(user_key, *dead)
+        return live
+
+
+def _key(session_uuid: str) -> str:
+    return _KEY_PREFIX + session_uuid
+
+
+def _user_key(user_uuid: str) -> str:
+    return _USER_KEY_PREFIX + user_uuid
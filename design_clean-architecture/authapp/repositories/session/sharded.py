@@ -0,0 +1,185 @@
+import time
+from collections import OrderedDict
+from logging import Logger
+from threading import Lock
+from typing import Callable
+
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.index import UserSessionIndex
+from authapp.util import get_random_uuid
+
+_THREE_HOUR = 60 * 60 * 3
+_SHARDS = 16
+_MAX_SIZE = 100000
+# expired entries dropped from the LRU end per write. bounds the write cost
+_EXPIRE_PER_WRITE = 2
+
+
+class _Shard:
+    def __init__(self, maxsize: int):
+        self.lock = Lock()
+        self.maxsize = maxsize
+        # session_uuid -> (user_uuid, expires_at). least recently used first
+        self.sessions: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+
+class _UserStripe:
+    def __init__(self):
+        self.lock = Lock()
+        self.index = UserSessionIndex()
+
+
+class ShardedSessionRepository(AbstractSessionRepository):
+    # thread-safe in-process session store.
+    # sessions are spread over shards by hash of session_uuid and every shard
+    # has its own lock, so threads working on different shards do not wait.
+    # expiry is lazy: checked on read and for a few LRU entries on write.
+    # each shard holds at most maxsize / shards sessions. the least recently
+    # used session of the shard is evicted, which approximates a global LRU.
+    #
+    # the user -> sessions index is striped by hash of user_uuid with its own
+    # locks. lock order is shard, then stripe. never the other way around.
+    # with max_sessions_per_user > 0, the oldest sessions of the user are
+    # deleted when a new one goes over the limit.
+    def __init__(
+        self,
+        logger: Logger,
+        ttl: int = _THREE_HOUR,
+        shards: int = _SHARDS,
+        maxsize: int = _MAX_SIZE,
+        max_sessions_per_user: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if shards < 1 or maxsize < shards:
+            raise ValueError("Session store must be 1 <= shards <= maxsize")
+        self._logger = logger
+        self._ttl = ttl
+        self._clock = clock
+        self._max_sessions_per_user = max_sessions_per_user
+        self._shards = [_Shard(-(-maxsize // shards)) for _ in range(shards)]
+        self._stripes = [_UserStripe() for _ in range(shards)]
+
+    def exist_session(self, session_uuid: str) -> bool:
+        try:
+            self.get_session_user_uuid(session_uuid)
+        except KeyError:
+            return False
+        return True
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        shard = self._get_shard(session_uuid)
+        now = self._clock()
+        with shard.lock:
+            user_uuid, expires_at = shard.sessions[session_uuid]
+            if expires_at <= now:
+                del shard.sessions[session_uuid]
+                shard.expirations += 1
+                self._unindex(user_uuid, session_uuid)
+                raise KeyError(session_uuid)
+            shard.sessions.move_to_end(session_uuid)
+            return user_uuid
+
+    def create_session(self, user_uuid: str) -> str:
+        session_uuid = get_random_uuid()
+        shard = self._get_shard(session_uuid)
+        now = self._clock()
+        with shard.lock:
+            self._expire(shard, now)
+            if len(shard.sessions) >= shard.maxsize:
+                evicted, (evicted_user, _) = shard.sessions.popitem(last=False)
+                shard.evictions += 1
+                self._unindex(evicted_user, evicted)
+            shard.sessions[session_uuid] = (user_uuid, now + self._ttl)
+            stripe = self._get_stripe(user_uuid)
+            with stripe.lock:
+                stripe.index.add(user_uuid, session_uuid)
+        if self._max_sessions_per_user > 0:
+            # oldest first
+            sessions = self._get_live_sessions(user_uuid)
+            excess = len(sessions) - self._max_sessions_per_user
+            for old in sessions[: max(0, excess)]:
+                self.delete_session(old)
+        return session_uuid
+
+    def delete_session(self, session_uuid: str) -> bool:
+        shard = self._get_shard(session_uuid)
+        with shard.lock:
+            session = shard.sessions.pop(session_uuid, None)
+            if session is None:
+                return False
+            self._unindex(session[0], session_uuid)
+            return True
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        stripe = self._get_stripe(user_uuid)
+        with stripe.lock:
+            sessions = stripe.index.pop(user_uuid)
+        now = self._clock()
+        deleted = []
+        for session_uuid in sessions:
+            shard = self._get_shard(session_uuid)
+            with shard.lock:
+                session = shard.sessions.pop(session_uuid, None)
+            if session is not None and session[1] > now:
+                deleted.append(session_uuid)
+        return deleted
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        return len(self._get_live_sessions(user_uuid))
+
+    def stats(self) -> dict[str, int]:
+        sizes = []
+        evictions = expirations = 0
+        for shard in self._shards:
+            with shard.lock:
+                sizes.append(len(shard.sessions))
+                evictions += shard.evictions
+                expirations += shard.expirations
+        return {
+            "size": sum(sizes),
+            "max_shard_size": max(sizes),
+            "evictions": evictions,
+            "expirations": expirations,
+        }
+
+    def _get_shard(self, session_uuid: str) -> _Shard:
+        return self._shards[hash(session_uuid) % len(self._shards)]
+
+    def _get_stripe(self, user_uuid: str) -> _UserStripe:
+        return self._stripes[hash(user_uuid) % len(self._stripes)]
+
+    def _unindex(self, user_uuid: str, session_uuid: str):
+        # caller must hold the shard lock of session_uuid
+        stripe = self._get_stripe(user_uuid)
+        with stripe.lock:
+            stripe.index.remove(user_uuid, session_uuid)
+
+    def _get_live_sessions(self, user_uuid: str) -> list[str]:
+        # oldest first. expired sessions stay indexed until read or expired
+        stripe = self._get_stripe(user_uuid)
+        with stripe.lock:
+            sessions = stripe.index.get(user_uuid)
+        now = self._clock()
+        live = []
+        for session_uuid in sessions:
+            shard = self._get_shard(session_uuid)
+            with shard.lock:
+                session = shard.sessions.get(session_uuid)
+            if session is not None and session[1] > now:
+                live.append(session_uuid)
+        return live
+
+    def _expire(self, shard: _Shard, now: float):
+        # caller must hold the shard lock
+        for _ in range(_EXPIRE_PER_WRITE):
+            if not shard.sessions:
+                return
+            session_uuid = next(iter(shard.sessions))
+            user_uuid, expires_at = shard.sessions[session_uuid]
+            if expires_at > now:
+                return
+            del shard.sessions[session_uuid]
+            shard.expirations += 1
+            self._unindex(user_uuid, session_uuid)
@@ -0,0 +1,72 @@
+from logging import Logger
+
+from authapp.repositories.singleflight import AsyncSingleFlight, SingleFlight
+from authapp.repositories.session.abstract import (
+    AbstractAsyncSessionRepository,
+    AbstractSessionRepository,
+)
+
+_EXIST = "exist"
+_USER_UUID = "user_uuid"
+
+
+class SingleFlightSessionRepository(AbstractSessionRepository):
+    # parallel requests with the same session cookie share one backend read
+    def __init__(self, backend: AbstractSessionRepository, logger: Logger):
+        self._backend = backend
+        self._logger = logger
+        self._flight = SingleFlight()
+
+    def exist_session(self, session_uuid: str) -> bool:
+        load = self._backend.exist_session
+        return self._flight.do((_EXIST, session_uuid), load, session_uuid)
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        load = self._backend.get_session_user_uuid
+        return self._flight.do((_USER_UUID, session_uuid), load, session_uuid)
+
+    def create_session(self, user_uuid: str) -> str:
+        return self._backend.create_session(user_uuid)
+
+    def delete_session(self, session_uuid: str) -> bool:
+        return self._backend.delete_session(session_uuid)
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        return self._backend.delete_sessions_for_user(user_uuid)
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        return self._backend.count_sessions_for_user(user_uuid)
+
+    def stats(self) -> dict[str, float]:
+        return self._flight.stats()
+
+
+class AsyncSingleFlightSessionRepository(AbstractAsyncSessionRepository):
+    # SingleFlightSessionRepository for the async stack
+    def __init__(self, backend: AbstractAsyncSessionRepository, logger: Logger):
+        self._backend = backend
+        self._logger = logger
+        self._flight = AsyncSingleFlight()
+
+    async def exist_session(self, session_uuid: str) -> bool:
+        load = self._backend.exist_session
+        return await self._flight.do((_EXIST, session_uuid), load, session_uuid)
+
+    async def get_session_user_uuid(self, session_uuid: str) -> str:
+        load = self._backend.get_session_user_uuid
+        return await self._flight.do((_USER_UUID, session_uuid), load, session_uuid)
+
+    async def create_session(self, user_uuid: str) -> str:
+        return await self._backend.create_session(user_uuid)
+
+    async def delete_session(self, session_uuid: str) -> bool:
+        return await self._backend.delete_session(session_uuid)
+
+    async def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        return await self._backend.delete_sessions_for_user(user_uuid)
+
+    async def count_sessions_for_user(self, user_uuid: str) -> int:
+        return await self._backend.count_sessions_for_user(user_uuid)
+
+    def stats(self) -> dict[str, float]:
+        return self._flight.stats()
@@ -0,0 +1,270 @@
+import base64
+import hmac
+import math
+import os
+import time
+from logging import Logger
+from threading import Lock
+from typing import Callable, Optional
+
+from authapp.exceptions import ServerException
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.invalidation import AbstractInvalidationChannel
+
+_THREE_HOUR = 60 * 60 * 3
+_SECRET_SIZE = 32
+_NONCE_SIZE = 8
+_REVOCATION_CAPACITY = 100000
+_BLOOM_FALSE_POSITIVE_RATE = 0.01
+# channel message revoking every token of a user: user:<user uuid>:<cutoff>
+_USER_MESSAGE_PREFIX = "user:"
+
+
+class _BloomFilter:
+    # sized for capacity items at _BLOOM_FALSE_POSITIVE_RATE
+    def __init__(self, capacity: int):
+        self._bits = math.ceil(
+            -capacity * math.log(_BLOOM_FALSE_POSITIVE_RATE) / math.log(2) ** 2
+        )
+        self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+        self._array = bytearray((self._bits + 7) // 8)
+
+    def add(self, token_id: int):
+        for position in self._positions(token_id):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def may_contain(self, token_id: int) -> bool:
+        for position in self._positions(token_id):
+            if not self._array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _positions(self, token_id: int):
+        # token ids are random. double hashing on their two 32 bit halves
+        h1 = token_id & 0xFFFFFFFF
+        h2 = (token_id >> 32) | 1
+        return ((h1 + i * h2) % self._bits for i in range(self._hashes))
+
+
+class RevocationList:
+    # revoked token ids until the tokens expire.
+    # the bloom filter answers "not revoked" for almost every valid token
+    # without taking the lock. the exact dict confirms its positives.
+    # expired ids are purged and the filter is rebuilt once it is over capacity.
+    # when more than half of the ids are still live after a purge, capacity
+    # and filter are doubled, so purges stay amortized O(1) per add and the
+    # false positive rate holds.
+    def __init__(
+        self,
+        capacity: int = _REVOCATION_CAPACITY,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._capacity = capacity
+        self._clock = clock
+        self._lock = Lock()
+        # token id -> expires_at
+        self._revoked: dict[int, float] = {}
+        self._bloom = _BloomFilter(capacity)
+
+    def add(self, token_id: int, expires_at: float):
+        with self._lock:
+            if len(self._revoked) >= self._capacity:
+                self._purge()
+            self._revoked[token_id] = expires_at
+            self._bloom.add(token_id)
+
+    def contains(self, token_id: int) -> bool:
+        if not self._bloom.may_contain(token_id):
+            return False
+        with self._lock:
+            return token_id in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _purge(self):
+        # caller must hold the lock
+        now = self._clock()
+        self._revoked = {
+            token_id: expires_at
+            for token_id, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+        if len(self._revoked) * 2 > self._capacity:
+            self._capacity *= 2
+        bloom = _BloomFilter(self._capacity)
+        for token_id in self._revoked:
+            bloom.add(token_id)
+        self._bloom = bloom
+
+
+class SignedTokenSessionRepository(AbstractSessionRepository):
+    # stateless sessions. the "session uuid" is a signed token:
+    #   <key id>.<user uuid>.<expires at in ms>.<token id>.<hmac-sha256>
+    # verification is cpu only. no store lookup per request.
+    # signout adds the token id to a revocation list, shared with other
+    # workers through the invalidation channel when one is given.
+    #
+    # keys: (key id, secret) pairs. the first one signs, all of them verify,
+    # so a new key can be rolled out before the old one is dropped.
+    #
+    # tokens are not stored, so they cannot be listed or counted per user.
+    # signing out a user everywhere records a per user cutoff instead: every
+    # token of the user expiring before now + ttl was issued before now and is
+    # rejected. milliseconds keep a token issued right after, e.g. on signin
+    # after a password change, valid. one dict entry per user, dropped once the
+    # cutoff passes.
+    def __init__(
+        self,
+        logger: Logger,
+        keys: Optional[list[tuple[str, bytes]]] = None,
+        ttl: int = _THREE_HOUR,
+        revocation_capacity: int = _REVOCATION_CAPACITY,
+        channel: Optional[AbstractInvalidationChannel] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._logger = logger
+        if not keys:
+            logger.warning(
+                "no session token key. tokens are valid in this process only"
+            )
+            keys = [("0", os.urandom(_SECRET_SIZE))]
+        self._signing_key: tuple[str, bytes] = keys[0]
+        self._keys: dict[str, bytes] = dict(keys)
+        self._ttl = ttl
+        self._clock = clock
+        self._revoked = RevocationList(revocation_capacity, clock)
+        self._users_lock = Lock()
+        # purged and doubled like the revocation list
+        self._revoked_users_capacity = revocation_capacity
+        # user uuid -> cutoff expires_at in ms
+        self._revoked_users: dict[str, int] = {}
+        self._channel = channel
+        if channel is not None:
+            channel.subscribe(self._handle_message)
+
+    def exist_session(self, session_uuid: str) -> bool:
+        try:
+            self.get_session_user_uuid(session_uuid)
+        except KeyError:
+            return False
+        return True
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        user_uuid, expires_at, token_id = self._verify(session_uuid)
+        if expires_at <= self._now() or self._revoked.contains(token_id):
+            raise KeyError(session_uuid)
+        if expires_at < self._revoked_users.get(user_uuid, 0):
+            raise KeyError(session_uuid)
+        return user_uuid
+
+    def create_session(self, user_uuid: str) -> str:
+        key_id, secret = self._signing_key
+        expires_at = self._now() + self._ttl * 1000
+        token_id = os.urandom(_NONCE_SIZE).hex()
+        payload = f"{key_id}.{user_uuid}.{expires_at}.{token_id}"
+        return f"{payload}.{_sign(secret, payload)}"
+
+    def delete_session(self, session_uuid: str) -> bool:
+        if not self._revoke(session_uuid):
+            return False
+        if self._channel is not None:
+            self._channel.publish(session_uuid)
+        return True
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        # revokes every token of the user issued until now. returns no uuids,
+        # since the tokens are unknown to the store
+        cutoff = self._now() + self._ttl * 1000
+        self._revoke_user(user_uuid, cutoff)
+        if self._channel is not None:
+            self._channel.publish(f"{_USER_MESSAGE_PREFIX}{user_uuid}:{cutoff}")
+        return []
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        raise ServerException("signed token sessions are not counted")
+
+    def rotate_key(self, key_id: str, secret: bytes):
+        # new tokens are signed with the new key. old tokens stay valid
+        self._keys[key_id] = secret
+        self._signing_key = (key_id, secret)
+
+    def drop_key(self, key_id: str):
+        # tokens signed with the key are rejected from now on
+        if key_id == self._signing_key[0]:
+            raise ValueError("the signing key cannot be dropped")
+        self._keys.pop(key_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "revoked": len(self._revoked),
+            "revoked_users": len(self._revoked_users),
+            "keys": len(self._keys),
+        }
+
+    def _handle_message(self, message: str):
+        if not message.startswith(_USER_MESSAGE_PREFIX):
+            self._revoke(message)
+            return
+        user_uuid, _, cutoff = message[len(_USER_MESSAGE_PREFIX) :].rpartition(":")
+        try:
+            self._revoke_user(user_uuid, int(cutoff))
+        except ValueError:
+            self._logger.warning(f"bad session revocation message: {message}")
+
+    def _revoke_user(self, user_uuid: str, cutoff: int):
+        with self._users_lock:
+            if len(self._revoked_users) >= self._revoked_users_capacity:
+                now = self._now()
+                self._revoked_users = {
+                    user: user_cutoff
+                    for user, user_cutoff in self._revoked_users.items()
+                    if user_cutoff > now
+                }
+                if len(self._revoked_users) * 2 > self._revoked_users_capacity:
+                    self._revoked_users_capacity *= 2
+            cutoff = max(cutoff, self._revoked_users.get(user_uuid, 0))
+            self._revoked_users[user_uuid] = cutoff
+
+    def _revoke(self, session_uuid: str) -> bool:
+        try:
+            _, expires_at, token_id = self._verify(session_uuid)
+        except KeyError:
+            return False
+        self._revoked.add(token_id, expires_at / 1000)
+        return True
+
+    def _now(self) -> int:
+        # in ms like expires_at
+        return int(self._clock() * 1000)
+
+    def _verify(self, token: str) -> tuple[str, int, int]:
+        # returns (user uuid, expires at in ms, token id). KeyError when not genuine
+        try:
+            payload, signature = token.rsplit(".", 1)
+            key_id, user_uuid, expires_at, token_id = payload.split(".")
+            secret = self._keys[key_id]
+            if not hmac.compare_digest(_sign(secret, payload), signature):
+                raise KeyError(token)
+            return user_uuid, int(expires_at), int(token_id, 16)
+        except ValueError:
+            raise KeyError(token)
+
+
+def _sign(secret: bytes, payload: str) -> str:
+    # hmac.digest takes the one-shot C path
+    digest = hmac.digest(secret, payload.encode(), "sha256")
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def parse_keys(value: str) -> list[tuple[str, bytes]]:
+    # "<key id>:<secret>,..." the first key signs. empty for a random key
+    keys = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        key_id, _, secret = item.strip().partition(":")
+        if not key_id or not secret or "." in key_id:
+            raise ValueError("Session token keys must be <id>:<secret>,...")
+        keys.append((key_id, secret.encode()))
+    return keys
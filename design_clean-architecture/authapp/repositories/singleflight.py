@@ -0,0 +1,94 @@
+import asyncio
+from threading import Event, Lock
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _Counters:
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+
+    def to_dict(self, in_flight: int) -> dict[str, float]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / self.calls if self.calls else 0.0,
+            "in_flight": in_flight,
+        }
+
+
+class SingleFlight:
+    # concurrent calls with the same key share one execution of func.
+    # the first caller runs it, the others wait and get the same result
+    # or the same exception. nothing is kept after the call returns.
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._counters = _Counters()
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        with self._lock:
+            self._counters.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                self._counters.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return self._counters.to_dict(len(self._calls))
+
+
+class AsyncSingleFlight:
+    # SingleFlight for coroutines on one event loop
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._counters = _Counters()
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable], *args) -> Any:
+        self._counters.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self._counters.coalesced += 1
+        # a cancelled waiter must not cancel the call shared with others
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, float]:
+        return self._counters.to_dict(len(self._calls))
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        del self._calls[key]
+        if not task.cancelled():
+            # mark the exception retrieved when every waiter was cancelled
+            task.exception()
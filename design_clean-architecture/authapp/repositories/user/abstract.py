@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from authapp.models.user import UserSchema
+from typing import Optional
+
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
 
 
 class AbstractUserRepository(ABC):
@@ -7,6 +9,19 @@ class AbstractUserRepository(ABC):
     def get_users(self) -> list[UserSchema]:
         ...
 
+    def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        # projection. override to avoid loading password hashes
+        return [user.to_user_without_password() for user in self.get_users()]
+
+    @abstractmethod
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        # keyset pagination. up to limit users with id > after, ordered by id
+        ...
+
     @abstractmethod
     def get_user_by_id(self, uuid: str) -> UserSchema:
         ...
@@ -19,20 +34,110 @@ class AbstractUserRepository(ABC):
     def get_user_by_email(self, email: str) -> UserSchema:
         ...
 
+    # batch lookups in one round trip. unknown keys are skipped,
+    # and the order of the result is not defined.
+    @abstractmethod
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        ...
+
+    @abstractmethod
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        ...
+
+    @abstractmethod
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        ...
+
     @abstractmethod
     def create_user_atomically(
         self,
         username: str,
         email: str,
-        password: str,
+        hashed_password: str,
     ) -> None:
         ...
 
+    @abstractmethod
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        # one reject reason per user. None when the user is created
+        ...
+
     @abstractmethod
     def modify_user_atomically(
         self,
         username: str,
         email: str,
-        password: str,
+        hashed_password: str,
+    ) -> None:
+        ...
+
+
+class AbstractAsyncUserRepository(ABC):
+    @abstractmethod
+    async def get_users(self) -> list[UserSchema]:
+        ...
+
+    async def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        # projection. override to avoid loading password hashes
+        return [user.to_user_without_password() for user in await self.get_users()]
+
+    @abstractmethod
+    async def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        # keyset pagination. up to limit users with id > after, ordered by id
+        ...
+
+    @abstractmethod
+    async def get_user_by_id(self, uuid: str) -> UserSchema:
+        ...
+
+    @abstractmethod
+    async def get_user_by_username(self, username: str) -> UserSchema:
+        ...
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> UserSchema:
+        ...
+
+    # batch lookups in one round trip. unknown keys are skipped,
+    # and the order of the result is not defined.
+    @abstractmethod
+    async def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        ...
+
+    @abstractmethod
+    async def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        ...
+
+    @abstractmethod
+    async def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        ...
+
+    @abstractmethod
+    async def create_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def bulk_create_users(
+        self,
+        users: list[UserSchema],
+    ) -> list[Optional[str]]:
+        # one reject reason per user. None when the user is created
+        ...
+
+    @abstractmethod
+    async def modify_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
     ) -> None:
         ...
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Optional
+
+from authapp.repositories.user.abstract import (
+    AbstractAsyncUserRepository,
+    AbstractUserRepository,
+)
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+
+
+class AsyncUserRepositoryAdapter(AbstractAsyncUserRepository):
+    # exposes a sync repository to the async stack.
+    # in-memory repositories never block, so they are called inline.
+    # blocking (network) repositories must set offload to run on a thread.
+    def __init__(self, repo: AbstractUserRepository, offload: bool):
+        self._repo = repo
+        self._offload = offload
+
+    async def get_users(self) -> list[UserSchema]:
+        return await self._call(self._repo.get_users)
+
+    async def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        return await self._call(self._repo.get_users_without_password)
+
+    async def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        return await self._call(self._repo.get_users_page, limit, after)
+
+    async def get_user_by_id(self, uuid: str) -> UserSchema:
+        return await self._call(self._repo.get_user_by_id, uuid)
+
+    async def get_user_by_username(self, username: str) -> UserSchema:
+        return await self._call(self._repo.get_user_by_username, username)
+
+    async def get_user_by_email(self, email: str) -> UserSchema:
+        return await self._call(self._repo.get_user_by_email, email)
+
+    async def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        return await self._call(self._repo.get_users_by_ids, uuids)
+
+    async def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        return await self._call(self._repo.get_users_by_usernames, usernames)
+
+    async def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return await self._call(self._repo.get_users_by_emails, emails)
+
+    async def create_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        return await self._call(
+            self._repo.create_user_atomically, username, email, hashed_password
+        )
+
+    async def bulk_create_users(
+        self,
+        users: list[UserSchema],
+    ) -> list[Optional[str]]:
+        return await self._call(self._repo.bulk_create_users, users)
+
+    async def modify_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        return await self._call(
+            self._repo.modify_user_atomically, username, email, hashed_password
+        )
+
+    async def _call(self, func, *args):
+        if self._offload:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
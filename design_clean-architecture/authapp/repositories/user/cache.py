@@ -0,0 +1,247 @@
+from logging import Logger
+from threading import Lock
+from typing import Optional
+
+from cachetools import TTLCache
+
+from authapp.exceptions import ClientException
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+
+_CACHE_SIZE = 10000
+_TTL = 60
+_NEGATIVE_TTL = 5
+# invalidations remembered for loads in flight before they are pruned
+_INVALIDATED_SIZE = 1024
+
+_ID = "id"
+_USERNAME = "username"
+_EMAIL = "email"
+
+
+class CachedUserRepository(AbstractUserRepository):
+    # read-through LRU+TTL cache in front of any user repository.
+    # a user is cached under its id, username and email.
+    # "user not found" is cached for a short time (negative cache),
+    # so probes for nonexistent users do not reach the backend.
+    # a load that overlaps a write may return the data from before it. every
+    # invalidation bumps a generation, and a load whose keys were invalidated
+    # after it started is returned but not cached.
+    def __init__(
+        self,
+        backend: AbstractUserRepository,
+        logger: Logger,
+        maxsize: int = _CACHE_SIZE,
+        ttl: float = _TTL,
+        negative_ttl: float = _NEGATIVE_TTL,
+    ):
+        self._backend = backend
+        self._logger = logger
+        self._lock = Lock()
+        self._users: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._not_found: TTLCache = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._generation = 0
+        # key -> generation of its last invalidation, while loads are in flight
+        self._invalidated: dict[tuple[str, str], int] = {}
+        self._invalidated_limit = _INVALIDATED_SIZE
+        # generation at the start of a load in flight -> number of such loads
+        self._loads: dict[int, int] = {}
+
+    def get_users(self) -> list[UserSchema]:
+        return self._backend.get_users()
+
+    def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        return self._backend.get_users_without_password()
+
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        return self._backend.get_users_page(limit, after)
+
+    def get_user_by_id(self, uuid: str) -> UserSchema:
+        return self._get_user((_ID, uuid), self._backend.get_user_by_id)
+
+    def get_user_by_username(self, username: str) -> UserSchema:
+        return self._get_user((_USERNAME, username), self._backend.get_user_by_username)
+
+    def get_user_by_email(self, email: str) -> UserSchema:
+        return self._get_user((_EMAIL, email), self._backend.get_user_by_email)
+
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        return self._get_users(_ID, uuids, self._backend.get_users_by_ids)
+
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        load = self._backend.get_users_by_usernames
+        return self._get_users(_USERNAME, usernames, load)
+
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return self._get_users(_EMAIL, emails, self._backend.get_users_by_emails)
+
+    def create_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        try:
+            self._backend.create_user_atomically(username, email, hashed_password)
+        finally:
+            self._invalidate([(_USERNAME, username), (_EMAIL, email)])
+
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        try:
+            return self._backend.bulk_create_users(users)
+        finally:
+            keys = []
+            for user in users:
+                keys.extend(_keys_of(user))
+            self._invalidate(keys)
+
+    def modify_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        try:
+            self._backend.modify_user_atomically(username, email, hashed_password)
+        finally:
+            keys = [(_USERNAME, username), (_EMAIL, email)]
+            with self._lock:
+                user = self._users.get((_USERNAME, username))
+            if user is not None:
+                keys.extend(_keys_of(user))
+            self._invalidate(keys)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            requests = self._hits + self._negative_hits + self._misses
+            avoided = self._hits + self._negative_hits
+            return {
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "hit_ratio": avoided / requests if requests else 0.0,
+                "size": len(self._users),
+                "negative_size": len(self._not_found),
+            }
+
+    def _get_user(self, key: tuple[str, str], load) -> UserSchema:
+        with self._lock:
+            user = self._users.get(key)
+            if user is not None:
+                self._hits += 1
+                return user
+            if key in self._not_found:
+                self._negative_hits += 1
+                raise ClientException("user not found")
+            self._misses += 1
+            start = self._start_load()
+
+        try:
+            user = load(key[1])
+        except ClientException:
+            with self._lock:
+                if not self._is_stale([key], start):
+                    self._not_found[key] = True
+                self._end_load(start)
+            raise
+        except BaseException:
+            with self._lock:
+                self._end_load(start)
+            raise
+
+        with self._lock:
+            keys = _keys_of(user)
+            if not self._is_stale(keys + [key], start):
+                for user_key in keys:
+                    self._users[user_key] = user
+            self._end_load(start)
+        return user
+
+    def _get_users(self, column: str, values: list[str], load) -> list[UserSchema]:
+        # hits are served from the cache. all misses go in one backend call
+        users: dict[str, UserSchema] = {}
+        missing: list[str] = []
+        with self._lock:
+            for value in set(values):
+                key = (column, value)
+                user = self._users.get(key)
+                if user is not None:
+                    self._hits += 1
+                    users[user.id] = user
+                elif key in self._not_found:
+                    self._negative_hits += 1
+                else:
+                    self._misses += 1
+                    missing.append(value)
+            if not missing:
+                return list(users.values())
+            start = self._start_load()
+
+        try:
+            loaded = load(missing)
+        except BaseException:
+            with self._lock:
+                self._end_load(start)
+            raise
+        with self._lock:
+            for user in loaded:
+                users[user.id] = user
+                keys = _keys_of(user)
+                if not self._is_stale(keys, start):
+                    for user_key in keys:
+                        self._users[user_key] = user
+            found = {getattr(user, column) for user in loaded}
+            for value in missing:
+                key = (column, value)
+                if value not in found and not self._is_stale([key], start):
+                    self._not_found[key] = True
+            self._end_load(start)
+        return list(users.values())
+
+    def _start_load(self) -> int:
+        # caller must hold the lock. returns the generation the load started at
+        start = self._generation
+        self._loads[start] = self._loads.get(start, 0) + 1
+        return start
+
+    def _end_load(self, start: int):
+        # caller must hold the lock
+        if self._loads[start] == 1:
+            del self._loads[start]
+        else:
+            self._loads[start] -= 1
+        if not self._loads:
+            self._invalidated.clear()
+        elif len(self._invalidated) >= self._invalidated_limit:
+            # only invalidations after the oldest load in flight matter
+            oldest = min(self._loads)
+            self._invalidated = {
+                key: generation
+                for key, generation in self._invalidated.items()
+                if generation > oldest
+            }
+            self._invalidated_limit = max(_INVALIDATED_SIZE, 2 * len(self._invalidated))
+
+    def _is_stale(self, keys: list[tuple[str, str]], start: int) -> bool:
+        # caller must hold the lock. invalidated since the load started
+        return any(self._invalidated.get(key, start) > start for key in keys)
+
+    def _invalidate(self, keys: list[tuple[str, str]]):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._users.pop(key, None)
+                self._not_found.pop(key, None)
+                if self._loads:
+                    self._invalidated[key] = self._generation
+
+
+def _keys_of(user: UserSchema) -> list[tuple[str, str]]:
+    return [(_ID, user.id), (_USERNAME, user.username), (_EMAIL, user.email)]
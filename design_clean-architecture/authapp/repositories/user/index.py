@@ -0,0 +1,70 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Optional
+
+_BUCKET_SIZE = 1024
+
+
+class SortedIndex:
+    # items in key order for keyset pagination.
+    # items are kept in sorted buckets of up to 2 * _BUCKET_SIZE, with the
+    # last key of each bucket in a separate list. an insert is two bisects and
+    # a move within one bucket, and a page is a bisect and a slice, so neither
+    # depends on the number of items.
+    # not thread-safe. the caller holds the lock of the repository.
+    def __init__(self, key: Optional[Callable[[Any], Any]] = None):
+        self._key = key
+        self._buckets: list[list] = []
+        self._maxes: list = []
+        self._len = 0
+
+    def add(self, item):
+        key = self._get_key(item)
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([item])
+            self._maxes.append(key)
+            return
+        b = bisect_left(self._maxes, key)
+        if b == len(self._maxes):
+            # larger than every key, e.g. increasing ids
+            b -= 1
+            self._buckets[b].append(item)
+            self._maxes[b] = key
+        else:
+            insort(self._buckets[b], item, key=self._key)
+        bucket = self._buckets[b]
+        if len(bucket) > 2 * _BUCKET_SIZE:
+            first, second = bucket[:_BUCKET_SIZE], bucket[_BUCKET_SIZE:]
+            self._buckets[b : b + 1] = [first, second]
+            self._maxes[b : b + 1] = [self._get_key(first[-1]), self._maxes[b]]
+
+    def replace(self, item):
+        # replaces the item with the same key
+        key = self._get_key(item)
+        b = bisect_left(self._maxes, key)
+        if b < len(self._maxes):
+            bucket = self._buckets[b]
+            i = bisect_left(bucket, key, key=self._key)
+            if self._get_key(bucket[i]) == key:
+                bucket[i] = item
+                return
+        raise KeyError(key)
+
+    def page(self, limit: int, after=None) -> list:
+        # the first limit items whose key is greater than after
+        b = 0 if after is None else bisect_right(self._maxes, after)
+        items: list = []
+        while b < len(self._buckets) and len(items) < limit:
+            bucket = self._buckets[b]
+            i = 0
+            if after is not None and not items:
+                i = bisect_right(bucket, after, key=self._key)
+            items.extend(bucket[i : i + limit - len(items)])
+            b += 1
+        return items
+
+    def _get_key(self, item):
+        return item if self._key is None else self._key(item)
+
+    def __len__(self) -> int:
+        return self._len
@@ -0,0 +1,18 @@
+from authapp.models.user import UserSchema
+from authapp.util import get_hashed_password
+
+# sample users every in-process user repository starts with
+INITIAL_USERS = [
+    UserSchema(
+        id="34b8584f-d79f-4b50-b20f-d0abbc87676e",
+        username="yuichi",
+        email="iyuichi@vmware.com",
+        hashed_password=get_hashed_password("p@ssw0rd"),
+    ),
+    UserSchema(
+        id="f75a79c9-e054-4d17-8be8-954a66a7c571",
+        username="shunsuke",
+        email="shunsukeh@vmware.com",
+        hashed_password=get_hashed_password("p@ssw0rd"),
+    ),
+]
@@ -0,0 +1,150 @@
+from logging import Logger
+from threading import Lock
+from typing import Optional
+
+from authapp.exceptions import ClientException
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.repositories.user.index import SortedIndex
+from authapp.repositories.user.initial import INITIAL_USERS
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+from authapp.util import get_random_uuid
+
+# column positions of a row tuple
+_ID = 0
+_USERNAME = 1
+_EMAIL = 2
+_HASHED_PASSWORD = 3
+
+
+class InMemoryUserRepository(AbstractUserRepository):
+    # rows are tuples kept in insertion order.
+    # id/username/email have unique hash indexes to the row position,
+    # so lookups and signup uniqueness checks are O(1).
+    def __init__(self, logger: Logger):
+        self._logger = logger
+        self._lock = Lock()
+        self._rows: list[tuple[str, str, str, str]] = []
+        self._id_index: dict[str, int] = {}
+        self._username_index: dict[str, int] = {}
+        self._email_index: dict[str, int] = {}
+        # ids in order for pagination
+        self._sorted_ids = SortedIndex()
+        for user in INITIAL_USERS:
+            self._insert(user.id, user.username, user.email, user.hashed_password)
+
+    def get_users(self) -> list[UserSchema]:
+        return [self._to_user(row) for row in self._rows]
+
+    def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        return [self._to_user_without_password(row) for row in self._rows]
+
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        with self._lock:
+            ids = self._sorted_ids.page(limit, after)
+        return [
+            self._to_user_without_password(self._rows[self._id_index[uuid]])
+            for uuid in ids
+        ]
+
+    def get_user_by_id(self, uuid: str) -> UserSchema:
+        return self._get_user_from_index(self._id_index, uuid)
+
+    def get_user_by_username(self, username: str) -> UserSchema:
+        return self._get_user_from_index(self._username_index, username)
+
+    def get_user_by_email(self, email: str) -> UserSchema:
+        return self._get_user_from_index(self._email_index, email)
+
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        return self._get_users_from_index(self._id_index, uuids)
+
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        return self._get_users_from_index(self._username_index, usernames)
+
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return self._get_users_from_index(self._email_index, emails)
+
+    def create_user_atomically(self, username, email, hashed_password) -> None:
+        with self._lock:
+            # check existance
+            if username in self._username_index:
+                raise ClientException("username is already used")
+            if email in self._email_index:
+                raise ClientException("email is already used")
+
+            # ok. create
+            self._insert(get_random_uuid(), username, email, hashed_password)
+
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        reasons: list[Optional[str]] = []
+        with self._lock:
+            for user in users:
+                if user.username in self._username_index:
+                    reasons.append("username is already used")
+                elif user.email in self._email_index:
+                    reasons.append("email is already used")
+                else:
+                    self._insert(
+                        user.id, user.username, user.email, user.hashed_password
+                    )
+                    reasons.append(None)
+        return reasons
+
+    def modify_user_atomically(self, username, email, hashed_password) -> None:
+        # username identifies the user. email and password are replaced
+        with self._lock:
+            position = self._username_index.get(username)
+            if position is None:
+                raise ClientException("user not found")
+            uuid, _, old_email, _ = self._rows[position]
+            if email != old_email:
+                if email in self._email_index:
+                    raise ClientException("email is already used")
+                del self._email_index[old_email]
+                self._email_index[email] = position
+            self._rows[position] = (uuid, username, email, hashed_password)
+
+    def _insert(self, uuid: str, username: str, email: str, hashed_password: str):
+        position = len(self._rows)
+        self._rows.append((uuid, username, email, hashed_password))
+        self._id_index[uuid] = position
+        self._username_index[username] = position
+        self._email_index[email] = position
+        self._sorted_ids.add(uuid)
+
+    def _get_user_from_index(self, index: dict[str, int], key: str) -> UserSchema:
+        position = index.get(key)
+        if position is None:
+            raise ClientException("user not found")
+        return self._to_user(self._rows[position])
+
+    def _get_users_from_index(
+        self,
+        index: dict[str, int],
+        keys: list[str],
+    ) -> list[UserSchema]:
+        positions = {index[key] for key in keys if key in index}
+        return [self._to_user(self._rows[position]) for position in positions]
+
+    def _to_user(self, row: tuple[str, str, str, str]) -> UserSchema:
+        # rows are validated on insert
+        return UserSchema.model_construct(
+            id=row[_ID],
+            username=row[_USERNAME],
+            email=row[_EMAIL],
+            hashed_password=row[_HASHED_PASSWORD],
+        )
+
+    def _to_user_without_password(
+        self,
+        row: tuple[str, str, str, str],
+    ) -> UserSchemaWithoutPassword:
+        return UserSchemaWithoutPassword.model_construct(
+            id=row[_ID],
+            username=row[_USERNAME],
+            email=row[_EMAIL],
+        )
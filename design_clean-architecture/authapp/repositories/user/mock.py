@@ -1,70 +1,264 @@
+from __future__ import annotations
+
 from logging import Logger
-import pandas as pd
+from operator import itemgetter
+from threading import Lock, Thread
+from typing import Optional
 
 from authapp.exceptions import ClientException
 from authapp.repositories.user.abstract import AbstractUserRepository
-from authapp.models.user import UserSchema
-from authapp.util import get_hashed_password, get_random_uuid
-
-_INITIAL_USERS = [
-    UserSchema(
-        id="34b8584f-d79f-4b50-b20f-d0abbc87676e",
-        username="yuichi",
-        email="iyuichi@vmware.com",
-        hashed_password=get_hashed_password("p@ssw0rd"),
-    ),
-    UserSchema(
-        id="f75a79c9-e054-4d17-8be8-954a66a7c571",
-        username="shunsuke",
-        email="shunsukeh@vmware.com",
-        hashed_password=get_hashed_password("p@ssw0rd"),
-    ),
-]
+from authapp.repositories.user.index import SortedIndex
+from authapp.repositories.user.initial import INITIAL_USERS
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+from authapp.util import get_random_uuid
+
+try:
+    import pandas as pd
+except ImportError:
+    # optional. "poetry install -E pandas". the memory repository needs none
+    pd = None
+
+_COLUMNS = ["id", "username", "email", "hashed_password"]
+_CHUNK_SIZE = 4096
+_MAX_CHUNKS = 16
 
 
 class MockUserRepository(AbstractUserRepository):
-    def __init__(self, logger: Logger):
+    # new users are appended to python column buffers (the tail).
+    # a full tail is sealed into an immutable DataFrame chunk, and chunks are
+    # merged by a background thread, so a signup never copies the whole table.
+    # merges keep chunk sizes doubling, so a row is copied O(log n) times.
+    def __init__(
+        self,
+        logger: Logger,
+        chunk_size: int = _CHUNK_SIZE,
+        max_chunks: int = _MAX_CHUNKS,
+    ):
+        if pd is None:
+            raise ImportError(
+                "mock user repository requires pandas. use the memory one instead"
+            )
         self._logger = logger
-        self._users = pd.DataFrame([o.model_dump() for o in _INITIAL_USERS])
+        self._chunk_size = chunk_size
+        self._max_chunks = max_chunks
+        self._lock = Lock()
+        self._compactor: Thread | None = None
+        self._generation = 0
+        self._chunks: list[pd.DataFrame] = [
+            pd.DataFrame([o.model_dump() for o in INITIAL_USERS], columns=_COLUMNS)
+        ]
+        self._tail: dict[str, list[str]] = {column: [] for column in _COLUMNS}
+        self._usernames: set[str] = {o.username for o in INITIAL_USERS}
+        self._emails: set[str] = {o.email for o in INITIAL_USERS}
+        # (id, username, email) in id order for pagination
+        self._page_index = SortedIndex(key=itemgetter(0))
+        for o in INITIAL_USERS:
+            self._page_index.add((o.id, o.username, o.email))
 
     def get_users(self) -> list[UserSchema]:
-        list_of_dicts = self._users.to_dict(orient="records")
-        return [UserSchema.model_validate(d) for d in list_of_dicts]
+        # rows are validated on insert
+        return self._project(UserSchema, _COLUMNS)
+
+    def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        return self._project(UserSchemaWithoutPassword, _COLUMNS[:3])
+
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        with self._lock:
+            rows = self._page_index.page(limit, after)
+        columns = _COLUMNS[:3]
+        construct = UserSchemaWithoutPassword.model_construct
+        return [construct(**dict(zip(columns, row))) for row in rows]
 
     def get_user_by_id(self, uuid: str) -> UserSchema:
-        result = self._users[self._users["id"] == uuid]
-        return self._get_user_from_result(result)
+        return self._get_user_by_column("id", uuid)
 
     def get_user_by_username(self, username: str) -> UserSchema:
-        result = self._users[self._users["username"] == username]
-        return self._get_user_from_result(result)
+        return self._get_user_by_column("username", username)
 
     def get_user_by_email(self, email: str) -> UserSchema:
-        result = self._users[self._users["email"] == email]
-        return self._get_user_from_result(result)
-
-    def create_user_atomically(self, username, email, password) -> None:
-        # check existance
-        if len(self._users[self._users["username"] == username]) != 0:
-            raise ClientException("username is already used")
-        if len(self._users[self._users["email"] == email]) != 0:
-            raise ClientException("email is already used")
+        return self._get_user_by_column("email", email)
 
-        # ok. create
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        return self._get_users_by_column("id", uuids)
+
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        return self._get_users_by_column("username", usernames)
+
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return self._get_users_by_column("email", emails)
+
+    def create_user_atomically(self, username, email, hashed_password) -> None:
         obj = UserSchema(
             id=get_random_uuid(),
             username=username,
             email=email,
-            hashed_password=get_hashed_password(password),
+            hashed_password=hashed_password,
         )
-        newline_df = pd.DataFrame([obj.model_dump()])
-        self._users = pd.concat([self._users, newline_df], ignore_index=True)
+        with self._lock:
+            # check existance
+            if username in self._usernames:
+                raise ClientException("username is already used")
+            if email in self._emails:
+                raise ClientException("email is already used")
+
+            # ok. create
+            self._usernames.add(username)
+            self._emails.add(email)
+            for column, value in obj.model_dump().items():
+                self._tail[column].append(value)
+            self._page_index.add((obj.id, username, email))
+            if len(self._tail["id"]) >= self._chunk_size:
+                self._seal_tail()
+
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        reasons: list[Optional[str]] = []
+        with self._lock:
+            for user in users:
+                if user.username in self._usernames:
+                    reasons.append("username is already used")
+                elif user.email in self._emails:
+                    reasons.append("email is already used")
+                else:
+                    self._usernames.add(user.username)
+                    self._emails.add(user.email)
+                    for column in _COLUMNS:
+                        self._tail[column].append(getattr(user, column))
+                    self._page_index.add((user.id, user.username, user.email))
+                    reasons.append(None)
+            # one chunk for the whole batch
+            if len(self._tail["id"]) >= self._chunk_size:
+                self._seal_tail()
+        return reasons
 
-    def modify_user_atomically(self, name, email, password) -> None:
-        ...
+    def modify_user_atomically(self, username, email, hashed_password) -> None:
+        # username identifies the user. email and password are replaced
+        with self._lock:
+            usernames = self._tail["username"]
+            if username in usernames:
+                i = usernames.index(username)
+                uuid = self._tail["id"][i]
+                old_email = self._tail["email"][i]
+                self._check_email_change(old_email, email)
+                self._tail["email"][i] = email
+                self._tail["hashed_password"][i] = hashed_password
+            else:
+                for n, chunk in enumerate(self._chunks):
+                    mask = chunk["username"] == username
+                    if mask.any():
+                        break
+                else:
+                    raise ClientException("user not found")
+                uuid = chunk.loc[mask, "id"].iloc[0]
+                old_email = chunk.loc[mask, "email"].iloc[0]
+                self._check_email_change(old_email, email)
+                # chunks are shared with snapshots. copy on write
+                chunk = chunk.copy()
+                chunk.loc[mask, "email"] = email
+                chunk.loc[mask, "hashed_password"] = hashed_password
+                self._chunks[n] = chunk
+                # a running compaction read the old chunk. discard its result
+                self._generation += 1
+            self._emails.discard(old_email)
+            self._emails.add(email)
+            self._page_index.replace((uuid, username, email))
+
+    def _check_email_change(self, old_email: str, email: str):
+        if email != old_email and email in self._emails:
+            raise ClientException("email is already used")
+
+    def _project(self, schema, columns: list[str]) -> list:
+        chunks, tail = self._snapshot()
+        construct = schema.model_construct
+        objects = []
+        for chunk in chunks:
+            for values in zip(*[chunk[column].tolist() for column in columns]):
+                objects.append(construct(**dict(zip(columns, values))))
+        for values in zip(*[tail[column] for column in columns]):
+            objects.append(construct(**dict(zip(columns, values))))
+        return objects
+
+    def _snapshot(self) -> tuple[list[pd.DataFrame], dict[str, list[str]]]:
+        # chunks are immutable, so copying references is enough.
+        # only the tail (at most chunk_size rows) is copied.
+        with self._lock:
+            chunks = list(self._chunks)
+            tail = {column: list(values) for column, values in self._tail.items()}
+        return chunks, tail
+
+    def _seal_tail(self):
+        # caller must hold the lock
+        self._chunks.append(pd.DataFrame(self._tail, columns=_COLUMNS))
+        self._tail = {column: [] for column in _COLUMNS}
+        if len(self._chunks) <= self._max_chunks or self._compactor is not None:
+            return
+        sizes = [len(chunk) for chunk in self._chunks]
+        if _get_merge_start(sizes) < len(sizes) - 1:
+            self._compactor = Thread(target=self._compact, daemon=True)
+            self._compactor.start()
+
+    def _compact(self):
+        with self._lock:
+            sealed = list(self._chunks)
+            generation = self._generation
+        start = _get_merge_start([len(chunk) for chunk in sealed])
+        merged = pd.concat(sealed[start:], ignore_index=True)
+        with self._lock:
+            self._compactor = None
+            if generation != self._generation:
+                # a chunk was modified while merging. retry on the next seal
+                return
+            # only appends happen while merging, so the prefix is unchanged
+            self._chunks[start : len(sealed)] = [merged]
+        self._logger.debug(f"compacted {len(sealed) - start} user chunks")
+
+    def _get_user_by_column(self, column: str, value: str) -> UserSchema:
+        with self._lock:
+            values = self._tail[column]
+            if value in values:
+                i = values.index(value)
+                d = {c: self._tail[c][i] for c in _COLUMNS}
+                return UserSchema.model_construct(**d)
+            chunks = list(self._chunks)
+        for chunk in chunks:
+            result = chunk[chunk[column] == value]
+            if len(result) != 0:
+                return self._get_user_from_result(result)
+        raise ClientException("user not found")
+
+    def _get_users_by_column(self, column: str, values: list[str]) -> list[UserSchema]:
+        # one isin mask per chunk instead of one scan per value
+        chunks, tail = self._snapshot()
+        keys = set(values)
+        construct = UserSchema.model_construct
+        users = []
+        for chunk in chunks:
+            result = chunk[chunk[column].isin(keys)]
+            for row in zip(*[result[c].tolist() for c in _COLUMNS]):
+                users.append(construct(**dict(zip(_COLUMNS, row))))
+        i = _COLUMNS.index(column)
+        for row in zip(*[tail[c] for c in _COLUMNS]):
+            if row[i] in keys:
+                users.append(construct(**dict(zip(_COLUMNS, row))))
+        return users
 
     def _get_user_from_result(self, result: pd.DataFrame):
         if len(result) == 0:
             raise ClientException("user not found")
         d = result.to_dict(orient="records")[0]
-        return UserSchema.model_validate(d)
+        return UserSchema.model_construct(**d)
+
+
+def _get_merge_start(sizes: list[int]) -> int:
+    # the newest chunks are merged while the one before them is not larger
+    # than all of them together. each merge at least doubles the chunk a row
+    # is in, and every chunk ends up larger than all newer chunks together.
+    start = len(sizes) - 1
+    total = sizes[start]
+    while start > 0 and sizes[start - 1] <= total:
+        start -= 1
+        total += sizes[start]
+    return start
@@ -1,7 +1,8 @@
 from logging import Logger
+from typing import Optional
 
 from authapp.repositories.user.abstract import AbstractUserRepository
-from authapp.models.user import UserSchema
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
 
 
 class OracleUserRepository(AbstractUserRepository):
@@ -18,6 +19,13 @@ class OracleUserRepository(AbstractUserRepository):
     def get_users(self) -> list[UserSchema]:
         ...
 
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        ...
+
     def get_user_by_id(self, uuid: str) -> UserSchema:
         ...
 
@@ -27,18 +35,30 @@ class OracleUserRepository(AbstractUserRepository):
     def get_user_by_email(self, email: str) -> UserSchema:
         ...
 
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        ...
+
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        ...
+
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        ...
+
     def create_user_atomically(
         self,
         username: str,
         email: str,
-        password: str,
+        hashed_password: str,
     ) -> None:
         ...
 
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        ...
+
     def modify_user_atomically(
         self,
         username: str,
         email: str,
-        password: str,
+        hashed_password: str,
     ) -> None:
         ...
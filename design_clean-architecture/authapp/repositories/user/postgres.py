@@ -1,7 +1,96 @@
+import uuid
 from logging import Logger
+from typing import Optional
 
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+
+from authapp.exceptions import ClientException
+from authapp.repositories.pool import ConnectionPool
 from authapp.repositories.user.abstract import AbstractUserRepository
-from authapp.models.user import UserSchema
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+from authapp.util import get_random_uuid
+
+# unique constraints create the indexes on username and email
+_CREATE_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS users (
+        id uuid PRIMARY KEY,
+        username text NOT NULL UNIQUE,
+        email text NOT NULL UNIQUE,
+        hashed_password text NOT NULL
+    );
+"""
+
+# multi-row insert. rows violating a unique constraint are skipped
+_BULK_INSERT_QUERY = """
+    INSERT INTO users (id, username, email, hashed_password)
+    VALUES %s
+    ON CONFLICT DO NOTHING
+    RETURNING id;
+"""
+_BULK_CONFLICT_QUERY = """
+    SELECT username, email FROM users
+    WHERE username = ANY(%s) OR email = ANY(%s);
+"""
+
+# server-side prepared statements. prepared once per pooled connection.
+_PREPARE_QUERIES = [
+    """
+    PREPARE authapp_get_users AS
+        SELECT id, username, email, hashed_password FROM users;
+    """,
+    """
+    PREPARE authapp_get_users_without_password AS
+        SELECT id, username, email FROM users;
+    """,
+    """
+    PREPARE authapp_get_users_first_page (int) AS
+        SELECT id, username, email FROM users ORDER BY id LIMIT $1;
+    """,
+    """
+    PREPARE authapp_get_users_page (uuid, int) AS
+        SELECT id, username, email FROM users WHERE id > $1 ORDER BY id LIMIT $2;
+    """,
+    """
+    PREPARE authapp_get_user_by_id (uuid) AS
+        SELECT id, username, email, hashed_password FROM users WHERE id = $1;
+    """,
+    """
+    PREPARE authapp_get_user_by_username (text) AS
+        SELECT id, username, email, hashed_password FROM users WHERE username = $1;
+    """,
+    """
+    PREPARE authapp_get_user_by_email (text) AS
+        SELECT id, username, email, hashed_password FROM users WHERE email = $1;
+    """,
+    """
+    PREPARE authapp_get_users_by_ids (uuid[]) AS
+        SELECT id, username, email, hashed_password FROM users WHERE id = ANY($1);
+    """,
+    """
+    PREPARE authapp_get_users_by_usernames (text[]) AS
+        SELECT id, username, email, hashed_password FROM users
+        WHERE username = ANY($1);
+    """,
+    """
+    PREPARE authapp_get_users_by_emails (text[]) AS
+        SELECT id, username, email, hashed_password FROM users WHERE email = ANY($1);
+    """,
+    """
+    PREPARE authapp_create_user (uuid, text, text, text) AS
+        INSERT INTO users (id, username, email, hashed_password)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT DO NOTHING
+        RETURNING id;
+    """,
+    """
+    PREPARE authapp_modify_user (text, text, text) AS
+        UPDATE users SET email = $2, hashed_password = $3
+        WHERE username = $1
+        RETURNING id;
+    """,
+]
 
 
 class PostgresUserRepository(AbstractUserRepository):
@@ -12,33 +101,205 @@ class PostgresUserRepository(AbstractUserRepository):
         user: str,
         password: str,
         logger: Logger,
+        database: str = "authapp",
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_timeout: float = 5.0,
+        pool_recycle_uses: int = 1000,
     ):
-        raise NotImplementedError("This class is not implemented yet.")
+        self._logger = logger
+        self._connect_params = {
+            "host": host,
+            "port": port,
+            "user": user,
+            "password": password,
+            "database": database,
+        }
+        self._create_table()
+        self._pool = ConnectionPool(
+            self._connect,
+            logger,
+            min_size=pool_min_size,
+            max_size=pool_max_size,
+            timeout=pool_timeout,
+            recycle_uses=pool_recycle_uses,
+            health_check=_ping,
+        )
 
     def get_users(self) -> list[UserSchema]:
-        ...
+        rows = self._fetchall("EXECUTE authapp_get_users", ())
+        return [_to_user(row) for row in rows]
+
+    def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        rows = self._fetchall("EXECUTE authapp_get_users_without_password", ())
+        return [_to_user_without_password(row) for row in rows]
+
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        # index range scan on the primary key
+        if after is None:
+            query = "EXECUTE authapp_get_users_first_page (%s)"
+            rows = self._fetchall(query, (limit,))
+        elif _is_uuid(after):
+            query = "EXECUTE authapp_get_users_page (%s, %s)"
+            rows = self._fetchall(query, (after, limit))
+        else:
+            raise ClientException("invalid cursor")
+        return [_to_user_without_password(row) for row in rows]
 
     def get_user_by_id(self, uuid: str) -> UserSchema:
-        ...
+        if not _is_uuid(uuid):
+            raise ClientException("user not found")
+        return self._get_user("EXECUTE authapp_get_user_by_id (%s)", uuid)
 
     def get_user_by_username(self, username: str) -> UserSchema:
-        ...
+        return self._get_user("EXECUTE authapp_get_user_by_username (%s)", username)
 
     def get_user_by_email(self, email: str) -> UserSchema:
-        ...
+        return self._get_user("EXECUTE authapp_get_user_by_email (%s)", email)
+
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        # one query with an array parameter. index scan per element
+        uuids = [uuid for uuid in uuids if _is_uuid(uuid)]
+        return self._get_users("EXECUTE authapp_get_users_by_ids (%s::uuid[])", uuids)
+
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        query = "EXECUTE authapp_get_users_by_usernames (%s)"
+        return self._get_users(query, usernames)
+
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return self._get_users("EXECUTE authapp_get_users_by_emails (%s)", emails)
 
     def create_user_atomically(
         self,
         username: str,
         email: str,
-        password: str,
+        hashed_password: str,
     ) -> None:
-        ...
+        # single round trip. uniqueness is guaranteed by the constraints.
+        params = (get_random_uuid(), username, email, hashed_password)
+        rows = self._fetchall("EXECUTE authapp_create_user (%s, %s, %s, %s)", params)
+        if rows:
+            return
+
+        # conflict. find the reason (error path only)
+        rows = self._fetchall("EXECUTE authapp_get_user_by_username (%s)", (username,))
+        if rows:
+            raise ClientException("username is already used")
+        raise ClientException("email is already used")
+
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        if not users:
+            return []
+        rows = [(u.id, u.username, u.email, u.hashed_password) for u in users]
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                inserted = psycopg2.extras.execute_values(
+                    cursor, _BULK_INSERT_QUERY, rows, page_size=len(rows), fetch=True
+                )
+        created = {str(row[0]) for row in inserted}
+        if len(created) == len(users):
+            return [None] * len(users)
+
+        # find reasons for skipped rows (error path only)
+        skipped = [u for u in users if u.id not in created]
+        usernames = [u.username for u in skipped]
+        emails = [u.email for u in skipped]
+        existing = self._fetchall(_BULK_CONFLICT_QUERY, (usernames, emails))
+        used_usernames = {row[0] for row in existing}
+        reasons: list[Optional[str]] = []
+        for user in users:
+            if user.id in created:
+                reasons.append(None)
+            elif user.username in used_usernames:
+                reasons.append("username is already used")
+            else:
+                reasons.append("email is already used")
+        return reasons
 
     def modify_user_atomically(
         self,
         username: str,
         email: str,
-        password: str,
+        hashed_password: str,
     ) -> None:
-        ...
+        # username identifies the user. email and password are replaced
+        query = "EXECUTE authapp_modify_user (%s, %s, %s)"
+        try:
+            rows = self._fetchall(query, (username, email, hashed_password))
+        except psycopg2.errors.UniqueViolation:
+            raise ClientException("email is already used")
+        if not rows:
+            raise ClientException("user not found")
+
+    def get_pool_stats(self) -> dict[str, float]:
+        return self._pool.stats()
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for query in _PREPARE_QUERIES:
+                cursor.execute(query)
+        return conn
+
+    def _create_table(self):
+        conn = psycopg2.connect(**self._connect_params)
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(_CREATE_TABLE_QUERY)
+        finally:
+            conn.close()
+
+    def _get_user(self, query: str, key: str) -> UserSchema:
+        rows = self._fetchall(query, (key,))
+        if len(rows) == 0:
+            raise ClientException("user not found")
+        return _to_user(rows[0])
+
+    def _get_users(self, query: str, keys: list[str]) -> list[UserSchema]:
+        if not keys:
+            return []
+        return [_to_user(row) for row in self._fetchall(query, (list(set(keys)),))]
+
+    def _fetchall(self, query: str, params: tuple) -> list[tuple]:
+        with self._pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+
+def _ping(conn) -> bool:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        return cursor.fetchone() == (1,)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _to_user(row: tuple) -> UserSchema:
+    # columns are constrained by the table definition
+    return UserSchema.model_construct(
+        id=str(row[0]),
+        username=row[1],
+        email=row[2],
+        hashed_password=row[3],
+    )
+
+
+def _to_user_without_password(row: tuple) -> UserSchemaWithoutPassword:
+    return UserSchemaWithoutPassword.model_construct(
+        id=str(row[0]),
+        username=row[1],
+        email=row[2],
+    )
@@ -0,0 +1,144 @@
+from logging import Logger
+from typing import Optional
+
+from authapp.repositories.singleflight import AsyncSingleFlight, SingleFlight
+from authapp.repositories.user.abstract import (
+    AbstractAsyncUserRepository,
+    AbstractUserRepository,
+)
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+
+_ID = "id"
+_USERNAME = "username"
+_EMAIL = "email"
+
+
+class SingleFlightUserRepository(AbstractUserRepository):
+    # concurrent lookups of the same user share one backend call.
+    # e.g. a signin storm on a popular account. writes pass through.
+    def __init__(self, backend: AbstractUserRepository, logger: Logger):
+        self._backend = backend
+        self._logger = logger
+        self._flight = SingleFlight()
+
+    def get_users(self) -> list[UserSchema]:
+        return self._backend.get_users()
+
+    def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        return self._backend.get_users_without_password()
+
+    def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        return self._backend.get_users_page(limit, after)
+
+    def get_user_by_id(self, uuid: str) -> UserSchema:
+        return self._flight.do((_ID, uuid), self._backend.get_user_by_id, uuid)
+
+    def get_user_by_username(self, username: str) -> UserSchema:
+        load = self._backend.get_user_by_username
+        return self._flight.do((_USERNAME, username), load, username)
+
+    def get_user_by_email(self, email: str) -> UserSchema:
+        load = self._backend.get_user_by_email
+        return self._flight.do((_EMAIL, email), load, email)
+
+    def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        return self._backend.get_users_by_ids(uuids)
+
+    def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        return self._backend.get_users_by_usernames(usernames)
+
+    def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return self._backend.get_users_by_emails(emails)
+
+    def create_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        self._backend.create_user_atomically(username, email, hashed_password)
+
+    def bulk_create_users(self, users: list[UserSchema]) -> list[Optional[str]]:
+        return self._backend.bulk_create_users(users)
+
+    def modify_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        self._backend.modify_user_atomically(username, email, hashed_password)
+
+    def stats(self) -> dict[str, float]:
+        return self._flight.stats()
+
+
+class AsyncSingleFlightUserRepository(AbstractAsyncUserRepository):
+    # SingleFlightUserRepository for the async stack
+    def __init__(self, backend: AbstractAsyncUserRepository, logger: Logger):
+        self._backend = backend
+        self._logger = logger
+        self._flight = AsyncSingleFlight()
+
+    async def get_users(self) -> list[UserSchema]:
+        return await self._backend.get_users()
+
+    async def get_users_without_password(self) -> list[UserSchemaWithoutPassword]:
+        return await self._backend.get_users_without_password()
+
+    async def get_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        return await self._backend.get_users_page(limit, after)
+
+    async def get_user_by_id(self, uuid: str) -> UserSchema:
+        load = self._backend.get_user_by_id
+        return await self._flight.do((_ID, uuid), load, uuid)
+
+    async def get_user_by_username(self, username: str) -> UserSchema:
+        load = self._backend.get_user_by_username
+        return await self._flight.do((_USERNAME, username), load, username)
+
+    async def get_user_by_email(self, email: str) -> UserSchema:
+        load = self._backend.get_user_by_email
+        return await self._flight.do((_EMAIL, email), load, email)
+
+    async def get_users_by_ids(self, uuids: list[str]) -> list[UserSchema]:
+        return await self._backend.get_users_by_ids(uuids)
+
+    async def get_users_by_usernames(self, usernames: list[str]) -> list[UserSchema]:
+        return await self._backend.get_users_by_usernames(usernames)
+
+    async def get_users_by_emails(self, emails: list[str]) -> list[UserSchema]:
+        return await self._backend.get_users_by_emails(emails)
+
+    async def create_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        await self._backend.create_user_atomically(username, email, hashed_password)
+
+    async def bulk_create_users(
+        self,
+        users: list[UserSchema],
+    ) -> list[Optional[str]]:
+        return await self._backend.bulk_create_users(users)
+
+    async def modify_user_atomically(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+    ) -> None:
+        await self._backend.modify_user_atomically(username, email, hashed_password)
+
+    def stats(self) -> dict[str, float]:
+        return self._flight.stats()
@@ -0,0 +1,188 @@
+from logging import Logger
+from typing import AsyncIterable, AsyncIterator, Optional
+
+import authapp.util as util
+from authapp.exceptions import ClientException
+from authapp.hashing import PasswordHasher
+from authapp.repositories.user.abstract import AbstractAsyncUserRepository
+from authapp.repositories.session.abstract import AbstractAsyncSessionRepository
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+from authapp.models.httpbody import SigninBody, SignupBody, UserLookupBody
+from authapp.models.importer import ImportReport
+from authapp.services.auth import (
+    IMPORT_BATCH_SIZE,
+    SESSION_COOKIE_KEYS,
+    STREAM_PAGE_SIZE,
+    to_session_cookies,
+    to_unique_users,
+    validate_import_batch_size,
+    validate_lookup_body,
+    validate_page_limit,
+    validate_signup_body,
+)
+from authapp.services.importer import ImportProgress, PreparedBatch, aiter_batches
+
+
+class AsyncAuthService:
+    # same business logic as AuthService on top of async repositories
+    def __init__(
+        self,
+        user_repo: AbstractAsyncUserRepository,
+        session_repo: AbstractAsyncSessionRepository,
+        logger: Logger,
+        hasher: Optional[PasswordHasher] = None,
+    ):
+        self._user_repo = user_repo
+        self._session_repo = session_repo
+        self._logger = logger
+        self._hasher = hasher if hasher is not None else PasswordHasher(logger)
+
+    async def list_users(self) -> list[UserSchemaWithoutPassword]:
+        # debug purpose for sample app.
+        return await self._user_repo.get_users_without_password()
+
+    async def list_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        validate_page_limit(limit)
+        return await self._user_repo.get_users_page(limit, after)
+
+    async def iter_users_pages(
+        self,
+        after: Optional[str] = None,
+    ) -> AsyncIterator[list[UserSchemaWithoutPassword]]:
+        # walks the whole table one page at a time. memory use stays flat
+        while True:
+            users = await self._user_repo.get_users_page(STREAM_PAGE_SIZE, after)
+            if users:
+                yield users
+            if len(users) < STREAM_PAGE_SIZE:
+                return
+            after = users[-1].id
+
+    async def get_user(
+        self,
+        username: str,
+        cookies: dict,
+    ) -> UserSchemaWithoutPassword:
+        try:
+            session_uuid = cookies["session"]
+            session_user_uuid = await self._session_repo.get_session_user_uuid(
+                session_uuid
+            )
+            user: UserSchema = await self._user_repo.get_user_by_username(username)
+            if session_user_uuid != user.id:
+                raise ClientException
+        except Exception:
+            raise ClientException("authentication error")
+        return user.to_user_without_password()
+
+    async def lookup_users(
+        self,
+        lookup_obj: UserLookupBody,
+    ) -> list[UserSchemaWithoutPassword]:
+        # one repository call per key type instead of one per key
+        validate_lookup_body(lookup_obj)
+        repo = self._user_repo
+        users: list[UserSchema] = []
+        if lookup_obj.ids:
+            users.extend(await repo.get_users_by_ids(lookup_obj.ids))
+        if lookup_obj.usernames:
+            users.extend(await repo.get_users_by_usernames(lookup_obj.usernames))
+        if lookup_obj.emails:
+            users.extend(await repo.get_users_by_emails(lookup_obj.emails))
+        return to_unique_users(users)
+
+    async def signup(self, signup_obj: SignupBody) -> None:
+        username, email, raw_password = validate_signup_body(signup_obj)
+        hashed_password = await self._hasher.hash_async(raw_password)
+
+        # create user
+        await self._user_repo.create_user_atomically(username, email, hashed_password)
+
+    async def import_users(
+        self,
+        lines: AsyncIterable[str],
+        format: str,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> ImportReport:
+        # validate, hash and write one batch at a time. bad rows are reported
+        validate_import_batch_size(batch_size)
+        progress = ImportProgress(self._logger)
+        async for batch in aiter_batches(lines, format, batch_size):
+            prepared = PreparedBatch(batch)
+            hashed = await self._hasher.hash_many_async(prepared.raw_passwords)
+            users = prepared.to_users(hashed)
+            reasons = await self._user_repo.bulk_create_users(users) if users else []
+            progress.add(batch, prepared, users, reasons)
+        return progress.report()
+
+    async def signin(self, signin_obj: SigninBody) -> dict:
+        username_or_email = signin_obj.username_or_email.strip()
+        raw_password = signin_obj.password.strip()
+        user = await self._challenge_password(username_or_email, raw_password)
+
+        # create session
+        session_uuid = await self._session_repo.create_session(user.id)
+        return to_session_cookies(session_uuid, user)
+
+    async def signout(self, cookies: dict) -> list[str]:
+        if "session" in cookies:
+            session_uuid = cookies["session"]
+            await self._session_repo.delete_session(session_uuid)
+        return SESSION_COOKIE_KEYS
+
+    async def signout_everywhere(self, cookies: dict) -> list[str]:
+        try:
+            session_uuid = cookies["session"]
+            user_uuid = await self._session_repo.get_session_user_uuid(session_uuid)
+        except KeyError:
+            raise ClientException("authentication error")
+        await self._session_repo.delete_sessions_for_user(user_uuid)
+        return SESSION_COOKIE_KEYS
+
+    async def _challenge_password(
+        self, username_or_email: str, raw_password: str
+    ) -> UserSchema:
+        try:
+            # check user exist
+            try:
+                if util.is_valid_email(username_or_email):
+                    email = username_or_email
+                    user = await self._user_repo.get_user_by_email(email)
+                elif util.is_valid_username(username_or_email):
+                    username = username_or_email
+                    user = await self._user_repo.get_user_by_username(username)
+                else:
+                    raise ClientException()
+            except ClientException:
+                # costs as much as a wrong password. the response time does
+                # not tell whether the account exists
+                dummy_hash = self._hasher.get_dummy_hash()
+                await self._hasher.verify_async(raw_password, dummy_hash)
+                raise
+
+            # check password
+            hashed_password = user.hashed_password
+            if not await self._hasher.verify_async(raw_password, hashed_password):
+                raise ClientException()
+
+        except ClientException:
+            # hide exact fail reason for security
+            raise ClientException("authentication failed")
+
+        if self._hasher.needs_rehash(user.hashed_password):
+            await self._rehash_password(user, raw_password)
+        return user
+
+    async def _rehash_password(self, user: UserSchema, raw_password: str):
+        # hash parameters changed. upgrade while the raw password is known
+        try:
+            hashed_password = await self._hasher.hash_async(raw_password)
+            await self._user_repo.modify_user_atomically(
+                user.username, user.email, hashed_password
+            )
+        except Exception as e:
+            self._logger.warning(f"failed to rehash password: {e}")
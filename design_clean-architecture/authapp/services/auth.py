@@ -1,12 +1,22 @@
 from logging import Logger
+from typing import Iterable, Iterator, Optional
 
 import authapp.util as util
 from authapp.exceptions import ClientException
+from authapp.hashing import PasswordHasher
 from authapp.repositories.user.abstract import AbstractUserRepository
 from authapp.repositories.session.abstract import AbstractSessionRepository
 from authapp.models.user import UserSchema, UserSchemaWithoutPassword
-from authapp.models.httpbody import SigninBody, SignupBody
-from authapp.util import get_hashed_password
+from authapp.models.httpbody import SigninBody, SignupBody, UserLookupBody
+from authapp.models.importer import ImportReport
+from authapp.services.importer import ImportProgress, PreparedBatch, iter_batches
+
+SESSION_COOKIE_KEYS = ["session", "username", "user_id"]
+MAX_PAGE_SIZE = 1000
+STREAM_PAGE_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10000
+MAX_LOOKUP_SIZE = 1000
 
 
 class AuthService:
@@ -15,18 +25,37 @@ class AuthService:
         user_repo: AbstractUserRepository,
         session_repo: AbstractSessionRepository,
         logger: Logger,
+        hasher: Optional[PasswordHasher] = None,
     ):
         self._user_repo = user_repo
         self._session_repo = session_repo
         self._logger = logger
+        self._hasher = hasher if hasher is not None else PasswordHasher(logger)
 
     def list_users(self) -> list[UserSchemaWithoutPassword]:
         # debug purpose for sample app.
-        users: list[UserSchemaWithoutPassword] = []
-        for user in self._user_repo.get_users():
-            d = user.model_dump()
-            users.append(UserSchemaWithoutPassword.model_validate(d))
-        return users
+        return self._user_repo.get_users_without_password()
+
+    def list_users_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+    ) -> list[UserSchemaWithoutPassword]:
+        validate_page_limit(limit)
+        return self._user_repo.get_users_page(limit, after)
+
+    def iter_users_pages(
+        self,
+        after: Optional[str] = None,
+    ) -> Iterator[list[UserSchemaWithoutPassword]]:
+        # walks the whole table one page at a time. memory use stays flat
+        while True:
+            users = self._user_repo.get_users_page(STREAM_PAGE_SIZE, after)
+            if users:
+                yield users
+            if len(users) < STREAM_PAGE_SIZE:
+                return
+            after = users[-1].id
 
     def get_user(
         self,
@@ -41,25 +70,46 @@ class AuthService:
                 raise ClientException
         except Exception:
             raise ClientException("authentication error")
-        return UserSchemaWithoutPassword.model_validate(user.model_dump())
+        return user.to_user_without_password()
+
+    def lookup_users(
+        self,
+        lookup_obj: UserLookupBody,
+    ) -> list[UserSchemaWithoutPassword]:
+        # one repository call per key type instead of one per key
+        validate_lookup_body(lookup_obj)
+        users: list[UserSchema] = []
+        if lookup_obj.ids:
+            users.extend(self._user_repo.get_users_by_ids(lookup_obj.ids))
+        if lookup_obj.usernames:
+            users.extend(self._user_repo.get_users_by_usernames(lookup_obj.usernames))
+        if lookup_obj.emails:
+            users.extend(self._user_repo.get_users_by_emails(lookup_obj.emails))
+        return to_unique_users(users)
 
     def signup(self, signup_obj: SignupBody) -> None:
-        # validate
-        username = signup_obj.username.strip()
-        email = signup_obj.email.strip()
-        raw_password1 = signup_obj.password1.strip()
-        raw_password2 = signup_obj.password2.strip()
-        if not util.is_valid_username(username):
-            raise ClientException("username format invalid")
-        if not util.is_valid_email(email):
-            raise ClientException("email format invalid")
-        if raw_password1 != raw_password2:
-            raise ClientException("password mismatch")
-        if not util.is_password_strength_ok(raw_password1):
-            raise ClientException("password is too weak")
+        username, email, raw_password = validate_signup_body(signup_obj)
+        hashed_password = self._hasher.hash(raw_password)
 
         # create user
-        self._user_repo.create_user_atomically(username, email, raw_password1)
+        self._user_repo.create_user_atomically(username, email, hashed_password)
+
+    def import_users(
+        self,
+        lines: Iterable[str],
+        format: str,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> ImportReport:
+        # validate, hash and write one batch at a time. bad rows are reported
+        validate_import_batch_size(batch_size)
+        progress = ImportProgress(self._logger)
+        for batch in iter_batches(lines, format, batch_size):
+            prepared = PreparedBatch(batch)
+            hashed = self._hasher.hash_many(prepared.raw_passwords)
+            users = prepared.to_users(hashed)
+            reasons = self._user_repo.bulk_create_users(users) if users else []
+            progress.add(batch, prepared, users, reasons)
+        return progress.report()
 
     def signin(self, signin_obj: SigninBody) -> dict:
         username_or_email = signin_obj.username_or_email.strip()
@@ -68,41 +118,109 @@ class AuthService:
 
         # create session
         session_uuid = self._session_repo.create_session(user.id)
-        cookies = {
-            "session": session_uuid,
-            "username": user.username,
-            "user_id": user.id,
-        }
-        return cookies
+        return to_session_cookies(session_uuid, user)
 
     def signout(self, cookies: dict) -> list[str]:
         if "session" in cookies:
             session_uuid = cookies["session"]
             self._session_repo.delete_session(session_uuid)
-        del_cookie_keys = ["session", "username", "user_id"]
-        return del_cookie_keys
+        return SESSION_COOKIE_KEYS
+
+    def signout_everywhere(self, cookies: dict) -> list[str]:
+        # deletes every session of the user, on every device
+        try:
+            session_uuid = cookies["session"]
+            user_uuid = self._session_repo.get_session_user_uuid(session_uuid)
+        except KeyError:
+            raise ClientException("authentication error")
+        self._session_repo.delete_sessions_for_user(user_uuid)
+        return SESSION_COOKIE_KEYS
 
     def _challenge_password(
         self, username_or_email: str, raw_password: str
     ) -> UserSchema:
-        hashed_password = get_hashed_password(raw_password)
         try:
             # check user exist
-            if util.is_valid_email(username_or_email):
-                email = username_or_email
-                user = self._user_repo.get_user_by_email(email)
-            elif util.is_valid_username(username_or_email):
-                username = username_or_email
-                user = self._user_repo.get_user_by_username(username)
-            else:
-                raise ClientException()
+            try:
+                if util.is_valid_email(username_or_email):
+                    email = username_or_email
+                    user = self._user_repo.get_user_by_email(email)
+                elif util.is_valid_username(username_or_email):
+                    username = username_or_email
+                    user = self._user_repo.get_user_by_username(username)
+                else:
+                    raise ClientException()
+            except ClientException:
+                # costs as much as a wrong password. the response time does
+                # not tell whether the account exists
+                dummy_hash = self._hasher.get_dummy_hash()
+                self._hasher.verify(raw_password, dummy_hash)
+                raise
 
             # check password
-            if user.hashed_password != hashed_password:
+            if not self._hasher.verify(raw_password, user.hashed_password):
                 raise ClientException()
 
         except ClientException:
             # hide exact fail reason for security
             raise ClientException("authentication failed")
 
+        if self._hasher.needs_rehash(user.hashed_password):
+            self._rehash_password(user, raw_password)
         return user
+
+    def _rehash_password(self, user: UserSchema, raw_password: str):
+        # hash parameters changed. upgrade while the raw password is known
+        try:
+            hashed_password = self._hasher.hash(raw_password)
+            self._user_repo.modify_user_atomically(
+                user.username, user.email, hashed_password
+            )
+        except Exception as e:
+            self._logger.warning(f"failed to rehash password: {e}")
+
+
+def validate_signup_body(signup_obj: SignupBody) -> tuple[str, str, str]:
+    username = signup_obj.username.strip()
+    email = signup_obj.email.strip()
+    raw_password1 = signup_obj.password1.strip()
+    raw_password2 = signup_obj.password2.strip()
+    if not util.is_valid_username(username):
+        raise ClientException("username format invalid")
+    if not util.is_valid_email(email):
+        raise ClientException("email format invalid")
+    if raw_password1 != raw_password2:
+        raise ClientException("password mismatch")
+    if not util.is_password_strength_ok(raw_password1):
+        raise ClientException("password is too weak")
+    return username, email, raw_password1
+
+
+def validate_page_limit(limit: int) -> None:
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ClientException(f"limit must be within 1-{MAX_PAGE_SIZE}")
+
+
+def validate_import_batch_size(batch_size: int) -> None:
+    if not 1 <= batch_size <= MAX_IMPORT_BATCH_SIZE:
+        raise ClientException(f"batch size must be within 1-{MAX_IMPORT_BATCH_SIZE}")
+
+
+def validate_lookup_body(lookup_obj: UserLookupBody) -> None:
+    size = len(lookup_obj.ids) + len(lookup_obj.usernames) + len(lookup_obj.emails)
+    if size > MAX_LOOKUP_SIZE:
+        raise ClientException(f"up to {MAX_LOOKUP_SIZE} keys can be looked up")
+
+
+def to_unique_users(users: list[UserSchema]) -> list[UserSchemaWithoutPassword]:
+    # a user matched by several keys is returned once, ordered by id
+    unique = {user.id: user for user in users}
+    return [unique[id].to_user_without_password() for id in sorted(unique)]
+
+
+def to_session_cookies(session_uuid: str, user: UserSchema) -> dict:
+    return {
+        "session": session_uuid,
+        "username": user.username,
+        "user_id": user.id,
+    }
@@ -0,0 +1,237 @@
+import csv
+import json
+import time
+from logging import Logger
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+import authapp.const as const
+from authapp.exceptions import ClientException
+from authapp.hashing import is_supported_hash
+from authapp.models.importer import ImportRejection, ImportReport
+from authapp.models.user import UserSchema
+from authapp.util import get_random_uuid, is_password_strength_ok
+from authapp.validation import validate_emails, validate_usernames
+
+# (line number, row) pairs
+Batch = list[tuple[int, dict]]
+# what iter_lines yields for a line that is not valid UTF-8
+UNDECODABLE_LINE = "\ufffd"
+
+
+class LineParser:
+    # parses one CSV or NDJSON line at a time, so input can be streamed.
+    # CSV needs a header line. quoted fields must not span lines.
+    # a line that cannot be parsed is an empty row, which is rejected.
+    def __init__(self, format: str):
+        if format not in [const.IMPORT_FORMAT_CSV, const.IMPORT_FORMAT_NDJSON]:
+            raise ClientException("import format must be [csv|ndjson]")
+        self._format = format
+        self._header: Optional[list[str]] = None
+
+    def parse(self, line: str) -> Optional[dict]:
+        line = line.strip()
+        if not line:
+            return None
+        if line == UNDECODABLE_LINE:
+            if self._format == const.IMPORT_FORMAT_CSV and self._header is None:
+                raise ClientException("csv header must be UTF-8")
+            return {}
+        if self._format == const.IMPORT_FORMAT_NDJSON:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                return {}
+            return row if isinstance(row, dict) else {}
+        values = next(csv.reader([line]))
+        if self._header is None:
+            self._header = [value.strip() for value in values]
+            return None
+        return dict(zip(self._header, values))
+
+
+def iter_batches(
+    lines: Iterable[str],
+    format: str,
+    batch_size: int,
+) -> Iterator[Batch]:
+    parser = LineParser(format)
+    batch: Batch = []
+    for number, line in enumerate(lines, start=1):
+        row = parser.parse(line)
+        if row is None:
+            continue
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def aiter_batches(
+    lines: AsyncIterable[str],
+    format: str,
+    batch_size: int,
+) -> AsyncIterator[Batch]:
+    parser = LineParser(format)
+    batch: Batch = []
+    number = 0
+    async for line in lines:
+        number += 1
+        row = parser.parse(line)
+        if row is None:
+            continue
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    # splits a byte stream such as a request body into lines
+    rest = b""
+    for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield _decode(line)
+    if rest:
+        yield _decode(rest)
+
+
+async def aiter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    # splits a byte stream such as a request body into lines
+    rest = b""
+    async for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield _decode(line)
+    if rest:
+        yield _decode(rest)
+
+
+class PreparedBatch:
+    # validated rows of a batch waiting for password hashing.
+    # rows with "hashed_password" and without "password" are imported as is,
+    # if the hash is one PasswordHasher can verify.
+    def __init__(self, batch: Batch):
+        self.rejected: list[ImportRejection] = []
+        self.lines: list[int] = []
+        self.usernames: list[str] = []
+        self.emails: list[str] = []
+        self.raw_passwords: list[str] = []
+        self.hashed_passwords: list[Optional[str]] = []
+
+        usernames = [str(row.get("username", "")).strip() for _, row in batch]
+        emails = [str(row.get("email", "")).strip() for _, row in batch]
+        valid_usernames = validate_usernames(usernames)
+        valid_emails = validate_emails(emails)
+        seen_usernames: set[str] = set()
+        seen_emails: set[str] = set()
+        for i, (number, row) in enumerate(batch):
+            username = usernames[i]
+            raw_password = str(row.get("password", "")).strip()
+            hashed_password = str(row.get("hashed_password", "")).strip()
+            if not row:
+                reason = "line could not be parsed"
+            elif not valid_usernames[i]:
+                reason = "username format invalid"
+            elif not valid_emails[i]:
+                reason = "email format invalid"
+            elif not raw_password and not hashed_password:
+                reason = "password is missing"
+            elif raw_password and not is_password_strength_ok(raw_password):
+                reason = "password is too weak"
+            elif not raw_password and not is_supported_hash(hashed_password):
+                reason = "hashed password format invalid"
+            elif username in seen_usernames:
+                reason = "username is duplicated in the input"
+            elif emails[i] in seen_emails:
+                reason = "email is duplicated in the input"
+            else:
+                reason = None
+            if reason is not None:
+                self.rejected.append(
+                    ImportRejection(line=number, username=username, reason=reason)
+                )
+                continue
+            seen_usernames.add(username)
+            seen_emails.add(emails[i])
+            self.lines.append(number)
+            self.usernames.append(username)
+            self.emails.append(emails[i])
+            if raw_password:
+                self.raw_passwords.append(raw_password)
+                self.hashed_passwords.append(None)
+            else:
+                self.hashed_passwords.append(hashed_password)
+
+    def to_users(self, hashed: list[str]) -> list[UserSchema]:
+        # hashed: hashes of raw_passwords, in order
+        hashed_iter = iter(hashed)
+        return [
+            UserSchema(
+                id=get_random_uuid(),
+                username=username,
+                email=email,
+                hashed_password=(
+                    hashed_password
+                    if hashed_password is not None
+                    else next(hashed_iter)
+                ),
+            )
+            for username, email, hashed_password in zip(
+                self.usernames, self.emails, self.hashed_passwords
+            )
+        ]
+
+
+class ImportProgress:
+    def __init__(self, logger: Logger):
+        self._logger = logger
+        self._start = time.perf_counter()
+        self._total = 0
+        self._imported = 0
+        self._rejected: list[ImportRejection] = []
+
+    def add(
+        self,
+        batch: Batch,
+        prepared: PreparedBatch,
+        users: list[UserSchema],
+        reasons: list[Optional[str]],
+    ):
+        self._total += len(batch)
+        self._rejected.extend(prepared.rejected)
+        for line, user, reason in zip(prepared.lines, users, reasons):
+            if reason is None:
+                self._imported += 1
+            else:
+                self._rejected.append(
+                    ImportRejection(line=line, username=user.username, reason=reason)
+                )
+        elapsed = time.perf_counter() - self._start
+        self._logger.info(
+            f"imported {self._imported}/{self._total} users, "
+            f"rejected {len(self._rejected)}, "
+            f"{self._total / elapsed:.0f} rows/s"
+        )
+
+    def report(self) -> ImportReport:
+        return ImportReport(
+            total=self._total,
+            imported=self._imported,
+            rejected=self._rejected,
+            elapsed_seconds=time.perf_counter() - self._start,
+        )
+
+
+def _decode(line: bytes) -> str:
+    try:
+        return line.decode()
+    except UnicodeDecodeError:
+        # the line is rejected, not the whole import
+        return UNDECODABLE_LINE
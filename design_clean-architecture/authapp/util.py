@@ -1,6 +1,7 @@
-import re
 import uuid
 
+from authapp.validation import is_valid_email, is_valid_username  # noqa: F401
+
 
 def get_random_uuid() -> str:
     random_uuid = uuid.uuid4()
@@ -14,14 +15,5 @@ def is_password_strength_ok(raw_password: str) -> bool:
 def get_hashed_password(raw_password: str) -> str:
     # this is just an easy-to-understand example
     # please use bcrypt and salt etc for real world.
+    # authapp.hashing accepts this format and rehashes it on signin.
     return "hashed_" + raw_password
-
-
-def is_valid_username(name):
-    regex = r"^[a-zA-Z0-9]{3,8}$"
-    return bool(re.match(regex, name))
-
-
-def is_valid_email(email):
-    email_regex = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
-    return bool(re.match(email_regex, email))
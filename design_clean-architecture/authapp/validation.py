@@ -0,0 +1,35 @@
+import re
+from typing import Iterable
+
+_USERNAME_MIN_LENGTH = 3
+_USERNAME_MAX_LENGTH = 8
+# RFC 5321 path limit. also bounds the regex work per call
+_EMAIL_MAX_LENGTH = 254
+
+# "@" and "." split the address into classes that do not overlap,
+# so matching is linear and cannot backtrack catastrophically.
+_EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+
+def is_valid_username(name: str) -> bool:
+    # same as ^[a-zA-Z0-9]{3,8}$ without the regex engine
+    if not _USERNAME_MIN_LENGTH <= len(name) <= _USERNAME_MAX_LENGTH:
+        return False
+    return name.isascii() and name.isalnum()
+
+
+def is_valid_email(email: str) -> bool:
+    # cheap checks first. most invalid input never reaches the regex
+    if not 5 <= len(email) <= _EMAIL_MAX_LENGTH:
+        return False
+    if email.count("@") != 1 or not email.isascii():
+        return False
+    return _EMAIL_REGEX.fullmatch(email) is not None
+
+
+def validate_usernames(names: Iterable[str]) -> list[bool]:
+    return [is_valid_username(name) for name in names]
+
+
+def validate_emails(emails: Iterable[str]) -> list[bool]:
+    return [is_valid_email(email) for email in emails]
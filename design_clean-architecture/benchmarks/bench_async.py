@@ -0,0 +1,66 @@
+# Compares sync and async service modes in-process against the mock backends.
+#
+# usage: python -m benchmarks.bench_async [--concurrency 500] [--requests 20]
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+import authapp.const as const
+from authapp.__main__ import build
+from authapp.parameter import Parameter
+
+
+def create_app(service_mode: str) -> FastAPI:
+    params = Parameter()
+    params.service_mode = service_mode
+    app = FastAPI()
+    build(app, params)
+    return app
+
+
+async def virtual_user(app: FastAPI, requests: int, latencies: list[float]):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        body = {"username_or_email": "yuichi", "password": "p@ssw0rd"}
+        response = await c.post("/api/auth/v1/signin", json=body)
+        response.raise_for_status()
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await c.get("/api/auth/v1/users/yuichi")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+
+async def run(service_mode: str, concurrency: int, requests: int):
+    app = create_app(service_mode)
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[virtual_user(app, requests, latencies) for _ in range(concurrency)]
+    )
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{service_mode:>6} {concurrency:>6} {len(latencies) / elapsed:>10,.0f} "
+        f"{quantiles[49] * 1000:>9.2f} {quantiles[98] * 1000:>9.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--requests", type=int, default=20)
+    args, _ = parser.parse_known_args()
+
+    print(f"{'mode':>6} {'conc':>6} {'req/s':>10} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for concurrency in args.concurrency:
+        for mode in [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC]:
+            asyncio.run(run(mode, concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
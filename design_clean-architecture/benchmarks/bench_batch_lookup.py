@@ -0,0 +1,69 @@
+# Resolving 1k ids: get_user_by_id in a loop vs one get_users_by_ids call.
+# Every repository call sleeps rtt_ms to stand in for a database round trip.
+#
+# usage: python -m benchmarks.bench_batch_lookup [--users 100000] [--rtt_ms 0.5]
+import argparse
+import logging
+import random
+import time
+
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.repositories.user.mock import MockUserRepository
+
+
+class RoundTrips:
+    # counts calls and adds a fixed latency to each
+    def __init__(self, repo: AbstractUserRepository, rtt: float):
+        self._repo = repo
+        self._rtt = rtt
+        self.count = 0
+
+    def __getattr__(self, name):
+        method = getattr(self._repo, name)
+
+        def call(*args):
+            self.count += 1
+            time.sleep(self._rtt)
+            return method(*args)
+
+        return call
+
+
+def bench_loop(repo: RoundTrips, ids: list[str]) -> float:
+    start = time.perf_counter()
+    for uuid in ids:
+        repo.get_user_by_id(uuid)
+    return time.perf_counter() - start
+
+
+def bench_batch(repo: RoundTrips, ids: list[str]) -> float:
+    start = time.perf_counter()
+    assert len(repo.get_users_by_ids(ids)) == len(ids)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=1_000)
+    parser.add_argument("--rtt_ms", type=float, default=0.5)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    for repo in [MockUserRepository(logger), InMemoryUserRepository(logger)]:
+        for i in range(args.users):
+            repo.create_user_atomically(f"u{i:06d}", f"u{i}@example.com", "p@ssw0rd")
+        ids = random.sample([user.id for user in repo.get_users()], args.lookups)
+
+        for name, bench in [("loop", bench_loop), ("batch", bench_batch)]:
+            counted = RoundTrips(repo, args.rtt_ms / 1000)
+            elapsed = bench(counted, ids)
+            print(
+                f"{type(repo).__name__:<24}{name:<6}"
+                f"{counted.count:>6} round trips {elapsed * 1000:>10.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Signins/sec per core for each password hash cost setting.
+# A signin is dominated by one verify() of the stored hash.
+# inline/s is one core. pool/worker is per worker process (one core each
+# when workers <= cores).
+#
+# usage: python -m benchmarks.bench_hashing [--seconds 2] [--workers 4]
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import authapp.const as const
+from authapp.hashing import PasswordHasher
+
+_SETTINGS = [
+    (const.PASSWORD_HASH_ALGORITHM_SCRYPT, 12),
+    (const.PASSWORD_HASH_ALGORITHM_SCRYPT, 14),
+    (const.PASSWORD_HASH_ALGORITHM_SCRYPT, 16),
+    (const.PASSWORD_HASH_ALGORITHM_PBKDF2, 100_000),
+    (const.PASSWORD_HASH_ALGORITHM_PBKDF2, 600_000),
+]
+
+
+def measure(hasher: PasswordHasher, hashed: str, seconds: float, callers: int) -> float:
+    deadline = time.perf_counter() + seconds
+
+    def loop() -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            hasher.verify("p@ssw0rd", hashed)
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(callers) as executor:
+        total = sum(executor.map(lambda _: loop(), range(callers)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    print(
+        f"{'algorithm':>14} {'cost':>8} {'inline/s':>10} "
+        f"{'pool/s':>10} {'pool/worker':>11}"
+    )
+    for algorithm, cost in _SETTINGS:
+        inline = PasswordHasher(logger, algorithm=algorithm, cost=cost)
+        hashed = inline.hash("p@ssw0rd")
+        inline_rate = measure(inline, hashed, args.seconds, 1)
+
+        pool = PasswordHasher(
+            logger,
+            algorithm=algorithm,
+            cost=cost,
+            workers=args.workers,
+            queue_size=args.workers * 2,
+        )
+        pool.verify("p@ssw0rd", hashed)  # warm up the workers
+        pool_rate = measure(pool, hashed, args.seconds, args.workers)
+        pool.close()
+        print(
+            f"{algorithm:>14} {cost:>8} {inline_rate:>10.1f} "
+            f"{pool_rate:>10.1f} {pool_rate / args.workers:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Row-by-row signup vs bulk import_users on the same input.
+# Hashing uses pbkdf2 with a low cost so the write path is visible.
+#
+# usage: python -m benchmarks.bench_import [--users 20000] [--batch_size 1000]
+import argparse
+import logging
+import time
+
+import authapp.const as const
+from authapp.hashing import PasswordHasher
+from authapp.models.httpbody import SignupBody
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.user.mock import MockUserRepository
+from authapp.services.auth import AuthService
+
+
+def make_service(workers: int) -> AuthService:
+    logger = logging.getLogger()
+    hasher = PasswordHasher(
+        logger,
+        algorithm=const.PASSWORD_HASH_ALGORITHM_PBKDF2,
+        cost=1_000,
+        workers=workers,
+    )
+    return AuthService(
+        MockUserRepository(logger), MockSessionRepository(logger), logger, hasher
+    )
+
+
+def make_lines(users: int) -> list[str]:
+    lines = ["username,email,password"]
+    lines.extend(f"u{i:06d},u{i:06d}@example.com,p@ssw0rd" for i in range(users))
+    return lines
+
+
+def bench_signup(users: int) -> float:
+    service = make_service(workers=0)
+    start = time.perf_counter()
+    for i in range(users):
+        service.signup(
+            SignupBody(
+                username=f"u{i:06d}",
+                email=f"u{i:06d}@example.com",
+                password1="p@ssw0rd",
+                password2="p@ssw0rd",
+            )
+        )
+    return time.perf_counter() - start
+
+
+def bench_import(users: int, batch_size: int, workers: int) -> float:
+    service = make_service(workers)
+    lines = make_lines(users)
+    start = time.perf_counter()
+    report = service.import_users(lines, const.IMPORT_FORMAT_CSV, batch_size)
+    elapsed = time.perf_counter() - start
+    assert report.imported == users, report.rejected[:3]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--batch_size", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=2)
+    args, _ = parser.parse_known_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = [
+        ("signup per row", bench_signup(args.users)),
+        ("import, inline hash", bench_import(args.users, args.batch_size, 0)),
+        (
+            f"import, {args.workers} workers",
+            bench_import(args.users, args.batch_size, args.workers),
+        ),
+    ]
+    for name, elapsed in results:
+        print(f"{name:<24}{elapsed:>8.2f}s {args.users / elapsed:>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
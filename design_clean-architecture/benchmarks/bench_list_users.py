@@ -0,0 +1,50 @@
+# AuthService.list_users() before and after the password-free projection.
+#
+# usage: python -m benchmarks.bench_list_users [--users 100000]
+import argparse
+import logging
+import time
+
+from authapp.models.user import UserSchema, UserSchemaWithoutPassword
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.repositories.user.mock import MockUserRepository
+from authapp.services.auth import AuthService
+
+
+def list_users_before(service: AuthService) -> list[UserSchemaWithoutPassword]:
+    # previous implementation: validate every row in the repository,
+    # then dump and validate again in the service
+    users = []
+    for user in service._user_repo.get_users():
+        user = UserSchema.model_validate(user.model_dump())
+        d = user.model_dump()
+        users.append(UserSchemaWithoutPassword.model_validate(d))
+    return users
+
+
+def timeit(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    print(f"{'repository':>10} {'before(s)':>10} {'after(s)':>10}")
+    for repo_class in [MockUserRepository, InMemoryUserRepository]:
+        repo = repo_class(logger)
+        for i in range(args.users):
+            repo.create_user_atomically(f"u{i}", f"u{i}@example.com", "p@ssw0rd")
+        service = AuthService(repo, MockSessionRepository(logger), logger)
+        before = timeit(lambda: list_users_before(service))
+        after = timeit(service.list_users)
+        print(f"{repo_class.__name__[:-14]:>10} {before:>10.3f} {after:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
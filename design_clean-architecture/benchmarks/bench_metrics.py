@@ -0,0 +1,75 @@
+# Cost of the latency instrumentation (--metrics true).
+#   span:    one timed repository call vs a direct call, in ns per call
+#   request: authenticated GET /api/auth/v1/users/{username} through the whole
+#            stack (middleware, handler, service and repository spans)
+#
+# usage: python -m benchmarks.bench_metrics [--calls 200000] [--requests 3000]
+import argparse
+import logging
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import authapp.const as const
+from authapp.__main__ import build
+from authapp.metrics import MetricsRegistry, instrument
+from authapp.parameter import Parameter
+from authapp.repositories.session.sharded import ShardedSessionRepository
+
+
+def run_span(calls: int, metrics: bool) -> float:
+    repo = ShardedSessionRepository(logging.getLogger())
+    if metrics:
+        instrument(repo, "session_repository", MetricsRegistry())
+    session_uuid = repo.create_session("user")
+    get = repo.get_session_user_uuid
+    start = time.perf_counter()
+    for _ in range(calls):
+        get(session_uuid)
+    return (time.perf_counter() - start) / calls
+
+
+def run_requests(requests: int, mode: str, metrics: bool) -> float:
+    params = Parameter()
+    params.service_mode = mode
+    params.metrics = "true" if metrics else "false"
+    params.password_hash_workers = "0"
+    app = FastAPI()
+    build(app, params)
+    client = TestClient(app)
+    body = {"username_or_email": "yuichi", "password": "p@ssw0rd"}
+    assert client.post("/api/auth/v1/signin", json=body).status_code == 200
+    for _ in range(100):
+        client.get("/api/auth/v1/users/yuichi")
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/api/auth/v1/users/yuichi")
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=3_000)
+    args, _ = parser.parse_known_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    off = run_span(args.calls, metrics=False)
+    on = run_span(args.calls, metrics=True)
+    print(
+        f"{'span':<16}{off * 1e9:>10,.0f} ns off {on * 1e9:>10,.0f} ns on "
+        f"{(on - off) * 1e9:>+8,.0f} ns per span"
+    )
+    for mode in [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC]:
+        off = run_requests(args.requests, mode, metrics=False)
+        on = run_requests(args.requests, mode, metrics=True)
+        name = f"request {mode}"
+        print(
+            f"{name:<16}{off * 1e6:>10,.0f} us off {on * 1e6:>10,.0f} us on "
+            f"{(on - off) / off:>+8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Latency of AuthService.get_user with and without the session near cache.
+# The session store round trip is simulated with a sleep.
+#
+# usage: python -m benchmarks.bench_near_cache [--rtt_ms 0.5] [--calls 5000]
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from authapp.models.httpbody import SigninBody
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.session.near_cache import NearCacheSessionRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.services.auth import AuthService
+
+
+class RemoteSessionRepository(AbstractSessionRepository):
+    # mock repository with a simulated network round trip per call
+    def __init__(self, logger: logging.Logger, rtt: float):
+        self._repo = MockSessionRepository(logger)
+        self._rtt = rtt
+
+    def exist_session(self, session_uuid: str) -> bool:
+        time.sleep(self._rtt)
+        return self._repo.exist_session(session_uuid)
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        time.sleep(self._rtt)
+        return self._repo.get_session_user_uuid(session_uuid)
+
+    def create_session(self, user_uuid: str) -> str:
+        time.sleep(self._rtt)
+        return self._repo.create_session(user_uuid)
+
+    def delete_session(self, session_uuid: str) -> bool:
+        time.sleep(self._rtt)
+        return self._repo.delete_session(session_uuid)
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        time.sleep(self._rtt)
+        return self._repo.delete_sessions_for_user(user_uuid)
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        time.sleep(self._rtt)
+        return self._repo.count_sessions_for_user(user_uuid)
+
+
+def run(name: str, session_repo: AbstractSessionRepository, calls: int, sessions: int):
+    logger = logging.getLogger()
+    service = AuthService(InMemoryUserRepository(logger), session_repo, logger)
+    body = SigninBody(username_or_email="yuichi", password="p@ssw0rd")
+    cookies = [service.signin(body) for _ in range(sessions)]
+
+    latencies = []
+    for _ in range(calls):
+        c = random.choice(cookies)
+        start = time.perf_counter()
+        service.get_user("yuichi", c)
+        latencies.append(time.perf_counter() - start)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:>12} {quantiles[49] * 1e6:>10.1f} {quantiles[98] * 1e6:>10.1f}",
+        end="",
+    )
+    if isinstance(session_repo, NearCacheSessionRepository):
+        stats = session_repo.stats()
+        print(f"   hits={stats['hits']} misses={stats['misses']}", end="")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt_ms", type=float, default=0.5)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=100)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    rtt = args.rtt_ms / 1000
+    print(f"{'':>12} {'p50(us)':>10} {'p99(us)':>10}")
+    run("remote", RemoteSessionRepository(logger, rtt), args.calls, args.sessions)
+    near = NearCacheSessionRepository(RemoteSessionRepository(logger, rtt), logger)
+    run("near+remote", near, args.calls, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Memory per session: TTLCache of str uuids (MockSessionRepository layout)
+# vs CompactSessionRepository.
+# TTLCache memory is measured with tracemalloc. The compact store allocates
+# all its memory up front, so its column sizes are reported directly.
+#
+# usage: python -m benchmarks.bench_session_memory [--sizes 1000000,10000000]
+import argparse
+import logging
+import time
+import tracemalloc
+import uuid
+
+from cachetools import TTLCache
+
+from authapp.repositories.session.compact import CompactSessionRepository
+
+
+def fill_ttl_cache(size: int) -> TTLCache:
+    sessions = TTLCache(maxsize=size, ttl=3600)
+    user_uuid = str(uuid.uuid4())
+    for _ in range(size):
+        sessions[str(uuid.uuid4())] = user_uuid[:-4] + f"{len(sessions) % 9999:04d}"
+    return sessions
+
+
+def fill_compact(size: int) -> CompactSessionRepository:
+    repo = CompactSessionRepository(logging.getLogger(), maxsize=size)
+    users = [str(uuid.uuid4()) for _ in range(1000)]
+    for i in range(size):
+        repo.create_session(users[i % 1000])
+    return repo
+
+
+def measure_ttl_cache(size: int) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = fill_ttl_cache(size)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return current / size, elapsed
+
+
+def measure_compact(size: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    store = fill_compact(size)
+    elapsed = time.perf_counter() - start
+    return store.stats()["bytes"] / size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000000,10000000")
+    # TTLCache needs several GB at 10M sessions
+    parser.add_argument("--baseline_max", type=int, default=1_000_000)
+    args, _ = parser.parse_known_args()
+
+    for size in [int(size) for size in args.sizes.split(",")]:
+        stores = [("compact", measure_compact)]
+        if size <= args.baseline_max:
+            stores.insert(0, ("ttl cache (mock)", measure_ttl_cache))
+        for name, measure in stores:
+            per_session, elapsed = measure(size)
+            print(
+                f"{size:>12,} sessions  {name:<18}{per_session:>8.1f} bytes/session "
+                f"{per_session * size / 2**20:>10,.0f} MiB  fill {elapsed:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
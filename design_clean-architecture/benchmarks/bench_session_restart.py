@@ -0,0 +1,59 @@
+# Restart time of PersistentSessionRepository: snapshot load through mmap
+# plus replay of the changes logged after the snapshot.
+#
+# usage: python -m benchmarks.bench_session_restart [--sessions 1000000]
+import argparse
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+from authapp.repositories.session.persistent import PersistentSessionRepository
+
+
+def open_repo(path: str, size: int) -> PersistentSessionRepository:
+    return PersistentSessionRepository(
+        logging.getLogger(), path, maxsize=size, snapshot_interval=0
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--logged", type=int, default=100_000)
+    args, _ = parser.parse_known_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions")
+        repo = open_repo(path, args.sessions)
+        users = [str(uuid.uuid4()) for _ in range(1000)]
+        for i in range(args.sessions - args.logged):
+            repo.create_session(users[i % 1000])
+
+        start = time.perf_counter()
+        repo.snapshot()
+        snapshot_seconds = time.perf_counter() - start
+        for i in range(args.logged):
+            repo.create_session(users[i % 1000])
+        snapshot_bytes = os.path.getsize(path + ".snapshot")
+        log_bytes = os.path.getsize(path + ".log.1")
+        # simulated crash. no final snapshot
+        del repo
+
+        start = time.perf_counter()
+        repo = open_repo(path, args.sessions)
+        restart_seconds = time.perf_counter() - start
+        assert repo.stats()["size"] == args.sessions
+
+    print(f"sessions          {args.sessions:>12,}")
+    print(f"snapshot          {snapshot_bytes / 2**20:>12,.1f} MiB")
+    print(
+        f"log after it      {log_bytes / 2**20:>12,.1f} MiB ({args.logged:,} records)"
+    )
+    print(f"snapshot write    {snapshot_seconds:>12.2f}s")
+    print(f"restart           {restart_seconds:>12.2f}s")
+
+
+if __name__ == "__main__":
+    main()
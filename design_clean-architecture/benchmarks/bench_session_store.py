@@ -0,0 +1,91 @@
+# Throughput of session stores under a create/get/delete mix from many threads.
+# Compares MockSessionRepository behind one global lock with
+# ShardedSessionRepository at several shard counts.
+#
+# usage: python -m benchmarks.bench_session_store [--threads 32] [--ops 20000]
+import argparse
+import logging
+import random
+import time
+from threading import Lock, Thread
+
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.session.sharded import ShardedSessionRepository
+
+
+class GlobalLockSessionRepository(AbstractSessionRepository):
+    # what making the mock thread-safe with one lock would look like
+    def __init__(self, backend: AbstractSessionRepository):
+        self._backend = backend
+        self._lock = Lock()
+
+    def exist_session(self, session_uuid: str) -> bool:
+        with self._lock:
+            return self._backend.exist_session(session_uuid)
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        with self._lock:
+            return self._backend.get_session_user_uuid(session_uuid)
+
+    def create_session(self, user_uuid: str) -> str:
+        with self._lock:
+            return self._backend.create_session(user_uuid)
+
+    def delete_session(self, session_uuid: str) -> bool:
+        with self._lock:
+            return self._backend.delete_session(session_uuid)
+
+    def delete_sessions_for_user(self, user_uuid: str) -> list[str]:
+        with self._lock:
+            return self._backend.delete_sessions_for_user(user_uuid)
+
+    def count_sessions_for_user(self, user_uuid: str) -> int:
+        with self._lock:
+            return self._backend.count_sessions_for_user(user_uuid)
+
+
+def worker(repo: AbstractSessionRepository, ops: int, seed: int):
+    # 10% create, 85% get, 5% delete
+    rng = random.Random(seed)
+    sessions = [repo.create_session("user") for _ in range(16)]
+    for _ in range(ops):
+        r = rng.random()
+        if r < 0.10:
+            sessions.append(repo.create_session("user"))
+        elif r < 0.95:
+            try:
+                repo.get_session_user_uuid(rng.choice(sessions))
+            except KeyError:
+                pass
+        elif len(sessions) > 1:
+            repo.delete_session(sessions.pop(rng.randrange(len(sessions))))
+
+
+def run(repo: AbstractSessionRepository, threads: int, ops: int) -> float:
+    workers = [Thread(target=worker, args=(repo, ops, n)) for n in range(threads)]
+    start = time.perf_counter()
+    [thread.start() for thread in workers]
+    [thread.join() for thread in workers]
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=20_000)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    mock = GlobalLockSessionRepository(MockSessionRepository(logger))
+    repos: list[tuple[str, AbstractSessionRepository]] = [("mock + global lock", mock)]
+    for shards in [1, 4, 16, 64]:
+        sharded = ShardedSessionRepository(logger, shards=shards)
+        repos.append((f"sharded x{shards}", sharded))
+    for name, repo in repos:
+        ops_per_second = run(repo, args.threads, args.ops)
+        print(f"{name:<20}{ops_per_second:>12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
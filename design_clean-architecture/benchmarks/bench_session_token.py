@@ -0,0 +1,58 @@
+# Cost of resolving a session on every request:
+# signed token verification vs in-process and redis store lookups.
+# Redis is fakeredis unless --redis_host is given, so its numbers exclude
+# the network round trip.
+#
+# usage: python -m benchmarks.bench_session_token [--lookups 100000]
+import argparse
+import logging
+import time
+
+import fakeredis
+import redis
+
+from authapp.repositories.session.abstract import AbstractSessionRepository
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.session.redis import RedisSessionRepository
+from authapp.repositories.session.sharded import ShardedSessionRepository
+from authapp.repositories.session.token import SignedTokenSessionRepository
+
+
+def bench(repo: AbstractSessionRepository, sessions: int, lookups: int) -> float:
+    session_uuids = [repo.create_session(f"user{i}") for i in range(sessions)]
+    # a few revoked sessions, as after real signouts
+    for session_uuid in session_uuids[: sessions // 10]:
+        repo.delete_session(session_uuid)
+    live = session_uuids[sessions // 10 :]
+    start = time.perf_counter()
+    for i in range(lookups):
+        repo.get_session_user_uuid(live[i % len(live)])
+    return (time.perf_counter() - start) / lookups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--redis_host")
+    parser.add_argument("--redis_port", type=int, default=6379)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    if args.redis_host:
+        client = redis.Redis(args.redis_host, args.redis_port, decode_responses=True)
+    else:
+        client = fakeredis.FakeRedis(decode_responses=True)
+    repos = [
+        ("signed token", SignedTokenSessionRepository(logger, keys=[("k", b"s")])),
+        ("mock", MockSessionRepository(logger)),
+        ("sharded", ShardedSessionRepository(logger)),
+        ("redis", RedisSessionRepository("", 0, "", "", logger, client=client)),
+    ]
+    for name, repo in repos:
+        seconds = bench(repo, args.sessions, args.lookups)
+        print(f"{name:<16}{seconds * 1e6:>10.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Backend reads during a signin storm on a few popular accounts,
+# with and without SingleFlightUserRepository.
+# Every backend lookup sleeps rtt_ms to stand in for a database round trip.
+#
+# usage: python -m benchmarks.bench_single_flight [--threads 32] [--requests 5000]
+import argparse
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from authapp.models.user import UserSchema
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.repositories.user.singleflight import SingleFlightUserRepository
+
+
+class SlowUserRepository(InMemoryUserRepository):
+    def __init__(self, logger: logging.Logger, rtt: float):
+        super().__init__(logger)
+        self._rtt = rtt
+        self.calls = 0
+
+    def get_user_by_username(self, username: str) -> UserSchema:
+        self.calls += 1
+        time.sleep(self._rtt)
+        return super().get_user_by_username(username)
+
+
+def replay(repo: AbstractUserRepository, workload: list[str], threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(repo.get_user_by_username, workload))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--hot_users", type=int, default=3)
+    parser.add_argument("--rtt_ms", type=float, default=2.0)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    names = [f"hot{i}" for i in range(args.hot_users)]
+    workload = random.choices(names, k=args.requests)
+    for single_flight in [False, True]:
+        backend = SlowUserRepository(logger, args.rtt_ms / 1000)
+        for name in names:
+            backend.create_user_atomically(name, f"{name}@example.com", "p@ssw0rd")
+        repo: AbstractUserRepository = backend
+        if single_flight:
+            repo = SingleFlightUserRepository(backend, logger)
+        elapsed = replay(repo, workload, args.threads)
+        name = "single flight" if single_flight else "direct"
+        print(
+            f"{name:<16}{backend.calls:>8,} backend calls "
+            f"{args.requests / elapsed:>10,.0f} lookups/s"
+        )
+        if single_flight:
+            print(f"{'':<16}{repo.stats()['coalesced']:>8,} coalesced")
+
+
+if __name__ == "__main__":
+    main()
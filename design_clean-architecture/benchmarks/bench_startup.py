@@ -0,0 +1,111 @@
+# Cold start of the app per configuration: a fresh interpreter imports
+# authapp.__main__, which builds the app.
+#   total:  interpreter start to exit, as seen by the parent (median of runs)
+#   import: time inside the child to import and build (median of runs)
+#   rss:    peak resident memory of the child, i.e. the baseline per worker
+# "all backends" imports every backend module first, like before the
+# backends were loaded lazily.
+# the slowest modules of the default configuration are listed by
+# "python -X importtime" self time.
+#
+# usage: python -m benchmarks.bench_startup [--runs 5] [--top 15]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_CHILD = """
+import importlib, resource, sys, time
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+import authapp.__main__
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+_ALL_BACKENDS = [
+    "authapp.repositories.user.mock",
+    "authapp.repositories.user.memory",
+    "authapp.repositories.user.postgres",
+    "authapp.repositories.user.oracle",
+    "authapp.repositories.session.mock",
+    "authapp.repositories.session.redis",
+    "authapp.repositories.session.sharded",
+    "authapp.repositories.session.token",
+    "authapp.repositories.session.memory",
+    "authapp.repositories.session.compact",
+    "authapp.repositories.session.persistent",
+    "authapp.launcher",
+    "redis",
+]
+
+# (name, environment, modules imported first)
+_CONFIGS = [
+    ("default", {}, []),
+    ("mock users", {"USER_DB_TYPE": "mock"}, []),
+    (
+        "token sessions",
+        {"SESSION_CACHE_TYPE": "token", "SESSION_TOKEN_KEYS": "k1:secret"},
+        [],
+    ),
+    ("all backends", {}, _ALL_BACKENDS),
+]
+
+
+def run(env: dict[str, str], modules: list[str]) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD] + modules,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    total = time.perf_counter() - start
+    elapsed, rss = output.split()
+    return total, float(elapsed), int(rss)
+
+
+def report_importtime(top: int):
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import authapp.__main__"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+    print(f"\nslowest imports of the default configuration (of {len(modules)})")
+    print(f"{'self(ms)':>9} {'cumulative(ms)':>15}  module")
+    for self_us, cumulative_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>15.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args, _ = parser.parse_known_args()
+
+    print(f"{'config':>14} {'total(ms)':>10} {'import(ms)':>11} {'rss(MiB)':>9}")
+    for name, env, modules in _CONFIGS:
+        results = [run(env, modules) for _ in range(args.runs)]
+        total = statistics.median(result[0] for result in results)
+        elapsed = statistics.median(result[1] for result in results)
+        rss = statistics.median(result[2] for result in results)
+        print(
+            f"{name:>14} {total * 1000:>10.0f} {elapsed * 1000:>11.0f} "
+            f"{rss / 1024:>9.1f}"
+        )
+    report_importtime(args.top)
+
+
+if __name__ == "__main__":
+    main()
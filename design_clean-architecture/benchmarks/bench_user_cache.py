@@ -0,0 +1,77 @@
+# Hit ratio and backend load avoided by CachedUserRepository.
+# Workload: signins of users with skewed popularity, plus bot probes
+# of nonexistent usernames taken from a small dictionary.
+#
+# usage: python -m benchmarks.bench_user_cache [--users 10000] [--requests 200000]
+import argparse
+import logging
+import random
+import time
+
+from authapp.exceptions import ClientException
+from authapp.models.user import UserSchema
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.repositories.user.cache import CachedUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+
+
+class CountingUserRepository(InMemoryUserRepository):
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger)
+        self.calls = 0
+
+    def get_user_by_username(self, username: str) -> UserSchema:
+        self.calls += 1
+        return super().get_user_by_username(username)
+
+
+def make_workload(users: int, requests: int, bot_ratio: float) -> list[str]:
+    # zipf-like popularity of real users
+    names = [f"u{i}" for i in range(users)]
+    weights = [1 / (rank + 1) for rank in range(users)]
+    real = random.choices(names, weights=weights, k=requests)
+    bot_dictionary = [f"admin{i}" for i in range(500)]
+    return [
+        random.choice(bot_dictionary) if random.random() < bot_ratio else name
+        for name in real
+    ]
+
+
+def replay(repo: AbstractUserRepository, workload: list[str]) -> float:
+    start = time.perf_counter()
+    for username in workload:
+        try:
+            repo.get_user_by_username(username)
+        except ClientException:
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--bot_ratio", type=float, default=0.2)
+    parser.add_argument("--cache_size", type=int, default=2_000)
+    args, _ = parser.parse_known_args()
+
+    logger = logging.getLogger()
+    backend = CountingUserRepository(logger)
+    for i in range(args.users):
+        backend.create_user_atomically(f"u{i}", f"u{i}@example.com", "p@ssw0rd")
+    workload = make_workload(args.users, args.requests, args.bot_ratio)
+
+    repo = CachedUserRepository(backend, logger, maxsize=args.cache_size)
+    elapsed = replay(repo, workload)
+    stats = repo.stats()
+    print(f"requests        {len(workload):>10,}")
+    print(f"backend calls   {backend.calls:>10,}")
+    print(f"hits            {stats['hits']:>10,}")
+    print(f"negative hits   {stats['negative_hits']:>10,}")
+    print(f"hit ratio       {stats['hit_ratio']:>10.3f}")
+    print(f"load avoided    {1 - backend.calls / len(workload):>10.1%}")
+    print(f"elapsed         {elapsed:>10.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Lookup benchmark of the user repositories.
+#
+# usage: python -m benchmarks.bench_user_repository [--sizes 10000 100000 1000000]
+import argparse
+import logging
+import random
+import time
+
+import pandas as pd
+
+from authapp.exceptions import ClientException
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.repositories.user.mock import MockUserRepository
+from authapp.util import get_hashed_password, get_random_uuid
+
+_LOOKUPS = 200
+
+
+def make_rows(size: int) -> list[dict]:
+    hashed_password = get_hashed_password("p@ssw0rd")
+    return [
+        {
+            "id": get_random_uuid(),
+            "username": f"u{i}",
+            "email": f"u{i}@example.com",
+            "hashed_password": hashed_password,
+        }
+        for i in range(size)
+    ]
+
+
+def build_mock(rows: list[dict]) -> MockUserRepository:
+    repo = MockUserRepository(logging.getLogger())
+    # load as one sealed chunk, like after a background compaction
+    repo._chunks.append(pd.DataFrame(rows))
+    repo._usernames.update(row["username"] for row in rows)
+    repo._emails.update(row["email"] for row in rows)
+    return repo
+
+
+def build_memory(rows: list[dict]) -> InMemoryUserRepository:
+    repo = InMemoryUserRepository(logging.getLogger())
+    for row in rows:
+        repo._insert(row["id"], row["username"], row["email"], row["hashed_password"])
+    return repo
+
+
+def measure(repo: AbstractUserRepository, rows: list[dict]) -> dict[str, float]:
+    samples = random.sample(rows, min(_LOOKUPS, len(rows)))
+    results = {}
+
+    def per_op(func, keys) -> float:
+        start = time.perf_counter()
+        for key in keys:
+            func(key)
+        return (time.perf_counter() - start) / len(keys) * 1e6
+
+    results["by_id"] = per_op(repo.get_user_by_id, [r["id"] for r in samples])
+    results["by_username"] = per_op(
+        repo.get_user_by_username, [r["username"] for r in samples]
+    )
+    results["by_email"] = per_op(repo.get_user_by_email, [r["email"] for r in samples])
+
+    # duplicated signup: uniqueness check only, nothing is inserted
+    def signup_duplicate(username):
+        try:
+            repo.create_user_atomically(username, "new@example.com", "p@ssw0rd")
+        except ClientException:
+            pass
+
+    results["dup_signup"] = per_op(signup_duplicate, [r["username"] for r in samples])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args, _ = parser.parse_known_args()
+
+    print(f"{'size':>9} {'repository':>10} {'op':>12} {'us/op':>10}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        for name, builder in [("mock", build_mock), ("memory", build_memory)]:
+            repo = builder(rows)
+            for op, usec in measure(repo, rows).items():
+                print(f"{size:>9} {name:>10} {op:>12} {usec:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Username/email validation, previous re.match() calls vs authapp.validation.
+#
+# usage: python -m benchmarks.bench_validation [--calls 100000]
+import argparse
+import re
+import time
+
+from authapp.validation import (
+    is_valid_email,
+    is_valid_username,
+    validate_emails,
+)
+
+
+def old_is_valid_username(name):
+    regex = r"^[a-zA-Z0-9]{3,8}$"
+    return bool(re.match(regex, name))
+
+
+def old_is_valid_email(email):
+    email_regex = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
+    return bool(re.match(email_regex, email))
+
+
+_CASES = [
+    ("username valid", "yuichi", old_is_valid_username, is_valid_username),
+    ("username invalid", "yu_ichi!", old_is_valid_username, is_valid_username),
+    ("username long", "a" * 100_000, old_is_valid_username, is_valid_username),
+    ("email valid", "iyuichi@vmware.com", old_is_valid_email, is_valid_email),
+    ("email invalid", "iyuichi@vmware", old_is_valid_email, is_valid_email),
+    ("email long local", "a" * 100_000 + "@b", old_is_valid_email, is_valid_email),
+    (
+        "email long domain",
+        "a@b." + "c-." * 30_000 + "!",
+        old_is_valid_email,
+        is_valid_email,
+    ),
+]
+
+
+def per_call(func, value, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(value)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100_000)
+    args, _ = parser.parse_known_args()
+
+    print(f"{'case':>18} {'old(ns)':>12} {'new(ns)':>12}")
+    for name, value, old, new in _CASES:
+        # long inputs are slow with the old code. fewer calls
+        calls = args.calls if len(value) < 100 else max(args.calls // 1000, 10)
+        assert old(value) == new(value)
+        print(
+            f"{name:>18} {per_call(old, value, calls):>12.0f} "
+            f"{per_call(new, value, calls):>12.0f}"
+        )
+
+    emails = [f"user{i}@example.com" for i in range(args.calls)]
+    start = time.perf_counter()
+    validate_emails(emails)
+    elapsed = time.perf_counter() - start
+    print(f"batch {len(emails):,} emails: {len(emails) / elapsed:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Throughput of the prefork launcher from 1 to N worker processes.
+# each run starts "python -m authapp --workers <n>" with signed token sessions,
+# drives it with benchmarks.loadgen (signin/get_user/signout as the preloaded
+# users) and stops it. the load generator shares the cores with the server,
+# so leave some cores free when comparing large worker counts.
+#
+# usage: python -m benchmarks.bench_workers [--workers 1,2,4] [--duration 10]
+#            [--concurrency 64]
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from authapp.launcher import get_available_cores
+
+_SERVER_ARGS = [
+    "--session_cache_type",
+    "token",
+    "--session_token_keys",
+    "bench:secret",
+    "--password_hash_algorithm",
+    "pbkdf2-sha256",
+    "--password_hash_cost",
+    "1000",
+    "--password_hash_workers",
+    "0",
+    "--log_level",
+    "warning",
+]
+_MIX = "signin=10,get_user=80,signout=10"
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError(url)
+
+
+def run(workers: int, args) -> dict:
+    port = get_free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "authapp", "--workers", str(workers)]
+        + ["--port", str(port)]
+        + _SERVER_ARGS
+    )
+    try:
+        wait_until_ready(url)
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "result.json")
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.loadgen", "--url", url]
+                + ["--concurrency", str(args.concurrency)]
+                + ["--duration", str(args.duration), "--warmup", str(args.warmup)]
+                + ["--usernames", "yuichi,shunsuke", "--password", "p@ssw0rd"]
+                + ["--mix", _MIX, "--output", output],
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            with open(output) as f:
+                return json.load(f)["total"]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    cores = get_available_cores()
+    default = sorted({1, 2, 4, 8, 16, 32, 64} & set(range(1, cores + 1)) | {cores})
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=",".join(map(str, default)))
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args, _ = parser.parse_known_args()
+
+    print(f"{cores} cores available")
+    print(
+        f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'errors':>7} "
+        f"{'p50(ms)':>9} {'p99(ms)':>9}"
+    )
+    baseline = None
+    for workers in map(int, args.workers.split(",")):
+        total = run(workers, args)
+        if baseline is None:
+            baseline = total["throughput"]
+        latency = total["latency_ms"]
+        print(
+            f"{workers:>7} {total['throughput']:>9,.0f} "
+            f"{total['throughput'] / baseline:>7.2f}x {total['error_rate']:>7.2%} "
+            f"{latency['p50']:>9.2f} {latency['p99']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
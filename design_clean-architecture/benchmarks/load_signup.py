@@ -0,0 +1,51 @@
+# Replays signups against a user repository and reports throughput and peak RSS.
+#
+# usage: python -m benchmarks.load_signup [--signups 1000000] [--repository mock]
+import argparse
+import logging
+import resource
+import time
+
+from authapp.repositories.user.abstract import AbstractUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.repositories.user.mock import MockUserRepository
+
+_REPOSITORIES = {
+    "mock": MockUserRepository,
+    "memory": InMemoryUserRepository,
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def replay(repo: AbstractUserRepository, signups: int, report_every: int):
+    start = last = time.perf_counter()
+    for i in range(signups):
+        repo.create_user_atomically(f"u{i}", f"u{i}@example.com", "p@ssw0rd")
+        if (i + 1) % report_every == 0:
+            now = time.perf_counter()
+            rate = report_every / (now - last)
+            print(f"{i + 1:>10} signups {rate:>12,.0f}/s rss {peak_rss_mb():>8.1f}MB")
+            last = now
+    elapsed = time.perf_counter() - start
+    print(f"total {signups:,} signups in {elapsed:.2f}s")
+    print(f"throughput {signups / elapsed:,.0f} signups/s")
+    print(f"peak rss {peak_rss_mb():.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signups", type=int, default=1_000_000)
+    parser.add_argument("--repository", choices=_REPOSITORIES, default="mock")
+    parser.add_argument("--report_every", type=int, default=100_000)
+    args, _ = parser.parse_known_args()
+
+    repo = _REPOSITORIES[args.repository](logging.getLogger())
+    replay(repo, args.signups, args.report_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+# Load generator for the auth API. Virtual users run a weighted mix of
+# signup/signin/get_user/signout in a closed loop against a population of
+# pre-imported users, then throughput, latency percentiles and error rates
+# are reported per operation.
+#
+# without --url the app is built in-process (ASGI transport) from the usual
+# app parameters, e.g. --service_mode async --session_repository_type compact.
+# with --url a running server is driven instead. start it with --admin_import
+# true for seeding, and pass the same --password_hash_* parameters as the
+# server, so seeded users are not rehashed.
+# --usernames signs in as existing users instead of importing a population,
+# e.g. for servers whose workers do not share a user store.
+#
+# usage: python -m benchmarks.loadgen [--url http://127.0.0.1:8000]
+#            [--concurrency 50] [--duration 10] [--warmup 2] [--users 1000]
+#            [--mix signup=5,signin=20,get_user=65,signout=10]
+#            [--usernames yuichi,shunsuke --password p@ssw0rd]
+#            [--output result.json] [--compare baseline.json] [--tolerance 0.1]
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import logging
+import random
+import string
+import sys
+import time
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI
+
+from authapp.__main__ import build
+from authapp.hashing import PasswordHasher
+from authapp.parameter import Parameter
+from authapp.services.auth import MAX_IMPORT_BATCH_SIZE
+
+SIGNUP = "signup"
+SIGNIN = "signin"
+GET_USER = "get_user"
+SIGNOUT = "signout"
+OPERATIONS = [SIGNUP, SIGNIN, GET_USER, SIGNOUT]
+
+_DEFAULT_MIX = "signup=5,signin=20,get_user=65,signout=10"
+_PASSWORD = "l0adgen!"
+_IMPORT_CHUNK = 50000
+_TAG_LENGTH = 3
+_USERNAME_LENGTH = 8
+_DIGITS = string.digits + string.ascii_lowercase
+
+
+class Recorder:
+    # latencies and status counts per operation, after the warmup only
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies: dict[str, list[float]] = {op: [] for op in OPERATIONS}
+        self.statuses: dict[str, dict[str, int]] = {op: {} for op in OPERATIONS}
+        self.errors: dict[str, int] = {op: 0 for op in OPERATIONS}
+
+    def record(self, op: str, start: float, end: float, status: str, ok: bool):
+        if start < self.measure_from:
+            return
+        self.latencies[op].append(end - start)
+        statuses = self.statuses[op]
+        statuses[status] = statuses.get(status, 0) + 1
+        if not ok:
+            self.errors[op] += 1
+
+
+class Population:
+    # usernames are 3 random characters of the run plus a base36 counter,
+    # so repeated runs against one server do not collide (max 8 characters)
+    def __init__(self, rng: random.Random):
+        tag = "".join(rng.choice(string.ascii_lowercase) for _ in range(_TAG_LENGTH))
+        self._tag = tag
+        self._counter = itertools.count()
+        self.usernames: list[str] = []
+
+    def new_username(self) -> str:
+        username = self._tag + _base36(next(self._counter))
+        if len(username) > _USERNAME_LENGTH:
+            raise ValueError("too many users for one run")
+        return username
+
+
+class VirtualUser:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        population: Population,
+        recorder: Recorder,
+        rng: random.Random,
+        password: str,
+    ):
+        self._client = client
+        self._population = population
+        self._recorder = recorder
+        self._rng = rng
+        self._password = password
+        self._username: Optional[str] = None
+
+    async def run(self, deadline: float, mix: dict[str, float]):
+        ops = list(mix)
+        weights = list(mix.values())
+        while time.perf_counter() < deadline:
+            op = self._rng.choices(ops, weights)[0]
+            # a signed out user has to sign in before reading or signing out
+            if op in (GET_USER, SIGNOUT) and self._username is None:
+                op = SIGNIN
+            await getattr(self, op)()
+
+    async def signup(self):
+        username = self._population.new_username()
+        body = {
+            "username": username,
+            "email": f"{username}@loadgen.example",
+            "password1": self._password,
+            "password2": self._password,
+        }
+        if await self._request(SIGNUP, "POST", "/api/auth/v1/users", json=body):
+            self._population.usernames.append(username)
+
+    async def signin(self):
+        username = self._rng.choice(self._population.usernames)
+        body = {"username_or_email": username, "password": self._password}
+        if await self._request(SIGNIN, "POST", "/api/auth/v1/signin", json=body):
+            self._username = username
+
+    async def get_user(self):
+        url = f"/api/auth/v1/users/{self._username}"
+        await self._request(GET_USER, "GET", url)
+
+    async def signout(self):
+        await self._request(SIGNOUT, "DELETE", "/api/auth/v1/signin")
+        self._username = None
+
+    async def _request(self, op: str, method: str, url: str, **kwargs) -> bool:
+        start = time.perf_counter()
+        try:
+            response = await self._client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            status, ok = type(e).__name__, False
+        else:
+            status, ok = str(response.status_code), response.status_code == 200
+        self._recorder.record(op, start, time.perf_counter(), status, ok)
+        return ok
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for item in value.split(","):
+        op, _, weight = item.partition("=")
+        op = op.strip()
+        if op not in OPERATIONS:
+            raise ValueError(f"operation must be [{'|'.join(OPERATIONS)}]: {op}")
+        mix[op] = float(weight)
+        if mix[op] < 0:
+            raise ValueError(f"weight must not be negative: {item}")
+    if sum(mix.values()) <= 0:
+        raise ValueError("at least one weight must be positive")
+    return {op: weight for op, weight in mix.items() if weight > 0}
+
+
+def create_client(app: Optional[FastAPI], url: str) -> httpx.AsyncClient:
+    # one client per virtual user, so each one has its own cookie jar
+    if app is None:
+        return httpx.AsyncClient(base_url=url, timeout=30)
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadgen")
+
+
+async def seed(client: httpx.AsyncClient, population: Population, users: int):
+    # users are imported with one precomputed hash instead of signed up,
+    # so a large population does not cost one password hash per user
+    params = Parameter()
+    params.load()
+    cost = params.password_hash_cost
+    hasher = PasswordHasher(
+        logging.getLogger(),
+        algorithm=params.password_hash_algorithm.lower(),
+        cost=int(cost) if cost else None,
+    )
+    hashed_password = hasher.hash(_PASSWORD)
+    for offset in range(0, users, _IMPORT_CHUNK):
+        usernames = [
+            population.new_username()
+            for _ in range(min(_IMPORT_CHUNK, users - offset))
+        ]
+        lines = [
+            json.dumps(
+                {
+                    "username": username,
+                    "email": f"{username}@loadgen.example",
+                    "hashed_password": hashed_password,
+                }
+            )
+            for username in usernames
+        ]
+        response = await client.post(
+            "/api/auth/v1/admin/users/import",
+            params={"batch_size": MAX_IMPORT_BATCH_SIZE},
+            content="\n".join(lines),
+            headers={"content-type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        report = response.json()
+        if report["imported"] != len(usernames):
+            raise RuntimeError(f"seeding failed: {report['rejected'][:3]}")
+        population.usernames.extend(usernames)
+
+
+async def run(args, mix: dict[str, float]) -> dict:
+    app = None
+    if not args.url:
+        params = Parameter()
+        params.load()
+        # seeding goes through the bulk import endpoint
+        params.admin_import = "true"
+        app = FastAPI()
+        build(app, params)
+
+    rng = random.Random(args.seed)
+    population = Population(random.Random())
+    if args.usernames:
+        population.usernames = args.usernames.split(",")
+    else:
+        async with create_client(app, args.url) as client:
+            start = time.perf_counter()
+            await seed(client, population, args.users)
+            elapsed = time.perf_counter() - start
+            print(f"seeded {args.users:,} users in {elapsed:.1f}s")
+
+    start = time.perf_counter()
+    recorder = Recorder(start + args.warmup)
+    deadline = start + args.warmup + args.duration
+    clients = [create_client(app, args.url) for _ in range(args.concurrency)]
+    try:
+        await asyncio.gather(
+            *[
+                VirtualUser(
+                    client,
+                    population,
+                    recorder,
+                    random.Random(rng.random()),
+                    args.password if args.usernames else _PASSWORD,
+                ).run(deadline, mix)
+                for client in clients
+            ]
+        )
+    finally:
+        for client in clients:
+            await client.aclose()
+    elapsed = time.perf_counter() - recorder.measure_from
+
+    operations = {
+        op: summarize(recorder.latencies[op], recorder.errors[op], elapsed)
+        for op in OPERATIONS
+        if recorder.latencies[op]
+    }
+    for op, summary in operations.items():
+        summary["statuses"] = recorder.statuses[op]
+    latencies = list(itertools.chain(*recorder.latencies.values()))
+    errors = sum(recorder.errors.values())
+    return {
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "target": args.url or "asgi",
+        "argv": sys.argv[1:],
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "users": len(population.usernames) if args.usernames else args.users,
+        "mix": mix,
+        "total": summarize(latencies, errors, elapsed),
+        "operations": operations,
+    }
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "throughput": count / elapsed,
+        "latency_ms": {
+            "mean": sum(latencies) / count * 1000 if count else 0.0,
+            "p50": _percentile(latencies, 0.5) * 1000,
+            "p90": _percentile(latencies, 0.9) * 1000,
+            "p95": _percentile(latencies, 0.95) * 1000,
+            "p99": _percentile(latencies, 0.99) * 1000,
+            "max": latencies[-1] * 1000 if count else 0.0,
+        },
+    }
+
+
+def report(result: dict):
+    print(
+        f"{'operation':>10} {'requests':>9} {'req/s':>9} {'errors':>7} "
+        f"{'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9}"
+    )
+    rows = list(result["operations"].items()) + [("total", result["total"])]
+    for name, summary in rows:
+        latency = summary["latency_ms"]
+        print(
+            f"{name:>10} {summary['requests']:>9,} {summary['throughput']:>9,.0f} "
+            f"{summary['error_rate']:>7.2%} {latency['p50']:>9.2f} "
+            f"{latency['p95']:>9.2f} {latency['p99']:>9.2f} {latency['max']:>9.2f}"
+        )
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    # a regression is throughput down or p95 up by more than tolerance,
+    # or an error rate up by more than a percentage point
+    regressions = []
+    rows = [("total", result["total"], baseline["total"])]
+    for op, summary in result["operations"].items():
+        if op in baseline["operations"]:
+            rows.append((op, summary, baseline["operations"][op]))
+
+    print(f"{'operation':>10} {'req/s':>17} {'p95(ms)':>21} {'errors':>17}")
+    for name, new, old in rows:
+        throughput = _change(new["throughput"], old["throughput"])
+        p95 = _change(new["latency_ms"]["p95"], old["latency_ms"]["p95"])
+        print(
+            f"{name:>10} {new['throughput']:>9,.0f} {throughput:>+7.1%} "
+            f"{new['latency_ms']['p95']:>13.2f} {p95:>+7.1%} "
+            f"{new['error_rate']:>9.2%} {old['error_rate']:>7.2%}"
+        )
+        if throughput < -tolerance:
+            regressions.append(f"{name}: throughput {throughput:+.1%}")
+        if p95 > tolerance:
+            regressions.append(f"{name}: p95 {p95:+.1%}")
+        if new["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {new['error_rate']:.2%}")
+    return regressions
+
+
+def _change(new: float, old: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def _percentile(values: list[float], q: float) -> float:
+    # nearest rank on sorted values
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _base36(n: int) -> str:
+    digits = ""
+    while True:
+        n, digit = divmod(n, 36)
+        digits = _DIGITS[digit] + digits
+        if n == 0:
+            return digits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--mix", default=_DEFAULT_MIX)
+    parser.add_argument("--usernames", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--compare", default="")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args, _ = parser.parse_known_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.users < 1:
+        parser.error("--users must be positive")
+
+    result = asyncio.run(run(args, mix))
+    report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import authapp.const as const
+from authapp.__main__ import build
+from authapp.parameter import Parameter
+
+
+def get_client(service_mode: str, admin_import: bool = False) -> TestClient:
+    params = Parameter()
+    params.service_mode = service_mode
+    params.user_repository_type = const.USER_REPOSITORY_TYPE_MEMORY
+    params.admin_import = str(admin_import).lower()
+    app = FastAPI()
+    build(app, params)
+    client = TestClient(app)
+    for i in range(5):
+        body = {
+            "username": f"user{i}",
+            "email": f"user{i}@vmware.com",
+            "password1": "p@ssw0rd",
+            "password2": "p@ssw0rd",
+        }
+        assert client.post("/api/auth/v1/users", json=body).status_code == 200
+    return client
+
+
+@pytest.mark.parametrize("mode", [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC])
+def test_get_users_page(mode):
+    client = get_client(mode)
+    all_ids = sorted(user["id"] for user in client.get("/api/auth/v1/users").json())
+    assert len(all_ids) == 7
+
+    ids = []
+    after = None
+    while True:
+        params = {"limit": 3} if after is None else {"limit": 3, "after": after}
+        response = client.get("/api/auth/v1/users", params=params)
+        assert response.status_code == 200
+        ids.extend(user["id"] for user in response.json())
+        after = response.headers.get("X-Next-After")
+        if after is None:
+            break
+    assert ids == all_ids
+
+    response = client.get("/api/auth/v1/users", params={"limit": 0})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("mode", [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC])
+def test_get_users_stream(mode):
+    client = get_client(mode)
+    all_ids = sorted(user["id"] for user in client.get("/api/auth/v1/users").json())
+
+    response = client.get("/api/auth/v1/users", params={"stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["id"] for user in users] == all_ids
+    assert all("hashed_password" not in user for user in users)
+
+
+@pytest.mark.parametrize("mode", [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC])
+def test_import_users(mode):
+    client = get_client(mode, admin_import=True)
+    url = "/api/auth/v1/admin/users/import"
+    body = "".join(
+        json.dumps(
+            {"username": f"bulk{i}", "email": f"bulk{i}@vmware.com", "password": "pw"}
+        )
+        + "\n"
+        for i in range(25)
+    )
+    body += '{"username": "user0", "email": "x@vmware.com", "password": "pw"}\n'
+    response = client.post(
+        url,
+        content=body,
+        params={"batch_size": 10},
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["total"] == 26
+    assert report["imported"] == 25
+    assert report["rejected"] == [
+        {"line": 26, "username": "user0", "reason": "username is already used"}
+    ]
+    assert len(client.get("/api/auth/v1/users").json()) == 32
+
+    response = client.post(
+        url, content="username\nfoo\n", headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.json()["rejected"][0]["reason"] == "email format invalid"
+
+    # not UTF-8. the row is rejected, or the whole import if it is the header
+    response = client.post(
+        url, content=b"username\nj\xf6rg\n", headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.json()["rejected"][0]["reason"] == "line could not be parsed"
+    response = client.post(
+        url, content=b"n\xe4me\n", headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(url, content=body, headers={"content-type": "text/plain"})
+    assert response.status_code == 400
+
+    # not mounted unless enabled
+    client = get_client(mode)
+    headers = {"content-type": "application/x-ndjson"}
+    assert client.post(url, content=body, headers=headers).status_code == 404
+
+
+@pytest.mark.parametrize("mode", [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC])
+def test_lookup_users(mode):
+    client = get_client(mode)
+    url = "/api/auth/v1/admin/users/lookup"
+    user1 = client.get("/api/auth/v1/users", params={"limit": 1}).json()[0]
+    body = {
+        "ids": [user1["id"], "not_exist_uuid"],
+        "usernames": ["user1", "user2", "taro"],
+        "emails": ["user1@vmware.com"],
+    }
+    response = client.post(url, json=body)
+    assert response.status_code == 200
+    users = response.json()
+    assert [user["id"] for user in users] == sorted(user["id"] for user in users)
+    assert {user["username"] for user in users} == {
+        user1["username"],
+        "user1",
+        "user2",
+    }
+    assert all("hashed_password" not in user for user in users)
+
+    response = client.post(url, json={"ids": ["x"] * 1001})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("mode", [const.SERVICE_MODE_SYNC, const.SERVICE_MODE_ASYNC])
+def test_metrics(mode):
+    params = Parameter()
+    params.service_mode = mode
+    params.metrics = "true"
+    app = FastAPI()
+    build(app, params)
+    client = TestClient(app)
+    assert client.get("/api/auth/v1/users/yuichi").status_code == 400
+    assert client.get("/api/auth/v1/users").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for labels in [
+        'layer="http",name="GET /api/auth/v1/users/{username}"',
+        'layer="controller",name="get_user"',
+        'layer="service",name="get_user"',
+        'layer="user_repository",name="get_users_without_password"',
+    ]:
+        assert f"authapp_span_duration_seconds_count{{{labels}}} 1" in text
+    assert (
+        'authapp_http_responses_total{name="GET /api/auth/v1/users/{username}",'
+        'status="400"} 1'
+    ) in text
+
+    params.session_repository_type = const.SESSION_REPOSITORY_TYPE_MEMORY
+    app = FastAPI()
+    build(app, params)
+    client = TestClient(app)
+    client.post(
+        "/api/auth/v1/signin",
+        json={"username_or_email": "yuichi", "password": "p@ssw0rd"},
+    )
+    text = client.get("/metrics").text
+    for name, value in [("live", 1), ("expired_unreclaimed", 0), ("live_evictions", 0)]:
+        assert f'component="session_store",name="{name}"}} {value}' in text
+
+    # calls coalesced by --single_flight
+    params.single_flight = "true"
+    app = FastAPI()
+    build(app, params)
+    client = TestClient(app)
+    client.get("/api/auth/v1/users/yuichi")
+    text = client.get("/metrics").text
+    for component in ["user_single_flight", "session_single_flight"]:
+        assert f'component="{component}",name="coalesced"}} 0' in text
+
+    # off by default
+    app = FastAPI()
+    build(app, Parameter())
+    assert TestClient(app).get("/metrics").status_code == 404
@@ -0,0 +1,194 @@
+import logging
+import random
+import uuid
+import pytest
+from authapp.repositories.session.compact import CompactSessionRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def random_user() -> str:
+    return str(uuid.uuid4())
+
+
+def assert_sessions(repo, sessions: dict[str, str]):
+    for session_uuid, user_uuid in sessions.items():
+        assert repo.get_session_user_uuid(session_uuid) == user_uuid
+
+
+def test_all():
+    repo = CompactSessionRepository(logging.getLogger(), maxsize=100)
+    user_uuid = random_user()
+    session_uuid = repo.create_session(user_uuid)
+    assert repo.exist_session(session_uuid)
+    assert repo.get_session_user_uuid(session_uuid) == user_uuid
+    assert repo.delete_session(session_uuid)
+    assert not repo.delete_session(session_uuid)
+    assert not repo.exist_session(session_uuid)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(session_uuid)
+    assert not repo.exist_session("not_a_uuid")
+    assert not repo.delete_session("not_a_uuid")
+
+
+def test_many():
+    repo = CompactSessionRepository(logging.getLogger(), maxsize=1000)
+    sessions = {repo.create_session(random_user()): None for _ in range(1000)}
+    users = {s: repo.get_session_user_uuid(s) for s in sessions}
+    assert len(set(users.values())) == 1000
+    # deletes leave tombstones. later inserts clean them up
+    for session_uuid in list(sessions)[:500]:
+        assert repo.delete_session(session_uuid)
+    for _ in range(500):
+        repo.create_session(random_user())
+    for session_uuid in list(sessions)[500:]:
+        assert repo.get_session_user_uuid(session_uuid) == users[session_uuid]
+    stats = repo.stats()
+    assert stats["size"] == 1000
+    assert stats["evictions"] == 0
+
+
+def test_expiry():
+    clock = FakeClock()
+    repo = CompactSessionRepository(logging.getLogger(), ttl=10, clock=clock)
+    session_uuid = repo.create_session(random_user())
+    clock.now = 9
+    assert repo.exist_session(session_uuid)
+    clock.now = 10
+    assert not repo.exist_session(session_uuid)
+    assert repo.stats()["size"] == 0
+
+
+def test_capacity():
+    clock = FakeClock()
+    repo = CompactSessionRepository(
+        logging.getLogger(), ttl=10, maxsize=100, clock=clock
+    )
+    for _ in range(100):
+        repo.create_session(random_user())
+    # full of expired sessions. sampled ones make room first,
+    # so few live sessions are evicted
+    clock.now = 10
+    for _ in range(100):
+        repo.create_session(random_user())
+    assert repo.stats()["evictions"] < 50
+
+    # full of live sessions. some are evicted, size stays bounded
+    for _ in range(100):
+        repo.create_session(random_user())
+    stats = repo.stats()
+    assert stats["size"] <= 100
+    assert stats["evictions"] > 0
+
+
+def test_small_store():
+    with pytest.raises(ValueError):
+        CompactSessionRepository(logging.getLogger(), maxsize=15)
+    # as many sessions as samples. each live session is evicted at most once
+    clock = FakeClock()
+    repo = CompactSessionRepository(logging.getLogger(), maxsize=16, clock=clock)
+    for i in range(100):
+        clock.now = i
+        repo.create_session(random_user())
+    stats = repo.stats()
+    assert stats["size"] == 16
+    assert stats["evictions"] == 84
+    # removing a slot without a session changes nothing
+    free = [slot for slot, state in enumerate(repo._expiry) if state <= 1]
+    assert not any(repo._remove(slot) for slot in free)
+    assert repo.stats()["size"] == 16
+
+
+def test_sessions_for_user():
+    clock = FakeClock()
+    repo = CompactSessionRepository(logging.getLogger(), ttl=10, clock=clock)
+    user_uuid = random_user()
+    sessions = [repo.create_session(user_uuid) for _ in range(3)]
+    other_user = random_user()
+    other = repo.create_session(other_user)
+    assert repo.count_sessions_for_user(user_uuid) == 3
+    # unlinks from the middle of the chain
+    repo.delete_session(sessions[1])
+    assert repo.count_sessions_for_user(user_uuid) == 2
+    deleted = repo.delete_sessions_for_user(user_uuid)
+    assert sorted(deleted) == sorted([sessions[0], sessions[2]])
+    assert not any(repo.exist_session(s) for s in sessions)
+    assert repo.count_sessions_for_user(user_uuid) == 0
+    assert repo.exist_session(other)
+    assert repo.stats()["users"] == 1
+
+    clock.now = 10
+    assert repo.count_sessions_for_user(other_user) == 0
+    assert repo.count_sessions_for_user("not_a_uuid") == 0
+    assert repo.delete_sessions_for_user("not_a_uuid") == []
+
+
+def test_sessions_for_user_after_cleanup():
+    repo = CompactSessionRepository(logging.getLogger(), maxsize=1000)
+    users = [random_user() for _ in range(10)]
+    sessions = {user_uuid: [] for user_uuid in users}
+    for i in range(1800):
+        user_uuid = users[i % 10]
+        sessions[user_uuid].append(repo.create_session(user_uuid))
+        if i % 2:
+            repo.delete_session(sessions[user_uuid].pop(0))
+    for user_uuid in users:
+        assert repo.count_sessions_for_user(user_uuid) == len(sessions[user_uuid])
+        deleted = repo.delete_sessions_for_user(user_uuid)
+        assert sorted(deleted) == sorted(sessions[user_uuid])
+    assert repo.stats()["size"] == 0
+    assert repo.stats()["users"] == 0
+
+
+def test_tombstone_cleanup():
+    # no stop-the-world rehash. the columns are never reallocated
+    repo = CompactSessionRepository(logging.getLogger(), maxsize=1000)
+    keys = repo._keys
+    rng = random.Random(0)
+    users = [random_user() for _ in range(50)]
+    sessions = {}
+    for _ in range(20000):
+        if len(sessions) < 1000 and rng.random() < 0.6:
+            user_uuid = rng.choice(users)
+            sessions[repo.create_session(user_uuid)] = user_uuid
+        elif sessions:
+            session_uuid = rng.choice(list(sessions))
+            assert repo.delete_session(session_uuid)
+            del sessions[session_uuid]
+    assert repo._keys is keys
+    stats = repo.stats()
+    assert stats["size"] == len(sessions)
+    assert stats["size"] + stats["tombstones"] < stats["capacity"] * 0.875
+    assert stats["tombstones"] == sum(1 for state in repo._expiry if state == 1)
+    assert_sessions(repo, sessions)
+    for user_uuid in users:
+        expected = sorted(s for s, u in sessions.items() if u == user_uuid)
+        assert repo.count_sessions_for_user(user_uuid) == len(expected)
+        assert sorted(repo.delete_sessions_for_user(user_uuid)) == expected
+    assert repo.stats()["size"] == 0
+    assert repo.stats()["users"] == 0
+
+
+def test_max_sessions_per_user():
+    clock = FakeClock()
+    repo = CompactSessionRepository(
+        logging.getLogger(), max_sessions_per_user=2, clock=clock
+    )
+    user_uuid = random_user()
+    sessions = []
+    for i in range(5):
+        clock.now = i
+        sessions.append(repo.create_session(user_uuid))
+    assert [repo.exist_session(s) for s in sessions] == [False] * 3 + [True] * 2
+    assert repo.count_sessions_for_user(user_uuid) == 2
+
+    # created in the same second. the new session is kept
+    new = repo.create_session(user_uuid)
+    assert repo.exist_session(new)
+    assert repo.count_sessions_for_user(user_uuid) == 2
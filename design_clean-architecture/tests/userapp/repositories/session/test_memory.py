@@ -0,0 +1,131 @@
+import logging
+import time
+import pytest
+from authapp.repositories.session.memory import InMemorySessionRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def get_repo(clock: FakeClock, **kwargs) -> InMemorySessionRepository:
+    return InMemorySessionRepository(
+        logging.getLogger(), ttl=10, sweep_interval=0, clock=clock, **kwargs
+    )
+
+
+def test_all():
+    repo = InMemorySessionRepository(logging.getLogger())
+    session_uuid = repo.create_session("user-uuid")
+    assert repo.exist_session(session_uuid)
+    assert repo.get_session_user_uuid(session_uuid) == "user-uuid"
+    assert repo.delete_session(session_uuid)
+    assert not repo.exist_session(session_uuid)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(session_uuid)
+    repo.close()
+
+
+def test_sweep():
+    clock = FakeClock()
+    repo = get_repo(clock, sweep_batch=3)
+    old = [repo.create_session(f"user{i}") for i in range(5)]
+    clock.now = 5
+    new = repo.create_session("user5")
+    clock.now = 10
+    assert not repo.exist_session(old[0])
+    stats = repo.stats()
+    assert stats["live"] == 1
+    assert stats["expired_unreclaimed"] == 5
+
+    # bounded work per tick
+    assert repo.sweep() == 3
+    assert repo.sweep() == 2
+    assert repo.sweep() == 0
+    stats = repo.stats()
+    assert stats["expired_unreclaimed"] == 0
+    assert stats["reclaimed"] == 5
+    assert repo.get_session_user_uuid(new) == "user5"
+
+
+def test_capacity():
+    clock = FakeClock()
+    repo = get_repo(clock, maxsize=3)
+    first = repo.create_session("user0")
+    clock.now = 1
+    repo.create_session("user1")
+    repo.create_session("user2")
+
+    # full of live sessions. the one closest to expiry goes
+    repo.create_session("user3")
+    assert not repo.exist_session(first)
+    assert repo.stats()["live_evictions"] == 1
+
+    # expired sessions are reclaimed before any live one
+    clock.now = 11
+    fresh = [repo.create_session(f"user{i}") for i in range(4, 7)]
+    assert all(repo.exist_session(session_uuid) for session_uuid in fresh)
+    stats = repo.stats()
+    assert stats["live_evictions"] == 1
+    assert stats["reclaimed"] == 3
+
+
+def test_deleted_sessions_do_not_grow_heap():
+    clock = FakeClock()
+    repo = get_repo(clock, sweep_batch=10)
+    for i in range(1000):
+        repo.delete_session(repo.create_session(f"user{i}"))
+    assert len(repo._heap) <= 10 + 1
+
+    # every removal path bounds the heap
+    for i in range(1000):
+        repo.create_session("user")
+        repo.delete_sessions_for_user("user")
+    assert len(repo._heap) <= 10 + 1
+    repo = get_repo(clock, sweep_batch=10, max_sessions_per_user=1)
+    for i in range(1000):
+        repo.create_session("user")
+    assert len(repo._heap) <= 2 + 10 + 1
+
+
+def test_background_sweeper():
+    repo = InMemorySessionRepository(logging.getLogger(), ttl=0, sweep_interval=0.01)
+    for i in range(10):
+        repo.create_session(f"user{i}")
+    deadline = time.monotonic() + 2
+    while repo.stats()["reclaimed"] < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert repo.stats()["reclaimed"] == 10
+    repo.close()
+
+
+def test_sessions_for_user():
+    clock = FakeClock()
+    repo = get_repo(clock)
+    sessions = [repo.create_session("user1") for _ in range(3)]
+    other = repo.create_session("user2")
+    assert repo.count_sessions_for_user("user1") == 3
+    repo.delete_session(sessions[0])
+    assert repo.count_sessions_for_user("user1") == 2
+    assert sorted(repo.delete_sessions_for_user("user1")) == sorted(sessions[1:])
+    assert not any(repo.exist_session(s) for s in sessions)
+    assert repo.count_sessions_for_user("user1") == 0
+
+    # reclaimed sessions leave the index
+    clock.now = 10
+    assert repo.count_sessions_for_user("user2") == 0
+    assert repo.sweep() == 1
+    assert repo.delete_sessions_for_user("user2") == []
+    assert not repo.exist_session(other)
+
+
+def test_max_sessions_per_user():
+    clock = FakeClock()
+    repo = get_repo(clock, max_sessions_per_user=2)
+    sessions = [repo.create_session("user1") for _ in range(5)]
+    assert [repo.exist_session(s) for s in sessions] == [False] * 3 + [True] * 2
+    assert repo.count_sessions_for_user("user1") == 2
@@ -9,3 +9,25 @@ def test_all():
     session_uuid = repo.create_session(user_uuid)
     assert repo.exist_session(session_uuid)
     assert repo.get_session_user_uuid(session_uuid) == user_uuid
+
+
+def test_sessions_for_user():
+    repo = MockSessionRepository(logging.getLogger())
+    sessions = [repo.create_session("user1") for _ in range(3)]
+    other = repo.create_session("user2")
+    assert repo.count_sessions_for_user("user1") == 3
+    repo.delete_session(sessions[0])
+    assert repo.count_sessions_for_user("user1") == 2
+    assert sorted(repo.delete_sessions_for_user("user1")) == sorted(sessions[1:])
+    assert not any(repo.exist_session(s) for s in sessions)
+    assert repo.count_sessions_for_user("user1") == 0
+    assert repo.exist_session(other)
+
+
+def test_max_sessions_per_user():
+    repo = MockSessionRepository(logging.getLogger(), max_sessions_per_user=2)
+    sessions = [repo.create_session("user1") for _ in range(3)]
+    assert not repo.exist_session(sessions[0])
+    assert repo.exist_session(sessions[1])
+    assert repo.exist_session(sessions[2])
+    assert repo.count_sessions_for_user("user1") == 2
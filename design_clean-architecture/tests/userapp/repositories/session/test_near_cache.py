@@ -0,0 +1,81 @@
+import logging
+import pytest
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.session.near_cache import NearCacheSessionRepository
+from authapp.repositories.session.invalidation import LocalInvalidationChannel
+
+
+def test_all():
+    backend = MockSessionRepository(logging.getLogger())
+    repo = NearCacheSessionRepository(backend, logging.getLogger())
+    session_uuid = repo.create_session("user")
+    assert repo.exist_session(session_uuid)
+    assert repo.get_session_user_uuid(session_uuid) == "user"
+    assert repo.stats()["hits"] == 2
+
+    repo.delete_session(session_uuid)
+    assert not repo.exist_session(session_uuid)
+    assert not backend.exist_session(session_uuid)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(session_uuid)
+
+
+def test_miss_and_eviction():
+    backend = MockSessionRepository(logging.getLogger())
+    repo = NearCacheSessionRepository(backend, logging.getLogger(), maxsize=2)
+    session_uuids = [backend.create_session(f"user{i}") for i in range(3)]
+    for i, session_uuid in enumerate(session_uuids):
+        assert repo.get_session_user_uuid(session_uuid) == f"user{i}"
+    stats = repo.stats()
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_invalidation_channel():
+    backend = MockSessionRepository(logging.getLogger())
+    channel = LocalInvalidationChannel()
+    worker1 = NearCacheSessionRepository(backend, logging.getLogger(), channel=channel)
+    worker2 = NearCacheSessionRepository(backend, logging.getLogger(), channel=channel)
+    session_uuid = worker1.create_session("user")
+    assert worker2.get_session_user_uuid(session_uuid) == "user"
+
+    worker1.delete_session(session_uuid)
+    assert worker2.stats()["invalidations"] == 1
+    with pytest.raises(KeyError):
+        worker2.get_session_user_uuid(session_uuid)
+
+
+def test_delete_sessions_for_user():
+    backend = MockSessionRepository(logging.getLogger())
+    channel = LocalInvalidationChannel()
+    worker1 = NearCacheSessionRepository(backend, logging.getLogger(), channel=channel)
+    worker2 = NearCacheSessionRepository(backend, logging.getLogger(), channel=channel)
+    sessions = [worker1.create_session("user") for _ in range(2)]
+    for session_uuid in sessions:
+        assert worker2.get_session_user_uuid(session_uuid) == "user"
+
+    assert sorted(worker1.delete_sessions_for_user("user")) == sorted(sessions)
+    assert worker1.count_sessions_for_user("user") == 0
+    assert not any(worker1.exist_session(s) for s in sessions)
+    assert not any(worker2.exist_session(s) for s in sessions)
+
+
+def test_read_racing_a_delete_is_not_cached():
+    backend = MockSessionRepository(logging.getLogger())
+    repo = NearCacheSessionRepository(backend, logging.getLogger())
+    session_uuid = backend.create_session("user")
+    get_session_user_uuid = backend.get_session_user_uuid
+
+    def read_then_signout(session_uuid):
+        # the read finishes, then the session is deleted before it is cached
+        user_uuid = get_session_user_uuid(session_uuid)
+        repo.delete_session(session_uuid)
+        return user_uuid
+
+    backend.get_session_user_uuid = read_then_signout
+    assert repo.get_session_user_uuid(session_uuid) == "user"
+    assert not repo.exist_session(session_uuid)
+    assert repo.stats()["size"] == 0
+    # nothing is left behind once no read is in flight
+    assert not repo._invalidated
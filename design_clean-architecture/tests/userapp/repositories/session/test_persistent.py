@@ -0,0 +1,161 @@
+import logging
+import os
+import uuid
+import pytest
+from authapp.repositories.session.persistent import PersistentSessionRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def get_repo(path, clock=None, **kwargs) -> PersistentSessionRepository:
+    kwargs.setdefault("maxsize", 1000)
+    if clock is not None:
+        kwargs["clock"] = clock
+    return PersistentSessionRepository(
+        logging.getLogger(), str(path), snapshot_interval=0, **kwargs
+    )
+
+
+def create_sessions(repo, n: int) -> dict[str, str]:
+    sessions = {}
+    for _ in range(n):
+        user_uuid = str(uuid.uuid4())
+        sessions[repo.create_session(user_uuid)] = user_uuid
+    return sessions
+
+
+def assert_sessions(repo, sessions: dict[str, str]):
+    for session_uuid, user_uuid in sessions.items():
+        assert repo.get_session_user_uuid(session_uuid) == user_uuid
+
+
+def test_clean_restart(tmp_path):
+    repo = get_repo(tmp_path / "s")
+    sessions = create_sessions(repo, 100)
+    repo.close()
+    assert os.path.exists(tmp_path / "s.snapshot")
+
+    repo = get_repo(tmp_path / "s")
+    assert_sessions(repo, sessions)
+    assert repo.stats()["size"] == 100
+
+
+def test_crash_without_snapshot(tmp_path):
+    # killed before the first snapshot. the log alone restores sessions
+    repo = get_repo(tmp_path / "s")
+    sessions = create_sessions(repo, 50)
+    deleted = list(sessions)[:10]
+    for session_uuid in deleted:
+        repo.delete_session(session_uuid)
+    del repo
+
+    repo = get_repo(tmp_path / "s")
+    assert not any(repo.exist_session(session_uuid) for session_uuid in deleted)
+    assert_sessions(repo, {k: v for k, v in sessions.items() if k not in deleted})
+    assert repo.stats()["size"] == 40
+
+
+def test_crash_after_snapshot(tmp_path):
+    repo = get_repo(tmp_path / "s")
+    before = create_sessions(repo, 30)
+    repo.snapshot()
+    after = create_sessions(repo, 30)
+    signed_out = list(before)[0]
+    repo.delete_session(signed_out)
+    del repo
+
+    repo = get_repo(tmp_path / "s")
+    assert not repo.exist_session(signed_out)
+    del before[signed_out]
+    assert_sessions(repo, before)
+    assert_sessions(repo, after)
+    # older logs are gone after the snapshot
+    assert sorted(os.listdir(tmp_path)) == ["s.log.1", "s.log.2", "s.snapshot"]
+
+
+def test_crash_during_snapshot(tmp_path):
+    # the snapshot was written aside but not renamed. old state + logs are used
+    repo = get_repo(tmp_path / "s")
+    sessions = create_sessions(repo, 20)
+    repo.snapshot()
+    sessions.update(create_sessions(repo, 20))
+    with open(tmp_path / "s.snapshot.tmp", "wb") as f:
+        f.write(b"partial")
+    del repo
+
+    repo = get_repo(tmp_path / "s")
+    assert_sessions(repo, sessions)
+
+
+def test_torn_log_record(tmp_path):
+    repo = get_repo(tmp_path / "s")
+    sessions = create_sessions(repo, 10)
+    del repo
+    # a record cut in the middle by the crash
+    with open(tmp_path / "s.log.0", "ab") as f:
+        f.write(b"C" + bytes(10))
+
+    repo = get_repo(tmp_path / "s")
+    assert_sessions(repo, sessions)
+    assert repo.stats()["size"] == 10
+
+
+def test_expiry_across_restart(tmp_path):
+    clock = FakeClock()
+    repo = get_repo(tmp_path / "s", clock=clock, ttl=100)
+    old = create_sessions(repo, 5)
+    repo.snapshot()
+    clock.now += 50
+    new = create_sessions(repo, 5)
+    del repo
+
+    clock.now += 60
+    repo = get_repo(tmp_path / "s", clock=clock, ttl=100)
+    assert not any(repo.exist_session(session_uuid) for session_uuid in old)
+    assert_sessions(repo, new)
+
+
+def test_resized_store(tmp_path):
+    repo = get_repo(tmp_path / "s", maxsize=100)
+    sessions = create_sessions(repo, 50)
+    repo.close()
+
+    repo = get_repo(tmp_path / "s", maxsize=1000)
+    assert_sessions(repo, sessions)
+    assert repo.stats()["capacity"] > 1000
+
+
+def test_sessions_for_user_across_restart(tmp_path):
+    repo = get_repo(tmp_path / "s")
+    user_uuid = str(uuid.uuid4())
+    snapshotted = [repo.create_session(user_uuid) for _ in range(3)]
+    repo.snapshot()
+    logged = [repo.create_session(user_uuid) for _ in range(2)]
+    repo.delete_session(snapshotted[0])
+    del repo
+
+    repo = get_repo(tmp_path / "s")
+    assert repo.count_sessions_for_user(user_uuid) == 4
+    deleted = repo.delete_sessions_for_user(user_uuid)
+    assert sorted(deleted) == sorted(snapshotted[1:] + logged)
+    repo.close()
+
+    repo = get_repo(tmp_path / "s")
+    assert repo.count_sessions_for_user(user_uuid) == 0
+    assert repo.stats()["size"] == 0
+
+
+def test_unknown_snapshot(tmp_path):
+    repo = get_repo(tmp_path / "s")
+    repo.close()
+    with open(tmp_path / "s.snapshot", "r+b") as f:
+        f.seek(8)
+        f.write((2).to_bytes(4, "little"))
+    with pytest.raises(ValueError):
+        get_repo(tmp_path / "s")
@@ -0,0 +1,79 @@
+import logging
+import pytest
+from authapp.repositories.session.redis import RedisSessionRepository
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def get_repo(server, **kwargs) -> RedisSessionRepository:
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return RedisSessionRepository(
+        "", 0, "", "", logging.getLogger(), client=client, **kwargs
+    )
+
+
+def test_all():
+    repo = get_repo(fakeredis.FakeServer())
+    user_uuid = "this_is_a_test"
+    session_uuid = repo.create_session(user_uuid)
+    assert repo.exist_session(session_uuid)
+    assert repo.get_session_user_uuid(session_uuid) == user_uuid
+
+    assert repo.delete_session(session_uuid)
+    assert not repo.exist_session(session_uuid)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(session_uuid)
+
+
+def test_shared_between_workers():
+    server = fakeredis.FakeServer()
+    worker1 = get_repo(server)
+    worker2 = get_repo(server)
+    session_uuid = worker1.create_session("user")
+    assert worker2.get_session_user_uuid(session_uuid) == "user"
+    worker2.delete_session(session_uuid)
+    assert not worker1.exist_session(session_uuid)
+
+
+def test_ttl():
+    server = fakeredis.FakeServer()
+    repo = get_repo(server, ttl=100)
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    session_uuid = repo.create_session("user")
+    assert 0 < client.ttl(f"session:{session_uuid}") <= 100
+
+
+def test_sliding_expiry():
+    server = fakeredis.FakeServer()
+    repo = get_repo(server, ttl=100, sliding_expiry=True)
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    session_uuid = repo.create_session("user")
+    client.expire(f"session:{session_uuid}", 1)
+    assert repo.get_session_user_uuid(session_uuid) == "user"
+    assert client.ttl(f"session:{session_uuid}") > 1
+
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid("not_exist")
+    assert not client.exists("session:not_exist")
+
+
+def test_sessions_for_user():
+    server = fakeredis.FakeServer()
+    worker1 = get_repo(server)
+    worker2 = get_repo(server)
+    sessions = [worker1.create_session("user1") for _ in range(3)]
+    other = worker2.create_session("user2")
+    assert worker2.count_sessions_for_user("user1") == 3
+    worker2.delete_session(sessions[0])
+    assert worker1.count_sessions_for_user("user1") == 2
+    assert sorted(worker2.delete_sessions_for_user("user1")) == sorted(sessions[1:])
+    assert not any(worker1.exist_session(s) for s in sessions)
+    assert worker1.count_sessions_for_user("user1") == 0
+    assert worker1.exist_session(other)
+
+
+def test_max_sessions_per_user():
+    repo = get_repo(fakeredis.FakeServer(), max_sessions_per_user=2)
+    sessions = [repo.create_session("user1") for _ in range(5)]
+    assert [repo.exist_session(s) for s in sessions] == [False] * 3 + [True] * 2
+    assert repo.count_sessions_for_user("user1") == 2
@@ -0,0 +1,107 @@
+import logging
+import threading
+import pytest
+from authapp.repositories.session.sharded import ShardedSessionRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_all():
+    repo = ShardedSessionRepository(logging.getLogger())
+    session_uuid = repo.create_session("user-uuid")
+    assert repo.exist_session(session_uuid)
+    assert repo.get_session_user_uuid(session_uuid) == "user-uuid"
+    assert repo.delete_session(session_uuid)
+    assert not repo.delete_session(session_uuid)
+    assert not repo.exist_session(session_uuid)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(session_uuid)
+
+
+def test_expiry():
+    clock = FakeClock()
+    repo = ShardedSessionRepository(logging.getLogger(), ttl=10, shards=1, clock=clock)
+    old = [repo.create_session(f"user{i}") for i in range(3)]
+    clock.now = 5
+    new = repo.create_session("user3")
+    clock.now = 11
+    assert not repo.exist_session(old[0])
+    assert repo.get_session_user_uuid(new) == "user3"
+    # writes drop expired entries from the LRU end
+    repo.create_session("user4")
+    stats = repo.stats()
+    assert stats["size"] == 2
+    assert stats["expirations"] == 3
+
+
+def test_bounded_size():
+    repo = ShardedSessionRepository(logging.getLogger(), shards=4, maxsize=40)
+    sessions = [repo.create_session(f"user{i}") for i in range(1000)]
+    stats = repo.stats()
+    assert stats["size"] <= 40
+    assert stats["max_shard_size"] == 10
+    assert stats["evictions"] == 1000 - stats["size"]
+    assert repo.exist_session(sessions[-1])
+
+    # a recently read session survives eviction in its shard
+    repo = ShardedSessionRepository(logging.getLogger(), shards=1, maxsize=3)
+    first = repo.create_session("user0")
+    second = repo.create_session("user1")
+    repo.create_session("user2")
+    repo.get_session_user_uuid(first)
+    repo.create_session("user3")
+    assert repo.exist_session(first)
+    assert not repo.exist_session(second)
+
+
+def test_threads():
+    repo = ShardedSessionRepository(logging.getLogger(), shards=8)
+    errors = []
+
+    def run(n: int):
+        try:
+            for i in range(500):
+                session_uuid = repo.create_session(f"user{n}")
+                assert repo.get_session_user_uuid(session_uuid) == f"user{n}"
+                if i % 2:
+                    assert repo.delete_session(session_uuid)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(8)]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    assert errors == []
+    assert repo.stats()["size"] == 8 * 250
+
+
+def test_sessions_for_user():
+    clock = FakeClock()
+    repo = ShardedSessionRepository(logging.getLogger(), ttl=10, clock=clock)
+    sessions = [repo.create_session("user1") for _ in range(3)]
+    other = repo.create_session("user2")
+    assert repo.count_sessions_for_user("user1") == 3
+    repo.delete_session(sessions[0])
+    assert repo.count_sessions_for_user("user1") == 2
+    assert sorted(repo.delete_sessions_for_user("user1")) == sorted(sessions[1:])
+    assert not any(repo.exist_session(s) for s in sessions)
+    assert repo.count_sessions_for_user("user1") == 0
+    assert repo.exist_session(other)
+
+    # expired sessions are not counted
+    clock.now = 10
+    assert repo.count_sessions_for_user("user2") == 0
+    assert repo.delete_sessions_for_user("user2") == []
+
+
+def test_max_sessions_per_user():
+    repo = ShardedSessionRepository(logging.getLogger(), max_sessions_per_user=2)
+    sessions = [repo.create_session("user1") for _ in range(5)]
+    assert [repo.exist_session(s) for s in sessions] == [False] * 3 + [True] * 2
+    assert repo.count_sessions_for_user("user1") == 2
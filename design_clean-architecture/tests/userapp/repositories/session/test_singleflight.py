@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import threading
+import time
+import pytest
+from authapp.repositories.session.adapter import AsyncSessionRepositoryAdapter
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.session.singleflight import (
+    AsyncSingleFlightSessionRepository,
+    SingleFlightSessionRepository,
+)
+
+
+class SlowSessionRepository(MockSessionRepository):
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger)
+        self.calls = 0
+
+    def get_session_user_uuid(self, session_uuid: str) -> str:
+        self.calls += 1
+        time.sleep(0.1)
+        return super().get_session_user_uuid(session_uuid)
+
+
+def test_coalesce():
+    backend = SlowSessionRepository(logging.getLogger())
+    repo = SingleFlightSessionRepository(backend, logging.getLogger())
+    session_uuid = repo.create_session("user-uuid")
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(repo.get_session_user_uuid(session_uuid))
+        )
+        for _ in range(10)
+    ]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    assert backend.calls == 1
+    assert results == ["user-uuid"] * 10
+
+    repo.delete_session(session_uuid)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(session_uuid)
+
+
+def test_coalesce_async():
+    asyncio.run(_test_coalesce_async())
+
+
+async def _test_coalesce_async():
+    backend = SlowSessionRepository(logging.getLogger())
+    repo = AsyncSingleFlightSessionRepository(
+        AsyncSessionRepositoryAdapter(backend, offload=True), logging.getLogger()
+    )
+    session_uuid = await repo.create_session("user-uuid")
+    results = await asyncio.gather(
+        *[repo.get_session_user_uuid(session_uuid) for _ in range(10)]
+    )
+    assert backend.calls == 1
+    assert results == ["user-uuid"] * 10
+    assert repo.stats()["coalesced"] == 9
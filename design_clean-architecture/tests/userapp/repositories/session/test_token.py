@@ -0,0 +1,198 @@
+import logging
+import random
+import pytest
+from authapp.exceptions import ServerException
+from authapp.repositories.session.invalidation import LocalInvalidationChannel
+from authapp.repositories.session.token import (
+    RevocationList,
+    SignedTokenSessionRepository,
+    parse_keys,
+)
+
+KEYS = [("k1", b"secret1")]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_all():
+    repo = SignedTokenSessionRepository(logging.getLogger(), keys=KEYS)
+    token = repo.create_session("user-uuid")
+    assert repo.exist_session(token)
+    assert repo.get_session_user_uuid(token) == "user-uuid"
+
+    # another process with the same keys accepts the token
+    other = SignedTokenSessionRepository(logging.getLogger(), keys=KEYS)
+    assert other.get_session_user_uuid(token) == "user-uuid"
+
+    assert repo.delete_session(token)
+    assert not repo.exist_session(token)
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid(token)
+
+
+def test_tampered():
+    repo = SignedTokenSessionRepository(logging.getLogger(), keys=KEYS)
+    token = repo.create_session("user-uuid")
+    key_id, user_uuid, expires_at, token_id, signature = token.split(".")
+    forged = [
+        ".".join([key_id, "other-uuid", expires_at, token_id, signature]),
+        ".".join([key_id, user_uuid, str(int(expires_at) + 1), token_id, signature]),
+        ".".join(["k2", user_uuid, expires_at, token_id, signature]),
+        "not_a_token",
+        "",
+    ]
+    for value in forged:
+        assert not repo.exist_session(value)
+        assert not repo.delete_session(value)
+    other = SignedTokenSessionRepository(logging.getLogger(), keys=[("k1", b"x")])
+    assert not other.exist_session(token)
+
+
+def test_expiry():
+    clock = FakeClock()
+    repo = SignedTokenSessionRepository(
+        logging.getLogger(), keys=KEYS, ttl=10, clock=clock
+    )
+    token = repo.create_session("user-uuid")
+    clock.now += 9
+    assert repo.exist_session(token)
+    clock.now += 1
+    assert not repo.exist_session(token)
+
+
+def test_key_rotation():
+    repo = SignedTokenSessionRepository(logging.getLogger(), keys=KEYS)
+    old = repo.create_session("user-uuid")
+    repo.rotate_key("k2", b"secret2")
+    new = repo.create_session("user-uuid")
+    assert new.startswith("k2.")
+    assert repo.exist_session(old)
+    assert repo.exist_session(new)
+
+    repo.drop_key("k1")
+    assert not repo.exist_session(old)
+    assert repo.exist_session(new)
+    with pytest.raises(ValueError):
+        repo.drop_key("k2")
+
+
+def test_revocation_channel():
+    channel = LocalInvalidationChannel()
+    worker1 = SignedTokenSessionRepository(
+        logging.getLogger(), keys=KEYS, channel=channel
+    )
+    worker2 = SignedTokenSessionRepository(
+        logging.getLogger(), keys=KEYS, channel=channel
+    )
+    token = worker1.create_session("user-uuid")
+    assert worker2.exist_session(token)
+    worker1.delete_session(token)
+    assert not worker2.exist_session(token)
+
+
+def test_delete_sessions_for_user():
+    clock = FakeClock()
+    channel = LocalInvalidationChannel()
+    worker1 = SignedTokenSessionRepository(
+        logging.getLogger(), keys=KEYS, channel=channel, clock=clock
+    )
+    worker2 = SignedTokenSessionRepository(
+        logging.getLogger(), keys=KEYS, channel=channel, clock=clock
+    )
+    tokens = [worker1.create_session("user1") for _ in range(2)]
+    other = worker1.create_session("user2")
+    clock.now += 0.001
+    assert worker1.delete_sessions_for_user("user1") == []
+    for worker in [worker1, worker2]:
+        assert not any(worker.exist_session(token) for token in tokens)
+        assert worker.exist_session(other)
+
+    # tokens issued right after are valid, e.g. signin after a password change
+    token = worker1.create_session("user1")
+    assert worker1.exist_session(token)
+    assert worker2.exist_session(token)
+    with pytest.raises(ServerException):
+        worker1.count_sessions_for_user("user1")
+
+
+def test_revocation_list():
+    clock = FakeClock()
+    revoked = RevocationList(capacity=100, clock=clock)
+    # token ids are random 64 bit integers
+    rng = random.Random(0)
+    token_ids = [rng.getrandbits(64) for _ in range(100)]
+    for token_id in token_ids:
+        revoked.add(token_id, int(clock.now) + 10)
+    assert all(revoked.contains(token_id) for token_id in token_ids)
+    others = [rng.getrandbits(64) for _ in range(10000)]
+    false_positives = sum(revoked._bloom.may_contain(token_id) for token_id in others)
+    assert false_positives < 300
+    assert not any(revoked.contains(token_id) for token_id in others)
+
+    # expired ids are purged when the list is full
+    clock.now += 11
+    revoked.add(1, int(clock.now) + 10)
+    assert len(revoked) == 1
+    assert not revoked.contains(token_ids[0])
+    assert revoked.contains(1)
+
+
+def test_revocation_list_grows():
+    # more live revocations than the capacity. purges cannot free anything
+    clock = FakeClock()
+    revoked = RevocationList(capacity=100, clock=clock)
+    rng = random.Random(0)
+    token_ids = [rng.getrandbits(64) for _ in range(1000)]
+    purges = 0
+    purge = revoked._purge
+
+    def counting_purge():
+        nonlocal purges
+        purges += 1
+        purge()
+
+    revoked._purge = counting_purge
+    for token_id in token_ids:
+        revoked.add(token_id, int(clock.now) + 10)
+    # 100 -> 200 -> 400 -> 800 -> 1600
+    assert purges == 4
+    assert revoked._capacity == 1600
+    assert all(revoked.contains(token_id) for token_id in token_ids)
+    others = [rng.getrandbits(64) for _ in range(10000)]
+    bloom = revoked._bloom
+    assert sum(bloom.may_contain(token_id) for token_id in others) < 300
+
+
+def test_parse_keys():
+    assert parse_keys("") == []
+    assert parse_keys("k2:new, k1:old") == [("k2", b"new"), ("k1", b"old")]
+    with pytest.raises(ValueError):
+        parse_keys("no_secret")
+
+
+def test_with_service():
+    from authapp.models.httpbody import SigninBody
+    from authapp.repositories.user.memory import InMemoryUserRepository
+    from authapp.services.auth import AuthService
+
+    logger = logging.getLogger()
+    repo = SignedTokenSessionRepository(logger, keys=KEYS)
+    service = AuthService(InMemoryUserRepository(logger), repo, logger)
+    body = SigninBody(username_or_email="yuichi", password="p@ssw0rd")
+    cookies = service.signin(body)
+    assert service.get_user("yuichi", cookies).username == "yuichi"
+    service.signout(cookies)
+    with pytest.raises(Exception):
+        service.get_user("yuichi", cookies)
+
+    # sign in again right after signing out everywhere
+    cookies = service.signin(body)
+    service.signout_everywhere(cookies)
+    cookies = service.signin(body)
+    assert service.get_user("yuichi", cookies).username == "yuichi"
@@ -0,0 +1,102 @@
+import logging
+import threading
+import pytest
+from authapp.repositories.pool import ConnectionPool
+from authapp.exceptions import ServerException
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_min_max_size():
+    created = []
+
+    def connect():
+        created.append(FakeConnection())
+        return created[-1]
+
+    pool = ConnectionPool(connect, logging.getLogger(), min_size=2, max_size=3)
+    assert len(created) == 2
+
+    with pool.connection() as c1, pool.connection() as c2, pool.connection() as c3:
+        assert len({id(c1), id(c2), id(c3)}) == 3
+        assert pool.stats()["in_use"] == 3
+    assert len(created) == 3
+    assert pool.stats()["idle"] == 3
+
+
+def test_timeout():
+    pool = ConnectionPool(
+        FakeConnection, logging.getLogger(), min_size=0, max_size=1, timeout=0.05
+    )
+    with pool.connection():
+        with pytest.raises(ServerException):
+            with pool.connection():
+                ...
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_wait_and_handoff():
+    pool = ConnectionPool(
+        FakeConnection, logging.getLogger(), min_size=1, max_size=1, timeout=5
+    )
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with pool.connection():
+            borrowed.set()
+            release.wait()
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    borrowed.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection():
+        ...
+    thread.join()
+    stats = pool.stats()
+    assert stats["wait_time_max"] > 0
+    assert stats["created"] == 1
+
+
+def test_recycle_and_broken():
+    pool = ConnectionPool(
+        FakeConnection, logging.getLogger(), min_size=0, max_size=1, recycle_uses=2
+    )
+    with pool.connection() as c1:
+        ...
+    with pool.connection() as c2:
+        assert c2 is c1
+    # recycled after 2 uses
+    assert c1.closed
+    with pool.connection() as c3:
+        assert c3 is not c1
+
+    with pytest.raises(RuntimeError):
+        with pool.connection() as c4:
+            raise RuntimeError()
+    # broken connection is discarded
+    assert c4.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_health_check():
+    pool = ConnectionPool(
+        FakeConnection,
+        logging.getLogger(),
+        min_size=1,
+        max_size=1,
+        health_check=lambda conn: False,
+        health_check_interval=0,
+    )
+    with pool.connection() as c1:
+        ...
+    with pool.connection() as c2:
+        assert c2 is not c1
+    assert c1.closed
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+import pytest
+from authapp.repositories.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_single_flight():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def load(key):
+        calls.append(key)
+        time.sleep(0.1)
+        return key.upper()
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("a", load, "a")))
+        for _ in range(8)
+    ]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    assert calls == ["a"]
+    assert results == ["A"] * 8
+    stats = flight.stats()
+    assert stats["calls"] == 8
+    assert stats["coalesced"] == 7
+    assert stats["in_flight"] == 0
+
+    # nothing is cached after the call
+    assert flight.do("a", load, "a") == "A"
+    assert len(calls) == 2
+
+
+def test_single_flight_error():
+    flight = SingleFlight()
+    errors = []
+
+    def load():
+        time.sleep(0.1)
+        raise KeyError("x")
+
+    def run():
+        try:
+            flight.do("a", load)
+        except KeyError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    assert len(errors) == 4
+    assert flight.stats()["coalesced"] == 3
+
+
+def test_async_single_flight():
+    asyncio.run(_test_async_single_flight())
+
+
+async def _test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        if key == "bad":
+            raise KeyError(key)
+        return key.upper()
+
+    results = await asyncio.gather(
+        *[flight.do("a", load, "a") for _ in range(5)],
+        *[flight.do("b", load, "b") for _ in range(3)],
+    )
+    assert results == ["A"] * 5 + ["B"] * 3
+    assert sorted(calls) == ["a", "b"]
+    stats = flight.stats()
+    assert stats["coalesced"] == 6
+    assert stats["in_flight"] == 0
+
+    results = await asyncio.gather(
+        *[flight.do("bad", load, "bad") for _ in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(result, KeyError) for result in results)
+
+    # a cancelled waiter does not cancel the shared call
+    first = asyncio.ensure_future(flight.do("c", load, "c"))
+    second = asyncio.ensure_future(flight.do("c", load, "c"))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "C"
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -0,0 +1,115 @@
+import logging
+import pytest
+from authapp.repositories.user.cache import CachedUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.exceptions import ClientException
+
+
+def test_all():
+    backend = InMemoryUserRepository(logging.getLogger())
+    repo = CachedUserRepository(backend, logging.getLogger())
+    assert len(repo.get_users()) == 2
+
+    user1 = repo.get_user_by_username("yuichi")
+    assert user1.username == "yuichi"
+    # cached under all keys by the first lookup
+    assert repo.get_user_by_id(user1.id) == user1
+    assert repo.get_user_by_email("iyuichi@vmware.com") == user1
+    stats = repo.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_negative_cache():
+    backend = InMemoryUserRepository(logging.getLogger())
+    repo = CachedUserRepository(backend, logging.getLogger())
+    for _ in range(3):
+        with pytest.raises(ClientException):
+            repo.get_user_by_username("tanzu")
+    stats = repo.stats()
+    assert stats["misses"] == 1
+    assert stats["negative_hits"] == 2
+
+    # signup invalidates "not found"
+    repo.create_user_atomically("tanzu", "tanzu@vmware.com", "p@ssw0rd")
+    assert repo.get_user_by_username("tanzu").email == "tanzu@vmware.com"
+
+
+def test_create_failure_keeps_cache_consistent():
+    backend = InMemoryUserRepository(logging.getLogger())
+    repo = CachedUserRepository(backend, logging.getLogger())
+    with pytest.raises(ClientException):
+        repo.get_user_by_email("new@vmware.com")
+    with pytest.raises(ClientException):
+        # username already exist
+        repo.create_user_atomically("yuichi", "new@vmware.com", "p@ssw0rd")
+    with pytest.raises(ClientException):
+        repo.get_user_by_email("new@vmware.com")
+    assert repo.get_user_by_username("yuichi").username == "yuichi"
+
+
+def test_get_users_by_keys():
+    backend = InMemoryUserRepository(logging.getLogger())
+    repo = CachedUserRepository(backend, logging.getLogger())
+    yuichi = repo.get_user_by_username("yuichi")
+
+    users = repo.get_users_by_usernames(["yuichi", "shunsuke", "taro"])
+    assert sorted(user.username for user in users) == ["shunsuke", "yuichi"]
+    stats = repo.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+    # everything is cached now, including "taro" as not found
+    users = repo.get_users_by_usernames(["yuichi", "shunsuke", "taro"])
+    assert len(users) == 2
+    assert repo.get_users_by_ids([yuichi.id]) == [yuichi]
+    stats = repo.stats()
+    assert stats["misses"] == 3
+    assert stats["negative_hits"] == 1
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    backend = InMemoryUserRepository(logging.getLogger())
+    repo = CachedUserRepository(backend, logging.getLogger())
+    get_user_by_username = backend.get_user_by_username
+
+    def read_then_write(username):
+        # the read finishes, then a password change lands before it is cached
+        user = get_user_by_username(username)
+        repo.modify_user_atomically(user.username, user.email, "new")
+        return user
+
+    backend.get_user_by_username = read_then_write
+    assert repo.get_user_by_username("yuichi").hashed_password != "new"
+    backend.get_user_by_username = get_user_by_username
+    assert repo.get_user_by_username("yuichi").hashed_password == "new"
+
+    def not_found_then_signup(username):
+        try:
+            return get_user_by_username(username)
+        finally:
+            repo.create_user_atomically(username, "tanzu@vmware.com", "p@ssw0rd")
+
+    backend.get_user_by_username = not_found_then_signup
+    with pytest.raises(ClientException):
+        repo.get_user_by_username("tanzu")
+    backend.get_user_by_username = get_user_by_username
+    assert repo.get_user_by_username("tanzu").email == "tanzu@vmware.com"
+
+    repo = CachedUserRepository(backend, logging.getLogger())
+    get_users_by_usernames = backend.get_users_by_usernames
+
+    def batch_then_write(usernames):
+        users = get_users_by_usernames(usernames)
+        for user in users:
+            repo.modify_user_atomically(user.username, user.email, "newer")
+        return users
+
+    backend.get_users_by_usernames = batch_then_write
+    users = repo.get_users_by_usernames(["shunsuke", "yuichi"])
+    assert users and all(user.hashed_password != "newer" for user in users)
+    backend.get_users_by_usernames = get_users_by_usernames
+    users = repo.get_users_by_usernames(["shunsuke", "yuichi"])
+    assert all(user.hashed_password == "newer" for user in users)
+    # nothing is left behind once no load is in flight
+    assert not repo._invalidated
@@ -0,0 +1,35 @@
+import random
+from operator import itemgetter
+
+import pytest
+from authapp.repositories.user.index import SortedIndex
+
+
+def test_page():
+    index = SortedIndex()
+    keys = random.sample(range(10000), 5000)
+    for key in keys:
+        index.add(key)
+    assert len(index) == 5000
+    assert len(index._buckets) > 1
+
+    expected = sorted(keys)
+    pages = []
+    after = None
+    while page := index.page(100, after):
+        pages.extend(page)
+        after = page[-1]
+    assert pages == expected
+    assert index.page(3, expected[10]) == expected[11:14]
+
+
+def test_replace():
+    index = SortedIndex(key=itemgetter(0))
+    for key in range(2000):
+        index.add((key, "old"))
+    index.replace((5, "new"))
+    index.replace((1999, "new"))
+    assert index.page(2, 4) == [(5, "new"), (6, "old")]
+    assert index.page(2, 1998) == [(1999, "new")]
+    with pytest.raises(KeyError):
+        index.replace((2000, "new"))
@@ -0,0 +1,140 @@
+import logging
+import pytest
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.exceptions import ClientException
+from authapp.models.user import UserSchema
+from authapp.util import get_hashed_password, get_random_uuid
+
+
+def test_all():
+    repo = InMemoryUserRepository(logging.getLogger())
+    assert len(repo.get_users()) == 2
+
+    user1 = repo.get_user_by_id("34b8584f-d79f-4b50-b20f-d0abbc87676e")
+    assert user1.username == "yuichi"
+
+    user2 = repo.get_user_by_username("yuichi")
+    assert user2.username == "yuichi"
+
+    user3 = repo.get_user_by_email("iyuichi@vmware.com")
+    assert user3.username == "yuichi"
+
+    with pytest.raises(ClientException):
+        repo.get_user_by_id("not_exist_uuid")
+
+    with pytest.raises(ClientException):
+        repo.get_user_by_username("taro")
+
+    with pytest.raises(ClientException):
+        repo.get_user_by_email("taro@vmware.com")
+
+
+def test_create():
+    repo = InMemoryUserRepository(logging.getLogger())
+    username = "tanzu"
+    email = "tanzu@vmware.com"
+    password = "weak_password"
+    repo.create_user_atomically(username, email, get_hashed_password(password))
+    assert len(repo.get_users()) == 3
+
+    user1 = repo.get_user_by_username("tanzu")
+    assert user1.username == username
+    assert user1.email == email
+    assert user1.hashed_password == get_hashed_password(password)
+    assert repo.get_user_by_id(user1.id) == user1
+    assert repo.get_user_by_email(email) == user1
+
+    with pytest.raises(ClientException):
+        # username already exist
+        repo.create_user_atomically("tanzu", "tanzu2@vmware.com", password)
+
+    with pytest.raises(ClientException):
+        # email already exist
+        repo.create_user_atomically("tanzu2", "tanzu@vmware.com", password)
+    assert len(repo.get_users()) == 3
+
+
+def test_get_users_without_password():
+    repo = InMemoryUserRepository(logging.getLogger())
+    repo.create_user_atomically("tanzu", "tanzu@vmware.com", "p@ssw0rd")
+    users = repo.get_users()
+    projected = repo.get_users_without_password()
+    assert [u.id for u in projected] == [u.id for u in users]
+    assert [u.email for u in projected] == [u.email for u in users]
+    assert all(not hasattr(u, "hashed_password") for u in projected)
+
+
+def test_get_users_page():
+    repo = InMemoryUserRepository(logging.getLogger())
+    for i in range(10):
+        repo.create_user_atomically(f"user{i}", f"user{i}@vmware.com", "p@ssw0rd")
+    all_ids = sorted(user.id for user in repo.get_users())
+
+    page1 = repo.get_users_page(5)
+    assert [u.id for u in page1] == all_ids[:5]
+    page2 = repo.get_users_page(5, page1[-1].id)
+    assert [u.id for u in page2] == all_ids[5:10]
+    page3 = repo.get_users_page(5, page2[-1].id)
+    assert [u.id for u in page3] == all_ids[10:]
+
+
+def test_modify():
+    repo = InMemoryUserRepository(logging.getLogger())
+    repo.create_user_atomically("tanzu", "tanzu@vmware.com", "old_hash")
+    repo.modify_user_atomically("tanzu", "tanzu2@vmware.com", "new_hash")
+    user = repo.get_user_by_username("tanzu")
+    assert user.email == "tanzu2@vmware.com"
+    assert user.hashed_password == "new_hash"
+    assert repo.get_user_by_email("tanzu2@vmware.com") == user
+
+    # initial users
+    repo.modify_user_atomically("yuichi", "iyuichi@vmware.com", "new_hash")
+    assert repo.get_user_by_username("yuichi").hashed_password == "new_hash"
+
+    with pytest.raises(ClientException):
+        # email already exist
+        repo.modify_user_atomically("tanzu", "iyuichi@vmware.com", "new_hash")
+
+    with pytest.raises(ClientException):
+        repo.modify_user_atomically("taro", "taro@vmware.com", "new_hash")
+
+
+def test_bulk_create_users():
+    repo = InMemoryUserRepository(logging.getLogger())
+    users = [
+        UserSchema(
+            id=get_random_uuid(),
+            username=f"user{i}",
+            email=f"user{i}@vmware.com",
+            hashed_password=get_hashed_password("p@ssw0rd"),
+        )
+        for i in range(10)
+    ]
+    users.append(users[0].model_copy(update={"id": get_random_uuid()}))
+    users.append(users[1].model_copy(update={"username": "other"}))
+    reasons = repo.bulk_create_users(users)
+    assert reasons == [None] * 10 + [
+        "username is already used",
+        "email is already used",
+    ]
+    assert len(repo.get_users()) == 12
+    assert repo.get_user_by_username("user9") == users[9]
+    assert repo.get_user_by_email("user9@vmware.com") == users[9]
+
+
+def test_get_users_by_keys():
+    repo = InMemoryUserRepository(logging.getLogger())
+    for i in range(10):
+        repo.create_user_atomically(f"user{i}", f"user{i}@vmware.com", "p@ssw0rd")
+    names = ["user1", "user8", "yuichi", "taro", "user1"]
+    users = repo.get_users_by_usernames(names)
+    assert sorted(user.username for user in users) == ["user1", "user8", "yuichi"]
+    assert all(repo.get_user_by_username(user.username) == user for user in users)
+
+    ids = [user.id for user in users] + ["not_exist_uuid"]
+    assert sorted(repo.get_users_by_ids(ids), key=lambda u: u.id) == sorted(
+        users, key=lambda u: u.id
+    )
+    emails = ["user9@vmware.com", "taro@vmware.com"]
+    assert [user.username for user in repo.get_users_by_emails(emails)] == ["user9"]
+    assert repo.get_users_by_ids([]) == []
@@ -0,0 +1,78 @@
+import logging
+import os
+import pytest
+from authapp.exceptions import ClientException
+
+# needs a running postgres. e.g. `docker compose up` in rdb_postgres
+HOST = os.environ.get("TEST_USER_DB_HOST")
+pytestmark = pytest.mark.skipif(HOST is None, reason="TEST_USER_DB_HOST is not set")
+
+
+@pytest.fixture
+def repo():
+    from authapp.repositories.user.postgres import PostgresUserRepository
+
+    repo = PostgresUserRepository(
+        HOST,
+        int(os.environ.get("TEST_USER_DB_PORT", "5432")),
+        os.environ.get("TEST_USER_DB_USER", "user"),
+        os.environ.get("TEST_USER_DB_PASSWORD", "password"),
+        logging.getLogger(),
+        database=os.environ.get("TEST_USER_DB_NAME", "database"),
+    )
+    with repo._pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE users")
+    return repo
+
+
+def test_create(repo):
+    repo.create_user_atomically("tanzu", "tanzu@vmware.com", "weak_password")
+
+    user1 = repo.get_user_by_username("tanzu")
+    assert repo.get_user_by_email("tanzu@vmware.com") == user1
+    assert repo.get_user_by_id(user1.id) == user1
+    assert len(repo.get_users()) == 1
+
+    with pytest.raises(ClientException):
+        repo.create_user_atomically("tanzu", "tanzu2@vmware.com", "weak_password")
+    with pytest.raises(ClientException):
+        repo.create_user_atomically("tanzu2", "tanzu@vmware.com", "weak_password")
+    with pytest.raises(ClientException):
+        repo.get_user_by_id("not_exist_uuid")
+    assert repo.get_pool_stats()["wait_count"] > 0
+
+
+def test_bulk_create_users(repo):
+    from authapp.models.user import UserSchema
+    from authapp.util import get_random_uuid
+
+    users = [
+        UserSchema(
+            id=get_random_uuid(),
+            username=f"user{i}",
+            email=f"user{i}@vmware.com",
+            hashed_password="weak_password",
+        )
+        for i in range(10)
+    ]
+    users.append(users[0].model_copy(update={"id": get_random_uuid()}))
+    users.append(users[1].model_copy(update={"username": "other"}))
+    reasons = repo.bulk_create_users(users)
+    assert reasons == [None] * 10 + [
+        "username is already used",
+        "email is already used",
+    ]
+    assert len(repo.get_users()) == 10
+    assert repo.get_user_by_username("user9") == users[9]
+
+
+def test_get_users_by_keys(repo):
+    for i in range(5):
+        repo.create_user_atomically(f"user{i}", f"user{i}@vmware.com", "weak_password")
+    users = repo.get_users_by_usernames(["user1", "user3", "taro"])
+    assert sorted(user.username for user in users) == ["user1", "user3"]
+    ids = [user.id for user in users] + ["not_exist_uuid"]
+    assert len(repo.get_users_by_ids(ids)) == 2
+    assert len(repo.get_users_by_emails(["user4@vmware.com"])) == 1
+    assert repo.get_users_by_ids([]) == []
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import threading
+import time
+from authapp.repositories.user.adapter import AsyncUserRepositoryAdapter
+from authapp.repositories.user.memory import InMemoryUserRepository
+from authapp.repositories.user.singleflight import (
+    AsyncSingleFlightUserRepository,
+    SingleFlightUserRepository,
+)
+
+
+class SlowUserRepository(InMemoryUserRepository):
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger)
+        self.calls = 0
+
+    def get_user_by_username(self, username: str):
+        self.calls += 1
+        time.sleep(0.1)
+        return super().get_user_by_username(username)
+
+
+def test_coalesce():
+    backend = SlowUserRepository(logging.getLogger())
+    repo = SingleFlightUserRepository(backend, logging.getLogger())
+    users = []
+    threads = [
+        threading.Thread(
+            target=lambda: users.append(repo.get_user_by_username("yuichi"))
+        )
+        for _ in range(10)
+    ]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    assert backend.calls == 1
+    assert {user.username for user in users} == {"yuichi"}
+    assert repo.stats()["coalesced"] == 9
+
+    # writes pass through
+    repo.create_user_atomically("tanzu", "tanzu@vmware.com", "p@ssw0rd")
+    assert repo.get_user_by_username("tanzu").email == "tanzu@vmware.com"
+
+
+def test_coalesce_async():
+    asyncio.run(_test_coalesce_async())
+
+
+async def _test_coalesce_async():
+    backend = SlowUserRepository(logging.getLogger())
+    repo = AsyncSingleFlightUserRepository(
+        AsyncUserRepositoryAdapter(backend, offload=True), logging.getLogger()
+    )
+    users = await asyncio.gather(
+        *[repo.get_user_by_username("yuichi") for _ in range(10)]
+    )
+    assert backend.calls == 1
+    assert {user.username for user in users} == {"yuichi"}
+    assert repo.stats()["coalesced"] == 9
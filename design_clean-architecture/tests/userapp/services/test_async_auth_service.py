@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import pytest
+from authapp.services.async_auth import AsyncAuthService
+from authapp.repositories.session.adapter import AsyncSessionRepositoryAdapter
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.user.adapter import AsyncUserRepositoryAdapter
+from authapp.repositories.user.mock import MockUserRepository
+from authapp.models.httpbody import SigninBody, SignupBody
+from authapp.exceptions import ClientException
+from authapp.hashing import PasswordHasher
+
+
+def get_service(offload: bool) -> AsyncAuthService:
+    logger = logging.getLogger()
+    return AsyncAuthService(
+        AsyncUserRepositoryAdapter(MockUserRepository(logger), offload),
+        AsyncSessionRepositoryAdapter(MockSessionRepository(logger), offload),
+        logger,
+    )
+
+
+@pytest.mark.parametrize("offload", [False, True])
+def test_all(offload):
+    asyncio.run(_test_all(get_service(offload)))
+
+
+async def _test_all(service: AsyncAuthService):
+    # list_users()
+    users = await service.list_users()
+    assert len(users) == 2
+
+    # signup
+    o = SignupBody(
+        username="tanzu",
+        email="tanzu@vmware.com",
+        password1="p@ssw0rd",
+        password2="p@ssw0rd",
+    )
+    await service.signup(o)
+    users = await service.list_users()
+    assert len(users) == 3
+
+    # signup dup username
+    with pytest.raises(ClientException):
+        await service.signup(
+            SignupBody(
+                username="tanzu",
+                email="tanzu2@vmware.com",
+                password1="p@ssw0rd",
+                password2="p@ssw0rd",
+            )
+        )
+
+    # signin
+    cookies = await service.signin(
+        SigninBody(username_or_email="tanzu", password="p@ssw0rd")
+    )
+
+    # signin not exist user
+    with pytest.raises(ClientException):
+        await service.signin(SigninBody(username_or_email="guest", password="p@ssw0rd"))
+
+    # get user
+    user = await service.get_user("tanzu", cookies)
+    assert user.username == "tanzu"
+
+    # get other user
+    with pytest.raises(ClientException):
+        await service.get_user("yuichi", cookies)
+
+    # signout
+    await service.signout(cookies)
+    with pytest.raises(ClientException):
+        await service.get_user("tanzu", cookies)
+
+    # signout everywhere
+    signin = SigninBody(username_or_email="tanzu", password="p@ssw0rd")
+    devices = [await service.signin(signin) for _ in range(2)]
+    await service.signout_everywhere(devices[0])
+    for device in devices:
+        with pytest.raises(ClientException):
+            await service.get_user("tanzu", device)
+    with pytest.raises(ClientException):
+        await service.signout_everywhere(devices[0])
+
+
+class RecordingHasher(PasswordHasher):
+    def __init__(self):
+        super().__init__(logging.getLogger(), cost=10)
+        self.verified: list[str] = []
+
+    async def verify_async(self, raw_password: str, hashed_password: str) -> bool:
+        self.verified.append(hashed_password)
+        return await super().verify_async(raw_password, hashed_password)
+
+
+def test_signin_unknown_user_verifies_a_hash():
+    logger = logging.getLogger()
+    hasher = RecordingHasher()
+    service = AsyncAuthService(
+        AsyncUserRepositoryAdapter(MockUserRepository(logger), False),
+        AsyncSessionRepositoryAdapter(MockSessionRepository(logger), False),
+        logger,
+        hasher,
+    )
+    body = SigninBody(username_or_email="guest", password="p@ssw0rd")
+    with pytest.raises(ClientException):
+        asyncio.run(service.signin(body))
+    assert hasher.verified == [hasher.get_dummy_hash()]
@@ -0,0 +1,110 @@
+import logging
+import pytest
+from authapp.services.auth import AuthService
+from authapp.services.importer import PreparedBatch, iter_batches, iter_lines
+from authapp.exceptions import ClientException
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+import authapp.const as const
+
+HASH = "$pbkdf2-sha256$i=1000$c2FsdA$a2V5"
+
+CSV_LINES = [
+    "username,email,password",
+    "alice,alice@vmware.com,p@ssw0rd",
+    "bob,bob@vmware.com,p@ssw0rd",
+    "",
+    "bad name,carol@vmware.com,p@ssw0rd",
+    "dave,not_email,p@ssw0rd",
+    "erin,erin@vmware.com,",
+    "alice,alice2@vmware.com,p@ssw0rd",
+    "yuichi,yuichi@vmware.com,p@ssw0rd",
+]
+
+
+def test_iter_batches():
+    batches = list(iter_batches(CSV_LINES, const.IMPORT_FORMAT_CSV, 3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert batches[0][0] == (
+        2,
+        {"username": "alice", "email": "alice@vmware.com", "password": "p@ssw0rd"},
+    )
+    # blank line is skipped but still counted
+    assert batches[0][2][0] == 5
+
+    lines = ['{"username": "alice"}', "[]", "{broken"]
+    batches = list(iter_batches(lines, const.IMPORT_FORMAT_NDJSON, 10))
+    assert batches == [[(1, {"username": "alice"}), (2, {}), (3, {})]]
+
+
+def test_iter_lines():
+    chunks = [b"a,b\nc", b"", b",d\n\ne", b",f"]
+    assert list(iter_lines(chunks)) == ["a,b", "c,d", "", "e,f"]
+    # consumed lazily
+    lines = iter_lines(iter([b"a\nb", b"c\n"]))
+    assert next(lines) == "a"
+
+
+def test_undecodable_line():
+    # latin-1, not UTF-8. only that row is rejected
+    chunks = [
+        b"username,email,password\n",
+        b"j\xf6rg,j@vmware.com,pw\nbob,b@vmware.com,pw",
+    ]
+    batches = list(iter_batches(iter_lines(chunks), const.IMPORT_FORMAT_CSV, 10))
+    assert batches == [
+        [(2, {}), (3, {"username": "bob", "email": "b@vmware.com", "password": "pw"})]
+    ]
+    prepared = PreparedBatch(batches[0])
+    assert prepared.usernames == ["bob"]
+    assert [(r.line, r.reason) for r in prepared.rejected] == [
+        (2, "line could not be parsed")
+    ]
+
+    with pytest.raises(ClientException):
+        list(iter_batches(iter_lines([b"n\xe4me\n"]), const.IMPORT_FORMAT_CSV, 10))
+
+
+def test_prepared_batch():
+    batch = [
+        (1, {"username": "alice", "email": "alice@vmware.com", "password": "pw"}),
+        (2, {"username": "bob", "email": "bob@vmware.com", "hashed_password": HASH}),
+        (3, {"username": "bob", "email": "bob2@vmware.com", "password": "pw"}),
+        (4, {"username": "carol", "email": "bad"}),
+        (5, {"username": "dave", "email": "d@vmware.com", "hashed_password": "h"}),
+        # prefix of the legacy placeholder of util.get_hashed_password()
+        (6, {"username": "eve", "email": "e@vmware.com", "hashed_password": "hashed_"}),
+    ]
+    prepared = PreparedBatch(batch)
+    assert prepared.lines == [1, 2]
+    assert prepared.raw_passwords == ["pw"]
+    assert [(r.line, r.reason) for r in prepared.rejected] == [
+        (3, "username is duplicated in the input"),
+        (4, "email format invalid"),
+        (5, "hashed password format invalid"),
+        (6, "hashed password format invalid"),
+    ]
+    users = prepared.to_users(["$scrypt$ln=4,r=8,p=1$c2FsdA$a2V5"])
+    assert [user.hashed_password for user in users] == [
+        "$scrypt$ln=4,r=8,p=1$c2FsdA$a2V5",
+        HASH,
+    ]
+
+
+def test_import_users():
+    logger = logging.getLogger()
+    service = AuthService(
+        InMemoryUserRepository(logger), MockSessionRepository(logger), logger
+    )
+    report = service.import_users(CSV_LINES, const.IMPORT_FORMAT_CSV, batch_size=2)
+    assert report.total == 7
+    assert report.imported == 2
+    assert [(r.line, r.reason) for r in report.rejected] == [
+        (5, "username format invalid"),
+        (6, "email format invalid"),
+        (7, "password is missing"),
+        (8, "username is already used"),
+        (9, "username is already used"),
+    ]
+    assert len(service.list_users()) == 4
+    assert service._challenge_password("alice", "p@ssw0rd").username == "alice"
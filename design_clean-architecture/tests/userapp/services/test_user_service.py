@@ -5,6 +5,7 @@ from authapp.repositories.session.mock import MockSessionRepository
 from authapp.repositories.user.mock import MockUserRepository
 from authapp.models.httpbody import SigninBody, SignupBody
 from authapp.exceptions import ClientException
+from authapp.hashing import PasswordHasher
 
 
 def test_all():
@@ -60,3 +61,68 @@ def test_all():
 
     # get user
     service.get_user("tanzu", cookies)
+
+
+def test_rehash_on_signin():
+    logger = logging.getLogger()
+    user_repo = MockUserRepository(logger)
+    service = AuthService(user_repo, MockSessionRepository(logger), logger)
+    # initial users have placeholder hashes
+    assert user_repo.get_user_by_username("yuichi").hashed_password.startswith(
+        "hashed_"
+    )
+
+    service.signin(SigninBody(username_or_email="yuichi", password="p@ssw0rd"))
+    hashed = user_repo.get_user_by_username("yuichi").hashed_password
+    assert hashed.startswith("$scrypt$")
+
+    # still able to signin with upgraded hash
+    service.signin(SigninBody(username_or_email="yuichi", password="p@ssw0rd"))
+    assert user_repo.get_user_by_username("yuichi").hashed_password == hashed
+    with pytest.raises(ClientException):
+        service.signin(SigninBody(username_or_email="yuichi", password="wrong"))
+
+
+def test_signout_everywhere():
+    logger = logging.getLogger()
+    session_repo = MockSessionRepository(logger)
+    service = AuthService(MockUserRepository(logger), session_repo, logger)
+    signin = SigninBody(username_or_email="yuichi", password="p@ssw0rd")
+    devices = [service.signin(signin) for _ in range(3)]
+    other = service.signin(
+        SigninBody(username_or_email="shunsuke", password="p@ssw0rd")
+    )
+    assert session_repo.count_sessions_for_user(devices[0]["user_id"]) == 3
+
+    service.signout_everywhere(devices[0])
+    for device in devices:
+        with pytest.raises(ClientException):
+            service.get_user("yuichi", device)
+    assert service.get_user("shunsuke", other).username == "shunsuke"
+    with pytest.raises(ClientException):
+        service.signout_everywhere(devices[0])
+
+
+class RecordingHasher(PasswordHasher):
+    def __init__(self):
+        super().__init__(logging.getLogger(), cost=10)
+        self.verified: list[str] = []
+
+    def verify(self, raw_password: str, hashed_password: str) -> bool:
+        self.verified.append(hashed_password)
+        return super().verify(raw_password, hashed_password)
+
+
+def test_signin_unknown_user_verifies_a_hash():
+    # an unknown account costs a hash verification like a wrong password
+    logger = logging.getLogger()
+    hasher = RecordingHasher()
+    service = AuthService(
+        MockUserRepository(logger), MockSessionRepository(logger), logger, hasher
+    )
+    for username_or_email in ["guest", "guest@example.com", "not valid!"]:
+        with pytest.raises(ClientException):
+            service.signin(
+                SigninBody(username_or_email=username_or_email, password="p@ssw0rd")
+            )
+    assert hasher.verified == [hasher.get_dummy_hash()] * 3
@@ -0,0 +1,100 @@
+import subprocess
+import sys
+
+import pytest
+import authapp.const as const
+from authapp.di import DiContainer
+from authapp.parameter import Parameter
+from authapp.repositories.session.near_cache import NearCacheSessionRepository
+from authapp.repositories.session.sharded import ShardedSessionRepository
+from authapp.repositories.session.singleflight import SingleFlightSessionRepository
+from authapp.repositories.user.cache import CachedUserRepository
+from authapp.repositories.user.memory import InMemoryUserRepository
+
+_CHECK_MODULES = """
+import sys
+import authapp.__main__
+print(" ".join(sorted({"pandas", "psycopg2", "redis", "uvicorn"} & set(sys.modules))))
+"""
+
+
+def test_backends_are_imported_lazily():
+    # a fresh interpreter. this one has imported every backend already
+    output = subprocess.run(
+        [sys.executable, "-c", _CHECK_MODULES],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.split() == []
+
+
+def test_get_repository():
+    params = Parameter()
+    params.metrics = "true"
+    params.user_repository_type = "metrics(cached(memory))"
+    dic = DiContainer(params)
+    logger = dic._get_logger()
+    repository = dic._get_user_repository(logger)
+    assert isinstance(repository, CachedUserRepository)
+    assert isinstance(repository._backend, InMemoryUserRepository)
+    # one instance per spec
+    assert dic._get_user_repository(logger) is repository
+    assert dic._get_user_backend_type() == const.USER_REPOSITORY_TYPE_MEMORY
+    repository.get_user_by_username("yuichi")
+    text = dic.get_metrics().render()
+    assert 'layer="user_repository:CachedUserRepository"' in text
+    assert 'authapp_component_stat{component="user_cache",name="misses"} 1' in text
+
+    # the cache flag wraps the spec
+    params.user_repository_type = "memory"
+    params.user_repository_cache = "true"
+    repository = DiContainer(params)._get_user_repository(logger)
+    assert isinstance(repository, CachedUserRepository)
+
+    params.session_repository_type = "single_flight(near_cache(sharded))"
+    dic = DiContainer(params)
+    repository = dic._get_session_repository(logger)
+    assert 'component="session_near_cache",name="hits"' in dic.get_metrics().render()
+    assert isinstance(repository, SingleFlightSessionRepository)
+    assert isinstance(repository._backend, NearCacheSessionRepository)
+    assert isinstance(repository._backend._backend, ShardedSessionRepository)
+
+    for spec in ["unknown", "unknown(memory)", "cached(memory"]:
+        params.user_repository_type = spec
+        with pytest.raises(ValueError):
+            DiContainer(params)._get_user_repository(logger)
+
+    params.session_repository_type = const.SESSION_REPOSITORY_TYPE_TOKEN
+    params.session_max_per_user = "1"
+    with pytest.raises(ValueError):
+        DiContainer(params)._get_session_repository(logger)
+    params.metrics = "false"
+    params.session_max_per_user = "0"
+    params.session_repository_type = "metrics(token)"
+    with pytest.raises(ValueError):
+        DiContainer(params)._get_session_repository(logger)
+
+
+class FakePostgresUserRepository(InMemoryUserRepository):
+    def __init__(self, host, port, user, password, logger, **kwargs):
+        super().__init__(logger)
+
+    def get_pool_stats(self) -> dict[str, float]:
+        return {"in_use": 2, "wait_time_total": 0.5}
+
+
+def test_pool_stats(monkeypatch):
+    # no database. the backend class is replaced where it is loaded
+    monkeypatch.setattr(
+        "authapp.di._load", lambda module, name: FakePostgresUserRepository
+    )
+    params = Parameter()
+    params.metrics = "true"
+    params.user_repository_type = const.USER_REPOSITORY_TYPE_POSTGRES
+    params.user_repository_port = "5432"
+    dic = DiContainer(params)
+    dic._get_user_repository(dic._get_logger())
+    text = dic.get_metrics().render()
+    assert 'authapp_component_stat{component="user_db_pool",name="in_use"} 2' in text
+    assert 'component="user_db_pool",name="wait_time_total"} 0.5' in text
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import pytest
+import authapp.const as const
+from authapp.exceptions import ServerException
+from authapp.hashing import PasswordHasher
+from authapp.util import get_hashed_password
+
+
+def test_scrypt():
+    hasher = PasswordHasher(logging.getLogger(), cost=10)
+    hashed = hasher.hash("p@ssw0rd")
+    assert hashed.startswith("$scrypt$ln=10,r=8,p=1$")
+    assert hashed != hasher.hash("p@ssw0rd")
+    assert hasher.verify("p@ssw0rd", hashed)
+    assert not hasher.verify("p@ssw0rd2", hashed)
+    assert not hasher.needs_rehash(hashed)
+
+
+def test_rehash_on_parameter_change():
+    old = PasswordHasher(logging.getLogger(), cost=10)
+    new = PasswordHasher(
+        logging.getLogger(), algorithm=const.PASSWORD_HASH_ALGORITHM_PBKDF2, cost=1000
+    )
+    hashed = old.hash("p@ssw0rd")
+    # parameters are read from the hash string
+    assert new.verify("p@ssw0rd", hashed)
+    assert new.needs_rehash(hashed)
+    assert PasswordHasher(logging.getLogger(), cost=11).needs_rehash(hashed)
+
+    legacy = get_hashed_password("p@ssw0rd")
+    assert new.verify("p@ssw0rd", legacy)
+    assert not new.verify("p@ssw0rd2", legacy)
+    assert new.needs_rehash(legacy)
+
+    assert not new.verify("p@ssw0rd", "$unknown$x=1$abc$abc")
+    assert not new.verify("p@ssw0rd", "broken")
+
+
+def test_dummy_hash():
+    for algorithm, cost in [
+        (const.PASSWORD_HASH_ALGORITHM_SCRYPT, 10),
+        (const.PASSWORD_HASH_ALGORITHM_PBKDF2, 1000),
+    ]:
+        hasher = PasswordHasher(logging.getLogger(), algorithm=algorithm, cost=cost)
+        # same parameters as a real hash, so verifying it costs the same
+        assert not hasher.needs_rehash(hasher.get_dummy_hash())
+        assert not hasher.verify("", hasher.get_dummy_hash())
+        assert not hasher.verify("p@ssw0rd", hasher.get_dummy_hash())
+
+
+def test_process_pool():
+    hasher = PasswordHasher(logging.getLogger(), cost=10, workers=1)
+    try:
+        hashed = hasher.hash("p@ssw0rd")
+        assert hasher.verify("p@ssw0rd", hashed)
+        assert asyncio.run(hasher.verify_async("p@ssw0rd", hashed))
+    finally:
+        hasher.close()
+
+
+def test_async_inline():
+    hasher = PasswordHasher(logging.getLogger(), cost=10)
+    hashed = asyncio.run(hasher.hash_async("p@ssw0rd"))
+    assert asyncio.run(hasher.verify_async("p@ssw0rd", hashed))
+
+
+def test_bounded_queue():
+    hasher = PasswordHasher(logging.getLogger(), cost=10, queue_size=1)
+
+    async def flood():
+        return await asyncio.gather(
+            hasher.hash_async("a"), hasher.hash_async("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(flood())
+    assert isinstance(results[1], ServerException)
+    # slots are released
+    assert hasher.verify("a", results[0])
+
+
+class _CountingSlots:
+    # records how many slots are held at most
+    def __init__(self, slots):
+        self._slots = slots
+        self.acquired = 0
+        self.held = 0
+        self.max_held = 0
+
+    def acquire(self, blocking=True):
+        if not self._slots.acquire(blocking=blocking):
+            return False
+        self.acquired += 1
+        self.held += 1
+        self.max_held = max(self.max_held, self.held)
+        return True
+
+    def release(self):
+        self.held -= 1
+        self._slots.release()
+
+
+def test_hash_many_takes_one_slot_per_hash():
+    hasher = PasswordHasher(logging.getLogger(), cost=4, queue_size=2)
+    slots = hasher._slots = _CountingSlots(hasher._slots)
+    passwords = [f"p@ssw0rd{i}" for i in range(5)]
+    hashed = hasher.hash_many(passwords)
+    assert slots.acquired == 5
+    # one hash at a time without workers. the other slot stays free
+    assert slots.max_held == 1
+    assert slots.held == 0
+    assert all(hasher.verify(p, h) for p, h in zip(passwords, hashed))
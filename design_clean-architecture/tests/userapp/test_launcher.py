@@ -0,0 +1,135 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+import authapp.const as const
+from authapp.di import DiContainer
+from authapp.launcher import get_available_cores
+from authapp.parameter import Parameter
+
+
+def create_params(workers: str, session_type: str, token_keys: str = ""):
+    params = Parameter()
+    params.server_workers = workers
+    params.session_repository_type = session_type
+    params.session_token_keys = token_keys
+    return params
+
+
+def test_get_launcher():
+    # process-local session stores are refused with more than one worker
+    for session_type in [
+        const.SESSION_REPOSITORY_TYPE_MOCK,
+        const.SESSION_REPOSITORY_TYPE_SHARDED,
+        const.SESSION_REPOSITORY_TYPE_COMPACT,
+    ]:
+        DiContainer(create_params("1", session_type)).get_launcher(None)
+        with pytest.raises(ValueError):
+            DiContainer(create_params("2", session_type)).get_launcher(None)
+
+    # every worker must verify the tokens of the others
+    params = create_params("2", const.SESSION_REPOSITORY_TYPE_TOKEN)
+    with pytest.raises(ValueError):
+        DiContainer(params).get_launcher(None)
+    params = create_params("2", const.SESSION_REPOSITORY_TYPE_TOKEN, "k1:secret")
+    launcher = DiContainer(params).get_launcher(None)
+    assert launcher._workers == 2
+    # mock users and no invalidation channel are safe to build before fork
+    assert launcher._preload
+
+    params.user_repository_type = const.USER_REPOSITORY_TYPE_POSTGRES
+    assert not DiContainer(params).get_launcher(None)._preload
+
+    # /metrics would serve the counters of a single worker
+    params.metrics = "true"
+    with pytest.raises(ValueError):
+        DiContainer(params).get_launcher(None)
+    params.server_workers = "1"
+    DiContainer(params).get_launcher(None)
+
+    params = create_params("0", const.SESSION_REPOSITORY_TYPE_REDIS)
+    if get_available_cores() > 1:
+        assert DiContainer(params).get_launcher(None)._workers > 1
+    params.server_workers = "-1"
+    with pytest.raises(ValueError):
+        DiContainer(params).get_launcher(None)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError(url)
+
+
+def get_children(pid: int) -> set[int]:
+    children = set()
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.update(int(child) for child in f.read().split())
+    return children
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="uses /proc")
+def test_launcher():
+    port = get_free_port()
+    url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "authapp",
+            "--workers",
+            "2",
+            "--port",
+            str(port),
+            "--session_cache_type",
+            "token",
+            "--session_token_keys",
+            "k1:secret",
+            "--password_hash_workers",
+            "0",
+            "--log_level",
+            "warning",
+        ],
+    )
+    try:
+        wait_until_ready(url)
+        workers = get_children(process.pid)
+        assert len(workers) == 2
+
+        with httpx.Client(base_url=url) as client:
+            body = {"username_or_email": "yuichi", "password": "p@ssw0rd"}
+            client.post("/api/auth/v1/signin", json=body).raise_for_status()
+            # any worker accepts the token
+            for _ in range(10):
+                response = client.get("/api/auth/v1/users/yuichi")
+                assert response.json()["username"] == "yuichi"
+
+            # reload replaces every worker, and the token stays valid
+            process.send_signal(signal.SIGHUP)
+            deadline = time.monotonic() + 30
+            while get_children(process.pid) & workers:
+                assert time.monotonic() < deadline
+                time.sleep(0.2)
+            assert len(get_children(process.pid)) == 2
+            response = client.get("/api/auth/v1/users/yuichi")
+            assert response.json()["username"] == "yuichi"
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import pytest
+from authapp.metrics import Histogram, MetricsRegistry, instrument
+from authapp.repositories.session.adapter import AsyncSessionRepositoryAdapter
+from authapp.repositories.session.mock import MockSessionRepository
+from authapp.repositories.session.abstract import AbstractSessionRepository
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+    for i in range(1, 101):
+        histogram.observe(i / 1000)
+    # off by at most one bucket
+    assert 0.05 / 1.5 < histogram.quantile(0.5) < 0.05 * 1.5
+    assert 0.099 / 1.5 < histogram.quantile(0.99) < 0.099 * 1.5
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_instrument():
+    registry = MetricsRegistry()
+    repo = instrument(
+        MockSessionRepository(logging.getLogger()), "session_repository", registry
+    )
+    assert isinstance(repo, AbstractSessionRepository)
+    session_uuid = repo.create_session("user")
+    assert repo.get_session_user_uuid(session_uuid) == "user"
+    with pytest.raises(KeyError):
+        repo.get_session_user_uuid("not_exist")
+    # errors are timed too
+    histogram = registry.histogram("session_repository", "get_session_user_uuid")
+    assert histogram.snapshot()[2] == 2
+
+    text = registry.render()
+    labels = 'layer="session_repository",name="create_session"'
+    assert f"authapp_span_duration_seconds_count{{{labels}}} 1" in text
+    assert f'authapp_span_duration_quantile_seconds{{{labels},quantile="0.99"}}' in text
+    # unused methods are not exported
+    assert 'name="delete_session"' not in text
+
+
+def test_instrument_async():
+    registry = MetricsRegistry()
+    backend = MockSessionRepository(logging.getLogger())
+    repo = instrument(
+        AsyncSessionRepositoryAdapter(backend, offload=False),
+        "session_repository",
+        registry,
+    )
+    session_uuid = asyncio.run(repo.create_session("user"))
+    assert backend.get_session_user_uuid(session_uuid) == "user"
+    histogram = registry.histogram("session_repository", "create_session")
+    assert histogram.snapshot()[2] == 1
+
+
+def test_register_stats():
+    registry = MetricsRegistry()
+    hits = {"hits": 0}
+    registry.register_stats("user_cache", lambda: hits)
+    registry.register_stats("broken", lambda: 1 / 0)
+    hits["hits"] = 3
+    text = registry.render()
+    # read on every render
+    assert 'authapp_component_stat{component="user_cache",name="hits"} 3' in text
+    assert 'component="broken"' not in text
@@ -0,0 +1,44 @@
+import pytest
+import authapp.registry as registry
+from authapp.registry import Registry, format_spec, parse_spec
+
+
+def test_parse_spec():
+    assert parse_spec("postgres") == ["postgres"]
+    assert parse_spec("Cached( postgres )") == ["cached", "postgres"]
+    names = parse_spec("single_flight(cached(postgres))")
+    assert names == ["single_flight", "cached", "postgres"]
+    assert format_spec(names) == "single_flight(cached(postgres))"
+    for spec in ["", "cached(postgres", "cached()", "cached(a)(b)", "a,b", "1db"]:
+        with pytest.raises(ValueError):
+            parse_spec(spec)
+
+
+def test_registry():
+    backends = Registry("Test type", "test.backends", "test.wrappers")
+    # strings are imported on first use
+    backends.register_backend("ordered", "collections:OrderedDict")
+    backends.register_wrapper("listed", lambda inner: [inner])
+    assert backends.get_backend("ordered")().__class__.__name__ == "OrderedDict"
+    assert backends.get_wrapper("listed")(1) == [1]
+    with pytest.raises(ValueError):
+        backends.get_backend("listed")
+    with pytest.raises(ValueError):
+        backends.register_backend("Bad-Name", dict)
+
+
+def test_registry_entry_points(monkeypatch):
+    class EntryPoint:
+        def load(self):
+            return dict
+
+    def entry_points(group: str, name: str):
+        if group == "test.backends" and name == "plugin":
+            return [EntryPoint()]
+        return []
+
+    monkeypatch.setattr(registry, "entry_points", entry_points)
+    backends = Registry("Test type", "test.backends", "test.wrappers")
+    assert backends.get_backend("plugin") is dict
+    with pytest.raises(ValueError):
+        backends.get_wrapper("plugin")
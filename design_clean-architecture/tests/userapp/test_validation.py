@@ -0,0 +1,68 @@
+import re
+import authapp.validation as validation
+from authapp.validation import (
+    is_valid_email,
+    is_valid_username,
+    validate_emails,
+    validate_usernames,
+)
+
+USERNAMES = [
+    "yuichi", "abc", "abcdefgh", "ab", "abcdefghi", "ab_c", "ab c", "", "ａｂｃ"
+]
+EMAILS = [
+    "iyuichi@vmware.com",
+    "a.b+c_d-e@sub-domain.co.jp",
+    "a@b.c",
+    "a@b",
+    "@b.c",
+    "a@@b.c",
+    "a@b..c",
+    "a@.b.c",
+    "a b@c.d",
+    "ａ@b.c",
+    "",
+]
+
+
+def test_same_as_regex():
+    username_regex = r"^[a-zA-Z0-9]{3,8}$"
+    email_regex = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
+    for name in USERNAMES:
+        assert is_valid_username(name) == bool(re.match(username_regex, name))
+    for email in EMAILS:
+        assert is_valid_email(email) == bool(re.match(email_regex, email))
+
+
+def test_trailing_newline():
+    assert not is_valid_username("abc\n")
+    assert not is_valid_email("a@b.c\n")
+
+
+def test_batch():
+    assert validate_usernames(USERNAMES) == [is_valid_username(n) for n in USERNAMES]
+    assert validate_emails(EMAILS) == [is_valid_email(e) for e in EMAILS]
+
+
+class _RecordingRegex:
+    # records the inputs that reach the regex engine
+    def __init__(self, regex: re.Pattern):
+        self._regex = regex
+        self.inputs: list[str] = []
+
+    def fullmatch(self, string: str):
+        self.inputs.append(string)
+        return self._regex.fullmatch(string)
+
+
+def test_long_input(monkeypatch):
+    regex = _RecordingRegex(validation._EMAIL_REGEX)
+    monkeypatch.setattr(validation, "_EMAIL_REGEX", regex)
+    # rejected by the pre-checks before the regex runs
+    assert not is_valid_email("a" * 1_000_000 + "@b.c")
+    assert not is_valid_email("a@" + "b-" * 100 + "." + "c" * 100 + "!")
+    assert not is_valid_email("a@b@" + "c" * 100 + ".d")
+    assert regex.inputs == []
+    assert is_valid_email("a@b.c")
+    assert regex.inputs == ["a@b.c"]
+    assert not is_valid_username("a" * 1_000_000)